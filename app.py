@@ -1,9 +1,17 @@
 # app.py
+import calendar
+import contextlib
+import functools
+import pandas as pd
 import streamlit as st
+import tempfile
+import os
 from datetime import date
+from dateutil.relativedelta import relativedelta
 
 # Import all DAO and Service classes from your project
-from src.config import config
+from src.config import config, ARCHIVE_AFTER_MONTHS
+from src.profiling import ActionProfiler
 from src.dao.goal_dao import GoalDAO
 from src.dao.step_dao import StepDAO
 from src.dao.transaction_dao import TransactionDAO
@@ -11,43 +19,97 @@ from src.dao.category_dao import CategoryDAO
 from src.dao.account_dao import AccountDAO
 from src.dao.debt_dao import DebtDAO
 from src.dao.recurring_transaction_dao import RecurringTransactionDAO
-from src.services.goal_service import GoalService
+from src.dao.reconciliation_dao import ReconciliationDAO
+from src.dao.budget_dao import BudgetDAO
+from src.dao.archive_dao import ArchiveDAO
+from src.dao.single_flight import SingleFlight, CoalescingDAO
+from src.dao.scheduler import ScheduledDAO
+from src.dao.unit_of_work import identity_mapped
+from src.services.goal_service import GoalService, PRIORITIES
 from src.services.step_service import StepService
-from src.services.transaction_service import TransactionService
+from src.services.transaction_service import TransactionService, TransactionError
+from src.services.duplicate_service import DuplicateService
 from src.services.account_service import AccountService
 from src.services.debt_service import DebtService
 from src.services.recurring_transaction_service import RecurringTransactionService
-from src.services.reporting_service import ReportingService
+from src.services.reporting_service import ReportingService, ReportingError, TREND_BUCKETS
+from src.services.goal_forecast_service import GoalForecastService
+from src.services.export_service import ExportService, ExportError
+from src.services.reconciliation_service import ReconciliationService
+from src.services.budget_service import BudgetService, BudgetError
+from src.services.net_worth_service import NetWorthService
+from src.services.cash_flow_service import CashFlowService
+from src.services.anomaly_service import AnomalyService
+from src.services.allocation_service import AllocationService, AllocationError
+from src.services.currency_service import CurrencyService, CurrencyError, currency_symbol
+from src.services.archive_service import ArchiveService, ArchiveError
+from src.models.money import Money, ZERO
 
 # --- INITIALIZATION ---
 @st.cache_resource
 def initialize_services():
     """Initializes all DAOs and Services."""
     db_client = config.get_supabase_client()
+    # These services are shared by every browser session, so identical list
+    # queries from concurrent sessions are coalesced into one backend request.
+    flight = SingleFlight(result_ttl=2.0)
+    # Every backend call is admitted by priority under shared concurrency and rate limits.
+    scheduler = config.get_request_scheduler()
     # DAOs
-    goal_dao = GoalDAO(db_client)
-    step_dao = StepDAO(db_client)
-    transaction_dao = TransactionDAO(db_client)
-    category_dao = CategoryDAO(db_client)
-    account_dao = AccountDAO(db_client)
-    debt_dao = DebtDAO(db_client)
-    recurring_dao = RecurringTransactionDAO(db_client)
+    # Service actions load each entity once and commit their changes together (see unit_of_work).
+    goal_dao = identity_mapped(CoalescingDAO(ScheduledDAO(GoalDAO(db_client), scheduler), flight,
+                                             reads=["list_goals"], writes=["create_goal", "update_goal", "save_goals"]))
+    step_dao = identity_mapped(ScheduledDAO(StepDAO(db_client), scheduler))
+    # Transfers and allocations change account balances, so they invalidate shared account reads too.
+    transaction_dao = CoalescingDAO(ScheduledDAO(TransactionDAO(db_client), scheduler), flight,
+                                    reads=[], writes=["transfer_funds", "allocate_to_goals"], invalidates=["accounts"])
+    category_dao = ScheduledDAO(CategoryDAO(db_client), scheduler)
+    account_dao = identity_mapped(CoalescingDAO(ScheduledDAO(AccountDAO(db_client), scheduler), flight, reads=["list_accounts", "list_accounts_arrow"],
+                                                writes=["create_account", "update_account_balance", "save_accounts"]))
+    debt_dao = identity_mapped(CoalescingDAO(ScheduledDAO(DebtDAO(db_client), scheduler), flight, reads=["list_debts", "list_debts_arrow"],
+                                             writes=["create_debt", "update_debt_balance", "update_debt", "save_debts"]))
+    recurring_dao = ScheduledDAO(RecurringTransactionDAO(db_client), scheduler)
+    reconciliation_dao = ScheduledDAO(ReconciliationDAO(db_client), scheduler)
+    budget_dao = ScheduledDAO(BudgetDAO(db_client), scheduler)
+    archive_dao = ScheduledDAO(ArchiveDAO(db_client), scheduler)
     # Services
-    account_service = AccountService(account_dao)
-    transaction_service = TransactionService(transaction_dao, goal_dao, category_dao, account_dao)
+    # Totals, reports and goal progress are in the base currency, converted with the cached local rates.
+    currency_service = CurrencyService(account_dao, config.get_fx_rates())
+    # Old closed months live in local partition files and backend rollups instead of the transactions table.
+    archive_service = ArchiveService(transaction_dao, archive_dao, config.get_transaction_archive(),
+                                     ARCHIVE_AFTER_MONTHS)
+    account_service = AccountService(account_dao, currency_service)
+    budget_service = BudgetService(budget_dao, category_dao, currency_service)
+    # Shared across sessions, so its balance index is built once and then extended.
+    net_worth_service = NetWorthService(account_dao, transaction_dao, debt_dao, currency_service, archive_service)
+    cash_flow_service = CashFlowService(account_dao, recurring_dao)
+    # Shared too: the history is scored once, later expenses one by one as they are added.
+    anomaly_service = AnomalyService(transaction_dao)
+    duplicate_service = DuplicateService(transaction_dao)
+    transaction_service = TransactionService(transaction_dao, goal_dao, category_dao, account_dao, budget_service, anomaly_service,
+                                             currency_service, duplicate_service)
     debt_service = DebtService(debt_dao, account_dao, transaction_service)
     step_service = StepService(step_dao, goal_dao)
-    goal_service = GoalService(goal_dao, step_dao, transaction_dao)
-    reporting_service = ReportingService(transaction_dao, category_dao)
+    goal_service = GoalService(goal_dao, step_dao, transaction_dao, currency_service)
+    allocation_service = AllocationService(goal_service, goal_dao, account_dao, transaction_dao, currency_service)
+    reporting_service = ReportingService(transaction_dao, category_dao, currency_service, archive_service)
     recurring_service = RecurringTransactionService(recurring_dao, transaction_service, debt_service)
+    forecast_service = GoalForecastService(goal_dao, transaction_dao, recurring_dao, currency_service=currency_service)
+    export_service = ExportService(transaction_dao, archive_service=archive_service)
+    reconciliation_service = ReconciliationService(account_dao, transaction_dao, reconciliation_dao)
     
     # Process recurring transactions on startup
     recurring_service.process_due_transactions()
     
-    return account_service, debt_service, goal_service, step_service, transaction_service, reporting_service
+    return account_service, debt_service, goal_service, step_service, transaction_service, reporting_service, forecast_service, export_service, reconciliation_service, budget_service, net_worth_service, recurring_service, cash_flow_service, anomaly_service, allocation_service, currency_service, duplicate_service, archive_service
 
 # Load all our services
-account_service, debt_service, goal_service, step_service, transaction_service, reporting_service = initialize_services()
+account_service, debt_service, goal_service, step_service, transaction_service, reporting_service, forecast_service, export_service, reconciliation_service, budget_service, net_worth_service, recurring_service, cash_flow_service, anomaly_service, allocation_service, currency_service, duplicate_service, archive_service = initialize_services()
+
+# Symbol of the base currency, used for every total and report.
+CUR = currency_symbol(currency_service.base)
+
+profiler = ActionProfiler.from_env()
 
 st.set_page_config(layout="wide")
 st.title("🎯 Personal Finance & Goal Manager")
@@ -56,97 +118,190 @@ st.title("🎯 Personal Finance & Goal Manager")
 menu = ["Dashboard", "Manage Goals", "Manage Finances", "Manage Accounts", "Manage Debts", "Reports"]
 choice = st.sidebar.selectbox("Menu", menu)
 
+with st.sidebar.expander("Backend queue"):
+    queue_stats = config.get_request_scheduler().stats()
+    st.caption(f"{queue_stats['active']} of {queue_stats['max_concurrency']} request slots in use")
+    st.dataframe([
+        {"priority": level, **{k: queue_stats[level][k] for k in ("queued", "calls", "avg_wait_seconds", "max_wait_seconds", "retries", "failures")}}
+        for level in ("interactive", "background", "bulk")
+    ], hide_index=True)
+
 
 # --- UI PAGES ---
+# Sections are fragments: a widget or form inside one reruns only that section,
+# and goal details are fetched only once a goal is opened. This keeps interaction
+# latency flat as the number of goals grows.
 
-if choice == "Dashboard":
-    st.subheader("Dashboard")
-    col1, col2, col3 = st.columns(3)
-    
-    accounts = account_service.list_accounts()
-    total_balance = sum(acc['balance'] for acc in accounts)
-    col1.metric("Total Account Balance", f"₹{total_balance:,.2f}")
+# Set while the whole script runs, so fragments profile themselves only on their own reruns.
+_full_run = {"active": False}
 
-    debts = debt_service.list_debts()
-    total_debt = sum(d['remaining_amount'] for d in debts)
-    col2.metric("Total Remaining Debt", f"₹{total_debt:,.2f}")
 
-    goals = goal_service.list_all_goals()
-    active_goals = [g for g in goals if g['status'] == 'Active']
-    col3.metric("Active Goals", len(active_goals))
-    
-    st.write("---")
-    st.write("### Active Goals Overview")
-    for goal in active_goals:
-        with st.expander(f"{goal['name']} (Budget: ₹{goal.get('budget', 0):,.2f})"):
-            details = goal_service.get_goal_details(goal['goal_id'])
-            summary = details.get('financial_summary', {})
-            
-            # UPDATED LOGIC: Convert string percentage to float for progress bar
-            progress_str = summary.get('progress_percentage', '0.0%')
-            progress_float = float(progress_str.strip('%'))
-            st.progress(progress_float / 100.0)
-            
-            st.write(f"**Saved:** ₹{summary.get('amount_saved', 0):,.2f} / **Budget:** ₹{summary.get('budget', 0):,.2f}")
-
-elif choice == "Manage Goals":
-    st.subheader("Manage Goals")
+def fragment(section):
+    """st.fragment that is profiled as its own action when it reruns alone."""
+    @functools.wraps(section)
+    def run(*args, **kwargs):
+        if _full_run["active"]:
+            return section(*args, **kwargs)
+        with profiler.profile(f"streamlit-fragment-{section.__name__}"):
+            return section(*args, **kwargs)
+    return st.fragment(run)
+
+
+def account_label(acc) -> str:
+    """Selectbox label of an account; names its currency when it is not the base one."""
+    label = f"{acc.account_id}: {acc.name}"
+    return label if acc.currency == currency_service.base else f"{label} ({acc.currency})"
+
+
+def amount_label(accounts, text: str = "Amount") -> str:
+    """Label of an amount entered in the currency of the selected account."""
+    if all(acc.currency == currency_service.base for acc in accounts):
+        return f"{text} ({CUR})"
+    return f"{text} (in the account's currency)"
+
+
+@fragment
+def goal_card(goal, context: str, manage: bool = False):
+    """One goal; its details, steps and forecast load only while it is open."""
+    label = f"**{goal.name}** - Status: {goal.status}" if manage else f"{goal.name} (Budget: {CUR}{goal.budget or ZERO:,.2f})"
+    if not st.toggle(label, key=f"goal_open_{context}_{goal.goal_id}"):
+        return
+    with st.container(border=True):
+        details = goal_service.get_goal_details(goal.goal_id)
+        # A fragment rerun passes the original argument again, so edits made here are read back from details.
+        goal = details.goal
+        summary = details.financial_summary
+        if manage:
+            st.write(f"**Budget:** {CUR}{summary.budget:,.2f} | **Priority:** {goal.priority}")
+            st.write(f"**Amount Saved:** {CUR}{summary.amount_saved:,.2f}")
+            st.write(f"**Progress:** {summary.progress_percentage:.2f}%")
+            st.progress(min(summary.progress_percentage / 100.0, 1.0))
+
+            # Display steps
+            st.write("**Steps:**")
+            for step in details.steps:
+                st.checkbox(step.description, value=(step.status=='Completed'), key=f"step_{step.step_id}")
+
+            # Add a step; only this goal is refreshed
+            with st.form(f"add_step_{goal.goal_id}", clear_on_submit=True):
+                new_step_desc = st.text_input("New Step Description")
+                if st.form_submit_button("Add Step"):
+                    if new_step_desc:
+                        step_service.add_step_to_goal(goal.goal_id, new_step_desc)
+                        st.rerun(scope="fragment")
+
+            # Priority used by income auto-allocation
+            with st.form(f"goal_priority_{goal.goal_id}"):
+                new_priority = st.selectbox("Priority (1 = highest)", PRIORITIES, index=PRIORITIES.index(goal.priority))
+                if st.form_submit_button("Save Priority"):
+                    goal_service.update_goal_details(goal.goal_id, new_priority=new_priority)
+                    st.rerun(scope="fragment")
+            return
+
+        st.progress(min(summary.progress_percentage / 100.0, 1.0))
+        st.write(f"**Saved:** {CUR}{summary.amount_saved:,.2f} / **Budget:** {CUR}{summary.budget:,.2f}")
+
+        forecast = forecast_service.get_forecast(goal.goal_id)
+        if forecast and forecast['p50_date']:
+            st.caption(f"Forecast completion: {forecast['p10_date']} (P10) · {forecast['p50_date']} (P50) · "
+                       f"{forecast['p90_date']} (P90), {forecast['completion_rate']:.0%} of simulations finish")
+        elif forecast:
+            st.caption("Forecast: not reachable at the current saving pace.")
+        else:
+            st.caption("Forecast: computing…")
+
+
+@fragment
+def net_worth_history():
+    st.write("### Balances & Net Worth")
+    col1, col2 = st.columns(2)
+    history_range = col1.selectbox("Range", ["3 months", "1 year", "3 years"], index=1, key="history_range")
+    history_view = col2.radio("Show", ["Total", "Accounts"], horizontal=True, key="history_view")
+    months = {"3 months": 3, "1 year": 12, "3 years": 36}[history_range]
+    history_end = date.today()
+    history = net_worth_service.balance_history(
+        history_end - relativedelta(months=months), history_end, "day" if months <= 3 else "week")
+    # Debts have no dated history, so the chart shows assets and net worth is shown as of today.
+    col1, col2 = st.columns(2)
+    col1.metric("Net worth today", f"{CUR}{history['current_net_worth']:,.2f}")
+    col2.metric("Remaining debt", f"{CUR}{history['current_debt']:,.2f}")
+    if history_view == "Total":
+        chart = pd.DataFrame({"Total balance": [float(v) for v in history["total_balance"]]},
+                             index=history["dates"])
+    else:
+        chart = pd.DataFrame({name: [float(v) for v in values] for name, values in history["accounts"].items()},
+                             index=history["dates"])
+    st.line_chart(chart)
+
 
+@fragment
+def cash_flow_forecast():
+    st.write("### Cash-Flow Forecast")
+    col1, col2 = st.columns(2)
+    horizon = col1.selectbox("Horizon", [30, 90, 180, 365], index=3, format_func=lambda d: f"{d} days", key="cash_flow_horizon")
+    low_balance = col2.number_input(f"Warn below ({CUR})", min_value=0.0, value=0.0, format="%.2f", key="cash_flow_threshold")
+    cash_flow = cash_flow_service.forecast(horizon, Money.from_rupees(low_balance))
+    for summary in cash_flow["accounts"]:
+        if summary["first_below_threshold"]:
+            st.error(f"'{summary['account_name']}' is projected to drop below {CUR}{low_balance:,.2f} on "
+                     f"{summary['first_below_threshold']} (lowest: {CUR}{summary['lowest_balance']:,.2f} on "
+                     f"{summary['lowest_balance_date']}).")
+    if cash_flow["accounts"]:
+        st.line_chart(pd.DataFrame(
+            cash_flow["daily_balances"].T / 100,
+            index=cash_flow["dates"],
+            columns=[s["account_name"] for s in cash_flow["accounts"]],
+        ))
+
+
+@fragment
+def unusual_expenses():
+    st.write("### Unusual Expenses")
+    flagged = anomaly_service.flagged(10)
+    if not flagged:
+        st.caption("Nothing unusual so far.")
+        return
+    st.dataframe([{
+        "Date": str(e["transaction_date"] or "")[:10],
+        "Description": e["description"],
+        "Category": e["category_name"],
+        "Amount": float(e["amount"]),
+        "Typical": float(e["typical_amount"]),
+        "Unusual for": e["flagged_by"],
+    } for e in flagged], hide_index=True)
+
+
+@fragment
+def goals_section():
     with st.form("create_goal_form", clear_on_submit=True):
         st.write("### Create a New Goal")
         goal_name = st.text_input("Goal Name")
-        goal_budget = st.number_input("Budget (₹)", min_value=0.0, format="%.2f")
+        goal_budget = st.number_input(f"Budget ({CUR})", min_value=0.0, format="%.2f")
+        goal_priority = st.selectbox("Priority (1 = highest)", PRIORITIES, index=PRIORITIES.index(3))
         submitted = st.form_submit_button("Create Goal")
         if submitted and goal_name:
-            goal_service.create_new_goal(goal_name, goal_budget)
+            goal_service.create_new_goal(goal_name, goal_budget, goal_priority)
             st.success(f"Goal '{goal_name}' created!")
-            st.rerun()
 
     st.write("---")
     st.write("### All Goals")
     all_goals = goal_service.list_all_goals()
     if not all_goals:
         st.info("No goals found. Create one above!")
-    else:
-        for goal in all_goals:
-            with st.expander(f"**{goal['name']}** - Status: {goal['status']}"):
-                details = goal_service.get_goal_details(goal['goal_id'])
-                summary = details.get('financial_summary', {})
-                
-                # Display financial summary
-                st.write(f"**Budget:** ₹{summary.get('budget', 0):,.2f}")
-                st.write(f"**Amount Saved:** ₹{summary.get('amount_saved', 0):,.2f}")
-                st.write(f"**Progress:** {summary.get('progress_percentage', '0.00%')}")
-
-                # UPDATED LOGIC: Convert string percentage to float for progress bar
-                progress_str = summary.get('progress_percentage', '0.0%')
-                progress_float = float(progress_str.strip('%'))
-                st.progress(progress_float / 100.0)
-                
-                # Display steps
-                st.write("**Steps:**")
-                for step in details.get('steps', []):
-                    st.checkbox(step['description'], value=(step['status']=='Completed'), key=f"step_{step['step_id']}")
-                
-                # Add a step
-                with st.form(f"add_step_{goal['goal_id']}", clear_on_submit=True):
-                    new_step_desc = st.text_input("New Step Description")
-                    if st.form_submit_button("Add Step"):
-                        if new_step_desc:
-                            step_service.add_step_to_goal(goal['goal_id'], new_step_desc)
-                            st.rerun()
-
-elif choice == "Manage Finances":
-    st.subheader("Manage Finances")
-    
+    for goal in all_goals:
+        goal_card(goal, "manage", manage=True)
+
+
+@fragment
+def finances_section():
     accounts = account_service.list_accounts()
-    account_choices = {f"{acc['account_id']}: {acc['name']}": acc['account_id'] for acc in accounts}
+    account_choices = {account_label(acc): acc.account_id for acc in accounts}
 
     goals = goal_service.list_all_goals()
-    goal_choices = {f"{g['goal_id']}: {g['name']}": g['goal_id'] for g in goals if g.get('status')=='Active'}
-    
-    tab1, tab2, tab3 = st.tabs(["Add Expense", "Add Income", "Allocate to Goal"])
-    
+    goal_choices = {f"{g.goal_id}: {g.name}": g.goal_id for g in goals if g.status=='Active'}
+
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Add Expense", "Add Income", "Allocate to Goal", "Budgets", "Auto-Allocate"])
+
     with tab1:
         with st.form("add_expense", clear_on_submit=True):
             st.write("### Log a New Expense")
@@ -155,13 +310,21 @@ elif choice == "Manage Finances":
             else:
                 acc_choice = st.selectbox("From Account", options=account_choices.keys())
                 category = st.text_input("Category (e.g., Food, Transport)")
-                amount = st.number_input("Amount (₹)", min_value=0.01, format="%.2f")
+                amount = st.number_input(amount_label(accounts), min_value=0.01, format="%.2f")
                 desc = st.text_input("Description (Optional)")
+                allow_duplicate = st.checkbox("Allow duplicate", key="expense_allow_duplicate",
+                                              help="Save even if an identical expense is already recorded today.")
                 if st.form_submit_button("Add Expense"):
-                    transaction_service.add_expense(amount, category, account_choices[acc_choice], desc)
-                    st.success("Expense added!")
-                    st.rerun()
-    
+                    try:
+                        alerts = []
+                        transaction_service.add_expense(amount, category, account_choices[acc_choice], desc,
+                                                        allow_duplicate=allow_duplicate, budget_alerts=alerts)
+                        st.success("Expense added!")
+                        for alert in alerts:
+                            st.warning(alert)
+                    except TransactionError as e:
+                        st.error(e)
+
     with tab2:
         with st.form("add_income", clear_on_submit=True):
             st.write("### Log New Income")
@@ -169,12 +332,17 @@ elif choice == "Manage Finances":
                 st.warning("Please create an account first in 'Manage Accounts'.")
             else:
                 acc_choice = st.selectbox("To Account", options=account_choices.keys())
-                amount = st.number_input("Amount (₹)", min_value=0.01, format="%.2f")
+                amount = st.number_input(amount_label(accounts), min_value=0.01, format="%.2f")
                 desc = st.text_input("Description (Optional)")
+                allow_duplicate = st.checkbox("Allow duplicate", key="income_allow_duplicate",
+                                              help="Save even if an identical income is already recorded today.")
                 if st.form_submit_button("Add Income"):
-                    transaction_service.add_income(amount, account_choices[acc_choice], desc)
-                    st.success("Income added!")
-                    st.rerun()
+                    try:
+                        transaction_service.add_income(amount, account_choices[acc_choice], desc,
+                                                       allow_duplicate=allow_duplicate)
+                        st.success("Income added!")
+                    except TransactionError as e:
+                        st.error(e)
 
     with tab3:
         with st.form("allocate_goal", clear_on_submit=True):
@@ -184,59 +352,378 @@ elif choice == "Manage Finances":
             else:
                 acc_choice = st.selectbox("From Account", options=account_choices.keys())
                 goal_choice = st.selectbox("To Goal", options=goal_choices.keys())
-                amount = st.number_input("Amount to Allocate (₹)", min_value=0.01, format="%.2f")
+                amount = st.number_input(amount_label(accounts, "Amount to Allocate"), min_value=0.01, format="%.2f")
                 desc = st.text_input("Description (Optional)")
                 if st.form_submit_button("Allocate"):
                     transaction_service.allocate_to_goal(goal_choices[goal_choice], amount, account_choices[acc_choice], desc)
                     st.success("Allocation successful!")
-                    st.rerun()
 
-elif choice == "Manage Accounts":
-    st.subheader("Manage Accounts")
+    with tab4:
+        with st.form("set_budget", clear_on_submit=True):
+            st.write("### Set a Monthly Category Budget")
+            budget_category = st.text_input("Category (e.g., Food)")
+            budget_limit = st.number_input(f"Monthly Limit ({CUR})", min_value=0.01, format="%.2f")
+            budget_alerts = st.multiselect("Alert at", [0.5, 0.8, 0.9, 1.0], default=[0.8, 1.0],
+                                           format_func=lambda t: f"{t:.0%}")
+            if st.form_submit_button("Save Budget"):
+                try:
+                    budget_service.set_budget(budget_category, Money.from_rupees(budget_limit), budget_alerts)
+                    st.success(f"Budget for '{budget_category}' saved.")
+                except BudgetError as e:
+                    st.error(e)
+
+        # Rendered after the forms, so it already includes a submit from this run.
+        st.write("### This Month")
+        statuses = budget_service.get_budget_status()
+        if not statuses:
+            st.info("No category budgets set.")
+        for status in statuses:
+            st.write(f"**{status.category_name}:** {CUR}{status.spent:,.2f} of {CUR}{status.monthly_limit:,.2f} "
+                     f"({status.percent_used:.0f}%)")
+            st.progress(min(status.percent_used / 100.0, 1.0))
+
+    with tab5:
+        st.write("### Split an Income Across Goals")
+        st.caption("Goals are funded by priority, each up to what it still needs; equal priorities share evenly.")
+        if not account_choices:
+            st.warning("Please create an account first in 'Manage Accounts'.")
+            return
+        with st.form("preview_allocation"):
+            acc_choice = st.selectbox("From Account", options=account_choices.keys())
+            amount = st.number_input(f"Amount to Split ({CUR})", min_value=0.01, format="%.2f")
+            if st.form_submit_button("Preview Split"):
+                try:
+                    st.session_state.allocation_plan = allocation_service.preview(Money.from_rupees(amount), account_choices[acc_choice])
+                except AllocationError as e:
+                    st.session_state.pop("allocation_plan", None)
+                    st.error(e)
+
+        plan = st.session_state.get("allocation_plan")
+        if plan:
+            st.dataframe([{
+                "Goal": a.goal_name,
+                "Priority": a.priority,
+                "Still Needed": float(a.remaining_to_save),
+                "Allocated": float(a.amount),
+            } for a in plan.allocations], hide_index=True)
+            st.write(f"**Allocated:** {CUR}{plan.allocated:,.2f} | **Not needed by any goal:** {CUR}{plan.unallocated:,.2f}")
+            desc = st.text_input("Description (Optional)", key="allocation_desc")
+            if st.button("Confirm Allocation", disabled=plan.allocated <= ZERO):
+                try:
+                    transactions, _ = allocation_service.commit(plan, desc)
+                    del st.session_state.allocation_plan
+                    st.success(f"Saved to {len(transactions)} goals in one write.")
+                except AllocationError as e:
+                    st.error(e)
+
+
+@fragment
+def accounts_section():
     with st.form("create_account", clear_on_submit=True):
         st.write("### Create New Account")
         acc_name = st.text_input("Account Name (e.g., Savings Bank)")
-        initial_balance = st.number_input("Initial Balance (₹)", min_value=0.0, format="%.2f")
+        currencies = currency_service.currencies()
+        acc_currency = st.selectbox("Currency", currencies, index=currencies.index(currency_service.base))
+        initial_balance = st.number_input("Initial Balance (in the account's currency)", min_value=0.0, format="%.2f")
         if st.form_submit_button("Create Account"):
-            account_service.create_account(acc_name, initial_balance)
-            st.success(f"Account '{acc_name}' created.")
-            st.rerun()
-    
+            try:
+                account_service.create_account(acc_name, initial_balance, acc_currency)
+                st.success(f"Account '{acc_name}' created.")
+            except CurrencyError as e:
+                st.error(e)
+
     st.write("---")
-    st.write("### Your Accounts")
+    st.write("### Transfer Between Accounts")
     accounts_data = account_service.list_accounts()
-    st.dataframe(accounts_data)
+    account_choices = {account_label(acc): acc.account_id for acc in accounts_data}
+    if len(account_choices) < 2:
+        st.info("Create at least two accounts to transfer money between them.")
+    else:
+        with st.form("transfer", clear_on_submit=True):
+            col1, col2 = st.columns(2)
+            from_choice = col1.selectbox("From Account", options=account_choices.keys())
+            to_choice = col2.selectbox("To Account", options=account_choices.keys(), index=1)
+            amount = st.number_input(amount_label(accounts_data), min_value=0.01, format="%.2f")
+            desc = st.text_input("Description (Optional)")
+            if st.form_submit_button("Transfer"):
+                try:
+                    transaction_service.transfer(account_choices[from_choice], account_choices[to_choice],
+                                                 Money.from_rupees(amount), desc or None)
+                    st.success("Transfer complete!")
+                except TransactionError as e:
+                    st.error(e)
+
+    st.write("---")
+    st.write("### Your Accounts")
+    st.dataframe(account_service.list_accounts_arrow())
 
-elif choice == "Manage Debts":
-    st.subheader("Manage Debts")
+
+@fragment
+def reconcile_section():
+    st.write("### Reconcile Balances")
+    repair_drift = st.checkbox("Reset drifted balances to the ledger balance")
+    if st.button("Reconcile"):
+        results = reconciliation_service.reconcile(repair=repair_drift)
+        drifted = [r for r in results if r.drift]
+        if drifted:
+            st.warning(f"{len(drifted)} account(s) drifted from the ledger." + (" Repaired." if repair_drift else ""))
+        else:
+            st.success("All account balances match the ledger.")
+        st.dataframe([r.to_dict() for r in results])
+
+
+@fragment
+def archive_section():
+    st.write("### Archive Old Transactions")
+    cutoff = archive_service.cutoff()
+    st.caption(f"Incomes and expenses dated before {cutoff:%B %Y} can be moved out of the live ledger. "
+               "Reports and balance history still include them.")
+    if st.button("Archive Old Transactions"):
+        try:
+            results = archive_service.archive_old_months()
+            if results:
+                st.success(f"Archived {sum(r['transactions'] for r in results):,} transactions from {len(results)} month(s).")
+            else:
+                st.info("Nothing to archive.")
+        except ArchiveError as e:
+            st.error(e)
+    status = archive_service.status()
+    if status:
+        st.dataframe([{
+            "Month": s["month"],
+            "Transactions": s["transactions"],
+            "Archived At": str(s["archived_at"] or "")[:19],
+            "Local File (KB)": round(s["bytes"] / 1024, 1) if s["bytes"] else None,
+        } for s in status], hide_index=True)
+
+
+@fragment
+def debts_section():
     with st.form("create_debt", clear_on_submit=True):
         st.write("### Add New Debt")
         debt_name = st.text_input("Debt Name (e.g., Laptop Loan)")
-        total_amount = st.number_input("Total Amount (₹)", min_value=0.0, format="%.2f")
-        emi = st.number_input("Monthly EMI (Optional, ₹)", min_value=0.0, format="%.2f")
+        total_amount = st.number_input(f"Total Amount ({CUR})", min_value=0.0, format="%.2f")
+        emi = st.number_input(f"Monthly EMI (Optional, {CUR})", min_value=0.0, format="%.2f")
         if st.form_submit_button("Add Debt"):
             debt_service.add_debt(debt_name, total_amount, emi if emi > 0 else None)
             st.success(f"Debt '{debt_name}' added.")
-            st.rerun()
-            
+
     st.write("---")
     st.write("### Your Debts")
-    debts_data = debt_service.list_debts()
-    st.dataframe(debts_data)
-    
-elif choice == "Reports":
-    st.subheader("Reports")
+    st.dataframe(debt_service.list_debts_arrow())
+
+
+@fragment
+def spending_summary_report():
     st.write("### Monthly Spending Summary")
-    
-    today = date.today()
-    month_str = st.text_input("Enter Month (YYYY-MM)", value=today.strftime("%Y-%m"))
-    
+    month_str = st.text_input("Enter Month (YYYY-MM)", value=date.today().strftime("%Y-%m"))
+
     if st.button("Generate Report"):
         if len(month_str) == 7 and month_str[4] == '-':
-            start_date = f"{month_str}-01"
-            end_date = f"{month_str}-31" # A simple approximation
-            report = reporting_service.generate_spending_summary(start_date, end_date)
+            year, month = int(month_str[:4]), int(month_str[5:])
+            _, last_day = calendar.monthrange(year, month)
+            start_date = f"{year}-{month:02d}-01"
+            end_date = f"{year}-{month:02d}-{last_day}"
+            report = reporting_service.generate_spending_summary(start_date, end_date, as_arrow=True)
             st.write(f"Spending for {month_str}:")
             st.dataframe(report.get('summary', []))
         else:
-            st.error("Please use YYYY-MM format.")
\ No newline at end of file
+            st.error("Please use YYYY-MM format.")
+
+
+@fragment
+def spending_trend_report():
+    st.write("### Spending Trend")
+    today = date.today()
+    col1, col2, col3 = st.columns(3)
+    trend_start = col1.date_input("From", value=date(today.year - 1, today.month, 1), key="trend_start")
+    trend_end = col2.date_input("To", value=today, key="trend_end")
+    trend_bucket = col3.selectbox("Group by", list(TREND_BUCKETS), key="trend_bucket")
+    if st.button("Show Trend"):
+        try:
+            trend = reporting_service.generate_spending_trend(trend_start.isoformat(), trend_end.isoformat(), trend_bucket)
+            if trend["categories"]:
+                chart = pd.DataFrame(
+                    {name: [float(v) for v in values] for name, values in trend["matrix"].items()},
+                    index=trend["periods"],
+                )
+                st.line_chart(chart)
+                st.dataframe(chart)
+            else:
+                st.info("No spending in this range.")
+        except ReportingError as e:
+            st.error(e)
+
+
+@fragment
+def top_spending_report():
+    st.write("### Where Does My Money Go")
+    today = date.today()
+    col1, col2, col3 = st.columns(3)
+    top_start = col1.date_input("From", value=date(today.year, 1, 1), key="top_start")
+    top_end = col2.date_input("To", value=today, key="top_end")
+    top_limit = col3.number_input("Show top", min_value=1, max_value=50, value=10, key="top_limit")
+    if st.button("Show Top Spending"):
+        try:
+            top = reporting_service.generate_top_spending(top_start.isoformat(), top_end.isoformat(), int(top_limit))
+            if not top["transactions_scanned"]:
+                st.info("No spending in this range.")
+                return
+            st.caption(f"{top['transactions_scanned']} expenses, {CUR}{top['total_spent']:,.2f} in total.")
+            by_category, by_payee = st.tabs(["Categories", "Payees"])
+            for tab, prefix in ((by_category, "categories"), (by_payee, "payees")):
+                spend_col, count_col = tab.columns(2)
+                spend_col.write("By amount")
+                spend_col.dataframe(pd.DataFrame(
+                    [{"Name": e["name"], "Amount": float(e["amount"])} for e in top[f"{prefix}_by_spend"]]))
+                count_col.write("By frequency")
+                count_col.dataframe(pd.DataFrame(
+                    [{"Name": e["name"], "Expenses": e["count"]} for e in top[f"{prefix}_by_count"]]))
+        except ReportingError as e:
+            st.error(e)
+
+
+@fragment
+def duplicates_report():
+    st.write("### Duplicate Transactions")
+    st.caption("Incomes and expenses with the same account, amount, day and description.")
+    if st.button("Scan for Duplicates"):
+        groups = duplicate_service.scan()
+        if not groups:
+            st.info("No duplicate transactions found.")
+            return
+        names = {acc.account_id: account_label(acc) for acc in account_service.list_accounts()}
+        st.dataframe([{
+            "Date": g["date"],
+            "Account": names.get(g["account_id"], g["account_id"]),
+            "Type": g["type"],
+            "Description": g["description"],
+            "Amount": float(g["amount"]),
+            "Copies": len(g["transaction_ids"]),
+            "Transaction IDs": ", ".join(map(str, g["transaction_ids"])),
+        } for g in groups], hide_index=True)
+
+
+@fragment
+def export_section():
+    st.write("### Export Transactions")
+    accounts = account_service.list_accounts()
+    export_accounts = {"All accounts": None}
+    export_accounts.update({account_label(acc): acc.account_id for acc in accounts})
+    col1, col2 = st.columns(2)
+    export_start = col1.date_input("From", value=None, key="export_start")
+    export_end = col2.date_input("To", value=None, key="export_end")
+    export_account = st.selectbox("Account", options=export_accounts.keys(), key="export_account")
+    export_format = st.radio("Format", ExportService.FORMATS, horizontal=True, key="export_format")
+
+    if st.button("Prepare Export"):
+        # Only the latest export of a session is kept on disk.
+        previous = st.session_state.pop("export_file", None)
+        if previous:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(previous[0])
+        # The export streams to a temporary file, so only one page is held in memory while writing.
+        mode = "w" if export_format == "csv" else "wb"
+        encoding = "utf-8" if export_format == "csv" else None
+        output = tempfile.NamedTemporaryFile(mode, suffix=f".{export_format}", delete=False, encoding=encoding, newline="" if encoding else None)
+        try:
+            with output:
+                stats = export_service.export_transactions(
+                    output, export_format,
+                    export_start.isoformat() if export_start else None,
+                    export_end.isoformat() if export_end else None,
+                    export_accounts[export_account],
+                )
+            st.session_state["export_file"] = (output.name, export_format)
+            st.success(f"Exported {stats['rows']:,} rows in {stats['seconds']}s ({stats['rows_per_second']:,.0f} rows/sec).")
+        except ExportError as e:
+            st.error(str(e))
+        finally:
+            # A failed export leaves nothing behind.
+            if "export_file" not in st.session_state:
+                os.remove(output.name)
+
+    if "export_file" in st.session_state:
+        path, fmt = st.session_state["export_file"]
+        with open(path, "rb") as exported:
+            st.download_button("Download Export", exported, file_name=f"transactions.{fmt}",
+                               mime="text/csv" if fmt == "csv" else "application/octet-stream")
+
+
+# Each full rerun is one profiled action when GOAL_MANAGER_PROFILE_DIR is set; a no-op otherwise.
+with profiler.profile(f"streamlit-{choice}"):
+    _full_run["active"] = True
+    try:
+        if choice == "Dashboard":
+            st.subheader("Dashboard")
+            col1, col2, col3 = st.columns(3)
+
+            accounts = account_service.list_accounts()
+            total_balance = account_service.total_balance(accounts)
+            col1.metric("Total Account Balance", f"{CUR}{total_balance:,.2f}")
+
+            debts = debt_service.list_debts()
+            total_debt = Money.total(d.remaining_amount for d in debts)
+            col2.metric("Total Remaining Debt", f"{CUR}{total_debt:,.2f}")
+
+            goals = goal_service.list_all_goals()
+            active_goals = [g for g in goals if g.status == 'Active']
+            col3.metric("Active Goals", len(active_goals))
+
+            st.write("---")
+            net_worth_history()
+
+            st.write("---")
+            st.write("### Upcoming Payments (next 30 days)")
+            upcoming = recurring_service.upcoming_payments(30)
+            if upcoming:
+                st.dataframe([{**p, "amount": float(p["amount"])} for p in upcoming], hide_index=True)
+            else:
+                st.caption("No recurring payments due in the next 30 days.")
+
+            st.write("---")
+            cash_flow_forecast()
+
+            st.write("---")
+            unusual_expenses()
+
+            st.write("---")
+            st.write("### Active Goals Overview")
+            # Forecasts run on a process pool; an opened goal shows its forecast once it is ready.
+            forecast_service.forecast_active_goals(wait=False)
+            for goal in active_goals:
+                goal_card(goal, "dashboard")
+
+        elif choice == "Manage Goals":
+            st.subheader("Manage Goals")
+            goals_section()
+
+        elif choice == "Manage Finances":
+            st.subheader("Manage Finances")
+            finances_section()
+
+        elif choice == "Manage Accounts":
+            st.subheader("Manage Accounts")
+            accounts_section()
+            st.write("---")
+            reconcile_section()
+            st.write("---")
+            archive_section()
+
+        elif choice == "Manage Debts":
+            st.subheader("Manage Debts")
+            debts_section()
+
+        elif choice == "Reports":
+            st.subheader("Reports")
+            spending_summary_report()
+            st.write("---")
+            spending_trend_report()
+            st.write("---")
+            top_spending_report()
+            st.write("---")
+            duplicates_report()
+            st.write("---")
+            export_section()
+    finally:
+        _full_run["active"] = False
@@ -0,0 +1,375 @@
+# src/cli/commands.py
+import argparse
+import calendar
+import contextlib
+import json
+import shlex
+import sys
+from datetime import date
+from typing import Callable, Dict, Iterable, List
+
+from postgrest.exceptions import APIError
+
+from src.models.money import Money
+from src.models.records import json_default
+from src.services.goal_service import GoalError
+from src.services.step_service import StepError
+from src.services.transaction_service import TransactionError, DUPLICATE_POLICIES
+from src.services.debt_service import DebtError
+from src.services.export_service import ExportError
+from src.services.goal_forecast_service import GoalForecastError
+from src.services.reconciliation_service import ReconciliationError
+from src.services.reporting_service import ReportingError, TREND_BUCKETS
+from src.services.budget_service import BudgetError
+from src.services.net_worth_service import NetWorthError, HISTORY_STEPS
+from src.services.recurring_transaction_service import RecurringTransactionError
+from src.services.cash_flow_service import CashFlowError
+from src.services.allocation_service import AllocationError
+from src.services.currency_service import CurrencyError
+from src.services.archive_service import ArchiveError
+
+# Errors that are reported as a failed command instead of a crash. APIError covers requests the
+# backend rejected (constraint violations, missing functions), which the services pass through.
+COMMAND_ERRORS = (
+    GoalError, StepError, TransactionError, DebtError, ExportError, GoalForecastError,
+    ReconciliationError, ReportingError, BudgetError, NetWorthError, RecurringTransactionError, CashFlowError, AllocationError,
+    CurrencyError, ArchiveError, APIError, ArithmeticError, ValueError, OSError,
+)
+
+# Commands that a batch can fold into a single bulk write.
+BULK_COMMANDS = ("add-expense", "add-income")
+
+
+class CommandError(Exception):
+    """Raised for invalid command lines, instead of argparse exiting the process."""
+    pass
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise CommandError(message)
+
+
+def _money(text: str) -> Money:
+    """A positive amount."""
+    amount = _non_negative_money(text)
+    if not amount:
+        raise argparse.ArgumentTypeError(f"amount must be positive: '{text}'")
+    return amount
+
+
+def _non_negative_money(text: str) -> Money:
+    try:
+        amount = Money.from_rupees(text)
+    except ArithmeticError:
+        raise argparse.ArgumentTypeError(f"invalid amount: '{text}'")
+    if amount < Money(0):
+        raise argparse.ArgumentTypeError(f"amount must not be negative: '{text}'")
+    return amount
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the parser shared by the command line and batch files."""
+    parser = _ArgumentParser(prog="goal-manager", description="Scriptable Personal Finance & Goal Manager. Prints JSON.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list-accounts", help="List all accounts.")
+    sub.add_parser("list-goals", help="List all goals.")
+    sub.add_parser("list-debts", help="List all debts.")
+
+    goal = sub.add_parser("goal", help="Show a goal with its steps and financial summary.")
+    goal.add_argument("goal_id", type=int)
+
+    expense = sub.add_parser("add-expense", help="Log a general expense.")
+    expense.add_argument("amount", type=_money)
+    expense.add_argument("--account", type=int, required=True, dest="account_id")
+    expense.add_argument("--category", required=True)
+    expense.add_argument("--description")
+    expense.add_argument("--allow-duplicate", action="store_true",
+                         help="Save even if an identical expense is already recorded today.")
+
+    income = sub.add_parser("add-income", help="Log general income.")
+    income.add_argument("amount", type=_money)
+    income.add_argument("--account", type=int, required=True, dest="account_id")
+    income.add_argument("--description")
+    income.add_argument("--allow-duplicate", action="store_true",
+                        help="Save even if an identical income is already recorded today.")
+
+    allocate = sub.add_parser("allocate", help="Allocate savings from an account to a goal.")
+    allocate.add_argument("amount", type=_money)
+    allocate.add_argument("--goal", type=int, required=True, dest="goal_id")
+    allocate.add_argument("--account", type=int, required=True, dest="account_id")
+    allocate.add_argument("--description")
+
+    preview_split = sub.add_parser("preview-allocation", help="Show how an amount would be split across active goals by priority.")
+    preview_split.add_argument("amount", type=_money)
+    preview_split.add_argument("--account", type=int, required=True, dest="account_id")
+
+    auto_allocate = sub.add_parser("auto-allocate", help="Split an amount across active goals by priority and save it in one write.")
+    auto_allocate.add_argument("amount", type=_money)
+    auto_allocate.add_argument("--account", type=int, required=True, dest="account_id")
+    auto_allocate.add_argument("--description")
+
+    transfer = sub.add_parser("transfer", help="Move money between two accounts in one atomic write.")
+    transfer.add_argument("amount", type=_money)
+    transfer.add_argument("--from", type=int, required=True, dest="from_account_id")
+    transfer.add_argument("--to", type=int, required=True, dest="to_account_id")
+    transfer.add_argument("--description")
+
+    pay = sub.add_parser("pay-debt", help="Make a manual debt payment from an account.")
+    pay.add_argument("amount", type=_money)
+    pay.add_argument("--debt", type=int, required=True, dest="debt_id")
+    pay.add_argument("--account", type=int, required=True, dest="account_id")
+
+    budget = sub.add_parser("set-budget", help="Set the monthly limit of a category.")
+    budget.add_argument("category")
+    budget.add_argument("limit", type=_money)
+    budget.add_argument("--alert-at", type=float, nargs="+", default=[0.8, 1.0], dest="thresholds",
+                        help="Fractions of the limit that trigger a warning.")
+
+    status = sub.add_parser("budgets", help="Month-to-date spend against every category budget.")
+    status.add_argument("--month", help="YYYY-MM (default: this month)")
+
+    report = sub.add_parser("report", help="Monthly spending summary by category.")
+    report.add_argument("--month", required=True, help="YYYY-MM")
+
+    trend = sub.add_parser("trend", help="Spending per category and period over a date range.")
+    trend.add_argument("--start", required=True, help="YYYY-MM-DD")
+    trend.add_argument("--end", required=True, help="YYYY-MM-DD")
+    trend.add_argument("--bucket", choices=list(TREND_BUCKETS), default="month")
+
+    top = sub.add_parser("top", help="Top categories and payees by amount and frequency over a date range.")
+    top.add_argument("--start", required=True, help="YYYY-MM-DD")
+    top.add_argument("--end", required=True, help="YYYY-MM-DD")
+    top.add_argument("--limit", type=int, default=10)
+
+    anomalies = sub.add_parser("anomalies", help="Recently flagged unusual expenses.")
+    anomalies.add_argument("--limit", type=int, default=20)
+
+    sub.add_parser("duplicates", help="Scan the whole ledger for duplicate incomes and expenses.")
+
+    history = sub.add_parser("history", help="Account balances over a date range, and net worth as of today.")
+    history.add_argument("--start", required=True, type=date.fromisoformat, help="YYYY-MM-DD")
+    history.add_argument("--end", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (default: today)")
+    history.add_argument("--step", choices=list(HISTORY_STEPS), default="day")
+
+    cash_flow = sub.add_parser("cash-flow", help="Projected account balances from scheduled recurring transactions.")
+    cash_flow.add_argument("--days", type=int, default=365)
+    cash_flow.add_argument("--threshold", type=_non_negative_money, default=Money(0), help="Flag balances below this amount.")
+
+    sub.add_parser("forecast", help="Completion forecasts for all active goals.")
+
+    export = sub.add_parser("export", help="Stream transactions to CSV or Parquet.")
+    export.add_argument("--format", choices=["csv", "parquet"], default="csv", dest="fmt")
+    export.add_argument("--output", required=True)
+    export.add_argument("--start")
+    export.add_argument("--end")
+    export.add_argument("--account", type=int, dest="account_id")
+
+    reconcile = sub.add_parser("reconcile", help="Reconcile account balances against the ledger.")
+    reconcile.add_argument("--repair", action="store_true")
+
+    archive = sub.add_parser("archive", help="Move old closed months of incomes and expenses into local partition files.")
+    archive.add_argument("--status", action="store_true", help="Only list the archived months.")
+
+    sub.add_parser("process-recurring", help="Process due recurring transactions.")
+
+    upcoming = sub.add_parser("upcoming", help="Recurring payments due in the next N days.")
+    upcoming.add_argument("--days", type=int, default=30)
+
+    batch = sub.add_parser("batch", help="Run one command per line from a file ('-' for stdin).")
+    batch.add_argument("file", nargs="?", default="-")
+    batch.add_argument("--chunk-size", type=int, default=500,
+                       help="Maximum number of consecutive expenses/incomes folded into one bulk write.")
+    batch.add_argument("--on-duplicate", choices=list(DUPLICATE_POLICIES), default="skip",
+                       help="Skip expenses/incomes already recorded today (so a re-run is safe), or reject their chunk.")
+    return parser
+
+
+class CommandRunner:
+    """
+    Executes parsed commands against the services of a GoalManagerCLI.
+    One runner (and so one client and connection pool) serves a whole batch.
+    """
+    def __init__(self, cli):
+        self.cli = cli
+        self.handlers: Dict[str, Callable] = {
+            "list-accounts": lambda a: self.cli.account_service.list_accounts(),
+            "list-goals": lambda a: self.cli.goal_service.list_all_goals(),
+            "list-debts": lambda a: self.cli.debt_service.list_debts(),
+            "goal": lambda a: self.cli.goal_service.get_goal_details(a.goal_id),
+            "add-expense": lambda a: self.cli.transaction_service.add_expense(a.amount, a.category, a.account_id, a.description,
+                                                                              allow_duplicate=a.allow_duplicate,
+                                                                              budget_alerts=a.budget_alerts),
+            "add-income": lambda a: self.cli.transaction_service.add_income(a.amount, a.account_id, a.description,
+                                                                            allow_duplicate=a.allow_duplicate),
+            "allocate": lambda a: self.cli.transaction_service.allocate_to_goal(a.goal_id, a.amount, a.account_id, a.description),
+            "preview-allocation": lambda a: self.cli.allocation_service.preview(a.amount, a.account_id),
+            "auto-allocate": self._auto_allocate,
+            "transfer": lambda a: self.cli.transfer(a.from_account_id, a.to_account_id, a.amount, a.description),
+            "pay-debt": lambda a: self.cli.debt_service.make_manual_payment(a.debt_id, a.account_id, a.amount),
+            "set-budget": lambda a: self.cli.budget_service.set_budget(a.category, a.limit, a.thresholds),
+            "budgets": lambda a: self.cli.budget_service.get_budget_status(
+                date.fromisoformat(f"{a.month}-01") if a.month else None),
+            "report": self._report,
+            "trend": lambda a: self.cli.reporting_service.generate_spending_trend(a.start, a.end, a.bucket),
+            "anomalies": lambda a: self.cli.anomaly_service.flagged(a.limit),
+            "duplicates": lambda a: self.cli.duplicate_service.scan(),
+            "top": lambda a: self.cli.reporting_service.generate_top_spending(a.start, a.end, a.limit),
+            "history": lambda a: self.cli.net_worth_service.balance_history(a.start, a.end, a.step),
+            "cash-flow": self._cash_flow,
+            "forecast": lambda a: self.cli.forecast_service.forecast_active_goals(wait=True),
+            "export": self._export,
+            "reconcile": lambda a: self.cli.reconciliation_service.reconcile(repair=a.repair),
+            "archive": lambda a: self.cli.archive_service.status() if a.status else self.cli.archive_service.archive_old_months(),
+            "process-recurring": self._process_recurring,
+            "upcoming": lambda a: self.cli.recurring_service.upcoming_payments(a.days),
+        }
+
+    def execute(self, args: argparse.Namespace) -> Dict:
+        """Runs a single command and wraps its result in a JSON-ready envelope."""
+        try:
+            # Handlers that record expenses append the budget alerts they cross.
+            alerts = args.budget_alerts = []
+            with self.cli.profiler.profile(args.command):
+                result = {"ok": True, "command": args.command, "result": self.handlers[args.command](args)}
+            if alerts:
+                result["warnings"] = [str(a) for a in alerts]
+            return result
+        except COMMAND_ERRORS as e:
+            return {"ok": False, "command": args.command, "error": str(e)}
+
+    def _auto_allocate(self, args):
+        plan = self.cli.allocation_service.preview(args.amount, args.account_id)
+        transactions, account = self.cli.allocation_service.commit(plan, args.description)
+        return {"plan": plan, "transactions": transactions, "account": account}
+
+    def _report(self, args):
+        year, month = (int(part) for part in args.month.split("-"))
+        _, last_day = calendar.monthrange(year, month)
+        return self.cli.reporting_service.generate_spending_summary(
+            f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day}")
+
+    def _cash_flow(self, args):
+        forecast = self.cli.cash_flow_service.forecast(args.days, args.threshold)
+        # The daily matrix is for charts; scripts get the per-account summary.
+        return {key: value for key, value in forecast.items() if key not in ("dates", "daily_balances")}
+
+    def _export(self, args):
+        if args.fmt == "csv":
+            with open(args.output, "w", newline="", encoding="utf-8") as output:
+                return self.cli.export_service.export_transactions(output, "csv", args.start, args.end, args.account_id)
+        with open(args.output, "wb") as output:
+            return self.cli.export_service.export_transactions(output, "parquet", args.start, args.end, args.account_id)
+
+    def _process_recurring(self, args):
+        # The service reports progress with print(); keep stdout clean for the JSON result.
+        with contextlib.redirect_stdout(sys.stderr):
+            self.cli.recurring_service.process_due_transactions()
+        return {"processed": True}
+
+    def run_batch(self, lines: Iterable[str], chunk_size: int = 500, on_duplicate: str = "skip") -> Iterable[Dict]:
+        """
+        Runs one command per line and yields a result per line, in input order.
+        Runs of consecutive add-expense/add-income lines are written with
+        TransactionService.record_batch in chunks of up to chunk_size, which
+        handles duplicates according to on_duplicate.
+        """
+        parser = build_parser()
+        pending: List[argparse.Namespace] = []
+
+        for line_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                # Help output goes to stderr, so stdout stays one JSON result per line.
+                with contextlib.redirect_stdout(sys.stderr):
+                    args = parser.parse_args(shlex.split(line))
+                if args.command == "batch":
+                    raise CommandError("batch files cannot contain 'batch' commands")
+            except (CommandError, ValueError) as e:
+                yield from self._flush(pending, on_duplicate); pending = []
+                yield {"ok": False, "line": line_no, "error": str(e)}
+                continue
+            except SystemExit:
+                # -h/--help prints usage and exits; in a batch that must not end the run.
+                yield from self._flush(pending, on_duplicate); pending = []
+                yield {"ok": False, "line": line_no, "error": "help is not available in batch files"}
+                continue
+            args.line = line_no
+
+            if args.command in BULK_COMMANDS:
+                pending.append(args)
+                if len(pending) >= chunk_size:
+                    yield from self._flush(pending, on_duplicate); pending = []
+                continue
+
+            yield from self._flush(pending, on_duplicate); pending = []
+            yield {"line": line_no, **self.execute(args)}
+        yield from self._flush(pending, on_duplicate)
+
+    def _flush(self, pending: List[argparse.Namespace], on_duplicate: str) -> Iterable[Dict]:
+        if not pending:
+            return
+        entries = [{
+            "type": "Expense" if args.command == "add-expense" else "Income",
+            "amount": args.amount,
+            "account_id": args.account_id,
+            "category_name": getattr(args, "category", None),
+            "description": args.description,
+            "allow_duplicate": args.allow_duplicate,
+        } for args in pending]
+        try:
+            alerts = []
+            with self.cli.profiler.profile("batch-record"):
+                transactions = self.cli.transaction_service.record_batch(entries, on_duplicate, budget_alerts=alerts)
+        except COMMAND_ERRORS as e:
+            for args in pending:
+                yield {"ok": False, "line": args.line, "command": args.command, "error": str(e)}
+            return
+        for args, trx in zip(pending, transactions):
+            if trx is None:
+                yield {"ok": True, "line": args.line, "command": args.command,
+                       "skipped": "Duplicate of a transaction recorded today or earlier in the batch."}
+            else:
+                yield {"ok": True, "line": args.line, "command": args.command, "result": trx}
+        # Budget alerts belong to the chunk as a whole, not to a single line.
+        for alert in alerts:
+            yield {"ok": True, "line": pending[-1].line, "warning": str(alert)}
+
+
+def main(argv: List[str], cli_factory: Callable, out=None) -> int:
+    """
+    Entry point for non-interactive use. Parses argv before connecting, prints JSON
+    and returns a process exit code (0 when every command succeeded).
+    """
+    out = out or sys.stdout
+    try:
+        args = build_parser().parse_args(argv)
+    except CommandError as e:
+        print(json.dumps({"ok": False, "error": str(e)}), file=out)
+        return 2
+
+    runner = CommandRunner(cli_factory())
+    # Scripts must not read a stale replica, so the startup sync finishes first.
+    runner.cli.wait_for_replica()
+    if args.command != "batch":
+        result = runner.execute(args)
+        print(json.dumps(result, indent=2, default=json_default), file=out)
+        return 0 if result["ok"] else 1
+
+    ok = True
+    cli = runner.cli
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    try:
+        # Batch results are JSON lines, streamed as each command completes.
+        for result in runner.run_batch(source, args.chunk_size, args.on_duplicate):
+            ok = ok and result["ok"]
+            print(json.dumps(result, default=json_default), file=out)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        # Queueing and retry statistics go to stderr so stdout stays JSON lines.
+        print(json.dumps({"backend_queue": cli.scheduler.stats()}), file=sys.stderr)
+    return 0 if ok else 1
@@ -318,11 +318,13 @@ if __name__ == "__main__":
 # src/cli/main.py
 import questionary
 import json
+import sys
 import calendar
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
-from src.config import config
+from src.config import config, ARCHIVE_AFTER_MONTHS
+from src.profiling import ActionProfiler
 # DAO Imports
 from src.dao.goal_dao import GoalDAO
 from src.dao.step_dao import StepDAO
@@ -331,121 +333,237 @@ from src.dao.category_dao import CategoryDAO
 from src.dao.account_dao import AccountDAO
 from src.dao.debt_dao import DebtDAO
 from src.dao.recurring_transaction_dao import RecurringTransactionDAO
+from src.dao.reconciliation_dao import ReconciliationDAO
+from src.dao.budget_dao import BudgetDAO
+from src.dao.archive_dao import ArchiveDAO
+from src.dao.scheduler import ScheduledDAO
+from src.dao.local_replica import ReplicatedDAO
+from src.dao.unit_of_work import identity_mapped
 # Service Imports
-from src.services.goal_service import GoalService, GoalError
+from src.services.goal_service import GoalService, GoalError, PRIORITIES
 from src.services.step_service import StepService, StepError
-from src.services.transaction_service import TransactionService, TransactionError
+from src.services.transaction_service import TransactionService, TransactionError, DuplicateTransactionError
 from src.services.account_service import AccountService
 from src.services.debt_service import DebtService, DebtError
-from src.services.reporting_service import ReportingService
-from src.services.recurring_transaction_service import RecurringTransactionService
+from src.services.reporting_service import ReportingService, ReportingError, TREND_BUCKETS
+from src.services.recurring_transaction_service import RecurringTransactionService, RecurringTransactionError
+from src.services.recurrence import FREQUENCIES
+from src.services.goal_forecast_service import GoalForecastService, GoalForecastError
+from src.services.export_service import ExportService, ExportError
+from src.services.reconciliation_service import ReconciliationService
+from src.services.budget_service import BudgetService, BudgetError
+from src.services.net_worth_service import NetWorthService, NetWorthError, HISTORY_STEPS
+from src.services.cash_flow_service import CashFlowService, CashFlowError
+from src.services.anomaly_service import AnomalyService
+from src.services.duplicate_service import DuplicateService
+from src.services.allocation_service import AllocationService, AllocationError
+from src.services.currency_service import CurrencyService, currency_symbol
+from src.services.archive_service import ArchiveService, ArchiveError
+from src.models.money import Money
+from src.models.records import Account, Category, Debt, Goal, Step, json_default
+
+class ProfiledPrompts:
+    """questionary's prompt factories, with the wait for an answer left out of the profiled action."""
+    def __init__(self, profiler: ActionProfiler):
+        self.profiler = profiler
+
+    def __getattr__(self, name: str):
+        factory = getattr(questionary, name)
+
+        def prompt(*args, **kwargs):
+            question = factory(*args, **kwargs)
+            ask = question.ask
+
+            def paused_ask(*ask_args, **ask_kwargs):
+                with self.profiler.paused():
+                    return ask(*ask_args, **ask_kwargs)
+            question.ask = paused_ask
+            return question
+        return prompt
 
 class GoalManagerCLI:
-    def __init__(self):
+    def __init__(self, profile_dir: str = None):
+        # Profiling is off unless a directory is given here or via GOAL_MANAGER_PROFILE_DIR.
+        self.profiler = ActionProfiler.from_env(profile_dir)
+        # Every prompt goes through this, so time spent answering is not profiled.
+        self.prompt = ProfiledPrompts(self.profiler)
         db_client = config.get_supabase_client()
+        self.scheduler = config.get_request_scheduler()
+        # Lists are served from an on-disk replica, brought up to date by a background delta sync.
+        self.replica = config.get_local_replica()
         # DAOs
-        goal_dao = GoalDAO(db_client)
-        step_dao = StepDAO(db_client)
-        transaction_dao = TransactionDAO(db_client)
-        category_dao = CategoryDAO(db_client)
-        account_dao = AccountDAO(db_client)
-        debt_dao = DebtDAO(db_client)
-        recurring_dao = RecurringTransactionDAO(db_client)
+        goal_dao = self._replicated(ScheduledDAO(GoalDAO(db_client), self.scheduler), Goal,
+                                    {"list_goals": lambda r: r.rows("goals")})
+        step_dao = self._replicated(ScheduledDAO(StepDAO(db_client), self.scheduler), Step,
+                                    {"get_steps_by_goal_id": lambda r, goal_id: r.rows("steps", goal_id=goal_id)})
+        transaction_dao = ScheduledDAO(TransactionDAO(db_client), self.scheduler)
+        category_dao = self._replicated(ScheduledDAO(CategoryDAO(db_client), self.scheduler), Category,
+                                        {"get_or_create_category": lambda r, name: r.find("categories", "name", name)})
+        account_dao = self._replicated(ScheduledDAO(AccountDAO(db_client), self.scheduler), Account,
+                                       {"list_accounts": lambda r: r.rows("accounts")})
+        debt_dao = self._replicated(ScheduledDAO(DebtDAO(db_client), self.scheduler), Debt,
+                                    {"list_debts": lambda r: r.rows("debts")})
+        recurring_dao = ScheduledDAO(RecurringTransactionDAO(db_client), self.scheduler)
+        reconciliation_dao = ScheduledDAO(ReconciliationDAO(db_client), self.scheduler)
+        budget_dao = ScheduledDAO(BudgetDAO(db_client), self.scheduler)
+        archive_dao = ScheduledDAO(ArchiveDAO(db_client), self.scheduler)
         # Services
-        self.account_service = AccountService(account_dao)
-        self.transaction_service = TransactionService(transaction_dao, goal_dao, category_dao, account_dao)
+        # Totals, reports and goal progress are in the base currency, converted with the cached local rates.
+        self.currency_service = CurrencyService(account_dao, config.get_fx_rates())
+        # Old closed months live in local partition files and backend rollups instead of the transactions table.
+        self.archive_service = ArchiveService(transaction_dao, archive_dao, config.get_transaction_archive(),
+                                              ARCHIVE_AFTER_MONTHS)
+        self.account_service = AccountService(account_dao, self.currency_service)
+        self.budget_service = BudgetService(budget_dao, category_dao, self.currency_service)
+        self.anomaly_service = AnomalyService(transaction_dao)
+        self.duplicate_service = DuplicateService(transaction_dao)
+        self.transaction_service = TransactionService(transaction_dao, goal_dao, category_dao, account_dao, self.budget_service,
+                                                      self.anomaly_service, self.currency_service, self.duplicate_service)
         self.debt_service = DebtService(debt_dao, account_dao, self.transaction_service)
         self.step_service = StepService(step_dao, goal_dao)
-        self.goal_service = GoalService(goal_dao, step_dao, transaction_dao)
-        self.reporting_service = ReportingService(transaction_dao, category_dao)
+        self.goal_service = GoalService(goal_dao, step_dao, transaction_dao, self.currency_service)
+        self.allocation_service = AllocationService(self.goal_service, goal_dao, account_dao, transaction_dao, self.currency_service)
+        self.reporting_service = ReportingService(transaction_dao, category_dao, self.currency_service, self.archive_service)
         self.recurring_service = RecurringTransactionService(recurring_dao, self.transaction_service, self.debt_service)
+        self.forecast_service = GoalForecastService(goal_dao, transaction_dao, recurring_dao, currency_service=self.currency_service)
+        self.export_service = ExportService(transaction_dao, archive_service=self.archive_service)
+        self.reconciliation_service = ReconciliationService(account_dao, transaction_dao, reconciliation_dao)
+        self.net_worth_service = NetWorthService(account_dao, transaction_dao, debt_dao, self.currency_service,
+                                                 self.archive_service)
+        self.cash_flow_service = CashFlowService(account_dao, recurring_dao)
+        if self.replica:
+            self.replica.start_background_sync(db_client, self.scheduler)
+
+    def _replicated(self, dao, record_cls, local_reads):
+        # Service actions load each entity once and commit their changes together (see unit_of_work).
+        return identity_mapped(ReplicatedDAO(dao, self.replica, record_cls, local_reads) if self.replica else dao)
+
+    def wait_for_replica(self, timeout: float = None):
+        """Blocks until the startup sync of the local replica has finished."""
+        if self.replica:
+            self.replica.wait_for_sync(timeout)
+
+    def transfer(self, from_account_id: int, to_account_id: int, amount: Money, description: str = None):
+        """Transfers between accounts and re-reads both, so the replica sees the new balances."""
+        legs = self.transaction_service.transfer(from_account_id, to_account_id, amount, description)
+        for account_id in (from_account_id, to_account_id):
+            self.account_service.account_dao.get_account_by_id(account_id)
+        return legs
 
     def run(self):
         """Main application loop to display the main menu."""
         print("Welcome to your Personal Finance & Goal Manager!")
-        self.recurring_service.process_due_transactions()
+        with self.profiler.profile("process-recurring"):
+            self.recurring_service.process_due_transactions()
         while True:
-            choice = questionary.select(
+            choice = self.prompt.select(
                 "What would you like to do?",
                 choices=["Manage Goals", "Manage Finances", "Manage Accounts", "Manage Debts", "View Reports", "Exit"]
             ).ask()
 
+            if choice == "Exit" or choice is None:
+                print("Goodbye!"); break
+            # Submenus are not profiled as a whole: they mostly wait at prompts. Each action is.
             if choice == "Manage Goals": self._goals_menu()
             elif choice == "Manage Finances": self._finances_menu()
             elif choice == "Manage Accounts": self._accounts_menu()
             elif choice == "Manage Debts": self._debts_menu()
             elif choice == "View Reports": self._reports_menu()
-            elif choice == "Exit" or choice is None:
-                print("Goodbye!"); break
+
+    def _action(self, name: str, handler) -> None:
+        """Runs one menu action, profiled on its own."""
+        with self.profiler.profile(name):
+            handler()
     
     # --- Menu Functions ---
     def _accounts_menu(self):
         while True:
-            choice = questionary.select("What would you like to do with Accounts?",
-                choices=["Create New Account", "List All Accounts", "Back to Main Menu"]).ask()
-            if choice == "Create New Account": self._handle_create_account()
-            elif choice == "List All Accounts": self._handle_list_accounts()
+            choice = self.prompt.select("What would you like to do with Accounts?",
+                choices=["Create New Account", "List All Accounts", "Transfer Between Accounts", "Reconcile Balances", "Archive Old Transactions", "Back to Main Menu"]).ask()
+            if choice == "Create New Account": self._action(choice, self._handle_create_account)
+            elif choice == "Transfer Between Accounts": self._action(choice, self._handle_transfer)
+            elif choice == "List All Accounts": self._action(choice, self._handle_list_accounts)
+            elif choice == "Reconcile Balances": self._action(choice, self._handle_reconcile_balances)
+            elif choice == "Archive Old Transactions": self._action(choice, self._handle_archive)
             elif choice == "Back to Main Menu" or choice is None: break
 
     def _debts_menu(self):
         while True:
-            choice = questionary.select("What would you like to do with Debts?",
+            choice = self.prompt.select("What would you like to do with Debts?",
                 choices=["Add New Debt", "List All Debts", "Edit a Debt", "Make a Payment", "Back to Main Menu"]).ask()
-            if choice == "Add New Debt": self._handle_add_debt()
-            elif choice == "List All Debts": self._handle_list_debts()
-            elif choice == "Edit a Debt": self._handle_edit_debt()
-            elif choice == "Make a Payment": self._handle_make_debt_payment()
+            if choice == "Add New Debt": self._action(choice, self._handle_add_debt)
+            elif choice == "List All Debts": self._action(choice, self._handle_list_debts)
+            elif choice == "Edit a Debt": self._action(choice, self._handle_edit_debt)
+            elif choice == "Make a Payment": self._action(choice, self._handle_make_debt_payment)
             elif choice == "Back to Main Menu" or choice is None: break
 
     def _goals_menu(self):
         while True:
-            choice = questionary.select("What would you like to do with Goals?",
+            choice = self.prompt.select("What would you like to do with Goals?",
                 choices=["Create New Goal", "List All Goals", "View/Manage a Specific Goal", "Back to Main Menu"]).ask()
-            if choice == "Create New Goal": self._handle_create_goal()
-            elif choice == "List All Goals": self._handle_list_goals()
+            if choice == "Create New Goal": self._action(choice, self._handle_create_goal)
+            elif choice == "List All Goals": self._action(choice, self._handle_list_goals)
             elif choice == "View/Manage a Specific Goal": self._handle_manage_specific_goal()
             elif choice == "Back to Main Menu" or choice is None: break
     
     def _finances_menu(self):
         while True:
-            choice = questionary.select("What would you like to do with Finances?",
-                choices=["Add General Expense", "Add General Income", "Allocate Saving to Goal", "Set Up Recurring Transaction", "Back to Main Menu"]).ask()
-            if choice == "Add General Expense": self._handle_add_expense()
-            elif choice == "Add General Income": self._handle_add_income()
-            elif choice == "Allocate Saving to Goal": self._handle_allocate_to_goal()
-            elif choice == "Set Up Recurring Transaction": self._handle_setup_recurring_transaction()
+            choice = self.prompt.select("What would you like to do with Finances?",
+                choices=["Add General Expense", "Add General Income", "Allocate Saving to Goal", "Auto-Allocate Income to Goals",
+                         "Set Up Recurring Transaction", "Upcoming Payments", "Set Category Budget", "View Budget Status",
+                         "Back to Main Menu"]).ask()
+            if choice == "Add General Expense": self._action(choice, self._handle_add_expense)
+            elif choice == "Add General Income": self._action(choice, self._handle_add_income)
+            elif choice == "Allocate Saving to Goal": self._action(choice, self._handle_allocate_to_goal)
+            elif choice == "Auto-Allocate Income to Goals": self._action(choice, self._handle_auto_allocate)
+            elif choice == "Set Up Recurring Transaction": self._action(choice, self._handle_setup_recurring_transaction)
+            elif choice == "Upcoming Payments": self._action(choice, self._handle_upcoming_payments)
+            elif choice == "Set Category Budget": self._action(choice, self._handle_set_budget)
+            elif choice == "View Budget Status": self._action(choice, self._handle_budget_status)
             elif choice == "Back to Main Menu" or choice is None: break
 
     def _reports_menu(self):
         while True:
-            choice = questionary.select("Which report would you like to see?",
-                choices=["Monthly Spending Summary", "Back to Main Menu"]).ask()
-            if choice == "Monthly Spending Summary": self._handle_spending_report()
+            choice = self.prompt.select("Which report would you like to see?",
+                choices=["Monthly Spending Summary", "Spending Trend", "Top Categories & Payees", "Unusual Expenses", "Duplicate Transactions", "Balance History", "Cash-Flow Forecast", "Goal Completion Forecasts", "Export Transactions", "Back to Main Menu"]).ask()
+            if choice == "Monthly Spending Summary": self._action(choice, self._handle_spending_report)
+            elif choice == "Spending Trend": self._action(choice, self._handle_spending_trend)
+            elif choice == "Top Categories & Payees": self._action(choice, self._handle_top_spending)
+            elif choice == "Unusual Expenses": self._action(choice, self._handle_unusual_expenses)
+            elif choice == "Duplicate Transactions": self._action(choice, self._handle_duplicates)
+            elif choice == "Balance History": self._action(choice, self._handle_balance_history)
+            elif choice == "Cash-Flow Forecast": self._action(choice, self._handle_cash_flow_forecast)
+            elif choice == "Goal Completion Forecasts": self._action(choice, self._handle_goal_forecasts)
+            elif choice == "Export Transactions": self._action(choice, self._handle_export_transactions)
             elif choice == "Back to Main Menu" or choice is None: break
 
     def _specific_goal_menu(self, goal_id):
         while True:
             try:
                 goal_details = self.goal_service.get_goal_details(goal_id)
-                print("\n--- Goal Details ---"); print(json.dumps(goal_details, indent=2, default=str)); print("--------------------\n")
-                choice = questionary.select(f"What do you want to do with '{goal_details['name']}'?",
-                    choices=["Add a Step", "Mark a Step as Completed", "Edit Goal", "Mark Goal as Completed", "Back to Goals Menu"]).ask()
-                if choice == "Add a Step":
-                    desc = questionary.text("Enter step description:").ask()
-                    if desc: self.step_service.add_step_to_goal(goal_id, desc)
-                elif choice == "Mark a Step as Completed":
-                    steps = goal_details.get('steps', []); pending_steps = [s for s in steps if s['status'] == 'Pending']
-                    if not pending_steps: print("No pending steps to complete."); continue
-                    step_to_complete = questionary.select("Which step do you want to complete?", choices=[f"{s['step_id']}: {s['description']}" for s in pending_steps]).ask()
-                    if step_to_complete:
-                        step_id = int(step_to_complete.split(':')[0])
-                        self.step_service.mark_step_as_completed(step_id)
-                elif choice == "Edit Goal": self._handle_edit_goal(goal_id)
-                elif choice == "Mark Goal as Completed":
-                    if questionary.confirm(f"Are you sure you want to complete this goal?").ask():
-                        self.goal_service.mark_goal_as_complete(goal_id); print("✅ Goal marked as completed!"); break
-                elif choice == "Back to Goals Menu" or choice is None: break
-            except (StepError, GoalError) as e:
+                print("\n--- Goal Details ---"); print(json.dumps(goal_details, indent=2, default=json_default)); print("--------------------\n")
+                choice = self.prompt.select(f"What do you want to do with '{goal_details.goal.name}'?",
+                    choices=["Add a Step", "Mark a Step as Completed", "Forecast Completion", "Edit Goal", "Mark Goal as Completed", "Back to Goals Menu"]).ask()
+                if choice == "Back to Goals Menu" or choice is None: break
+                with self.profiler.profile(choice):
+                    if choice == "Add a Step":
+                        desc = self.prompt.text("Enter step description:").ask()
+                        if desc: self.step_service.add_step_to_goal(goal_id, desc)
+                    elif choice == "Mark a Step as Completed":
+                        steps = goal_details.steps; pending_steps = [s for s in steps if s.status == 'Pending']
+                        if not pending_steps: print("No pending steps to complete."); continue
+                        step_to_complete = self.prompt.select("Which step do you want to complete?", choices=[f"{s.step_id}: {s.description}" for s in pending_steps]).ask()
+                        if step_to_complete:
+                            step_id = int(step_to_complete.split(':')[0])
+                            self.step_service.mark_step_as_completed(step_id)
+                    elif choice == "Forecast Completion":
+                        forecast = self.forecast_service.forecast_goal(goal_id)
+                        print("\n--- Completion Forecast ---"); print(json.dumps(forecast, indent=2, default=json_default)); print("---------------------------\n")
+                    elif choice == "Edit Goal": self._handle_edit_goal(goal_id)
+                    elif choice == "Mark Goal as Completed":
+                        if self.prompt.confirm(f"Are you sure you want to complete this goal?").ask():
+                            self.goal_service.mark_goal_as_complete(goal_id); print("✅ Goal marked as completed!"); break
+            except (StepError, GoalError, GoalForecastError) as e:
                 print(f"❌ Error: {e}")
                 
     # --- Utility function to select an account ---
@@ -454,139 +572,218 @@ class GoalManagerCLI:
         if not accounts:
             print("❌ Error: No accounts found. Please create an account first.")
             return None
-        account_choice = questionary.select(prompt_message,
-            choices=[f"{acc['account_id']}: {acc['name']} (Balance: {acc['balance']})" for acc in accounts]).ask()
+        account_choice = self.prompt.select(prompt_message,
+            choices=[f"{acc.account_id}: {acc.name} (Balance: {acc.balance})" for acc in accounts]).ask()
         if not account_choice: return None
         return int(account_choice.split(':')[0])
 
     # --- Handler Functions ---
     def _handle_create_account(self):
-        name = questionary.text("Enter account name (e.g., Savings Account):").ask()
+        name = self.prompt.text("Enter account name (e.g., Savings Account):").ask()
         if not name: return
-        balance_str = questionary.text("Enter initial balance (e.g., 200000):").ask()
-        balance = float(balance_str) if balance_str else 0.0
+        currencies = self.currency_service.currencies()
+        currency = self.currency_service.base
+        if len(currencies) > 1:
+            currency = self.prompt.select("Which currency is the account in?", choices=currencies, default=currency).ask()
+            if not currency: return
+        balance_str = self.prompt.text("Enter initial balance (e.g., 200000):").ask()
+        balance = Money.from_rupees(balance_str) if balance_str else Money(0)
         try:
-            acc = self.account_service.create_account(name, balance)
-            print("✅ Account created successfully:"); print(json.dumps(acc, indent=2, default=str))
+            acc = self.account_service.create_account(name, balance, currency)
+            print("✅ Account created successfully:"); print(json.dumps(acc, indent=2, default=json_default))
         except Exception as e: print(f"❌ Error: {e}")
 
+    def _handle_transfer(self):
+        from_id = self._select_account("Transfer from which account?")
+        if not from_id: return
+        to_id = self._select_account("Transfer to which account?")
+        if not to_id: return
+        amount_str = self.prompt.text("Enter amount to transfer:").ask()
+        if not amount_str: return
+        desc = self.prompt.text("Enter description (optional):").ask()
+        try:
+            legs = self.transfer(from_id, to_id, Money.from_rupees(amount_str), desc or None)
+            print("✅ Transfer complete:"); print(json.dumps(legs, indent=2, default=json_default))
+        except TransactionError as e: print(f"❌ Error: {e}")
+
     def _handle_list_accounts(self):
         accounts = self.account_service.list_accounts()
-        print("\n--- All Accounts ---"); print(json.dumps(accounts, indent=2, default=str)); print("--------------------\n")
+        print("\n--- All Accounts ---"); print(json.dumps(accounts, indent=2, default=json_default)); print("--------------------\n")
+
+    def _handle_reconcile_balances(self):
+        try:
+            results = self.reconciliation_service.reconcile()
+            print("\n--- Balance Reconciliation ---"); print(json.dumps(results, indent=2, default=json_default)); print("------------------------------\n")
+            drifted = [r for r in results if r.drift]
+            if not drifted: print("✅ All account balances match the ledger."); return
+            print(f"⚠️  {len(drifted)} account(s) drifted from the ledger.")
+            if self.prompt.confirm("Reset drifted balances to the ledger balance?", default=False).ask():
+                for r in drifted:
+                    self.reconciliation_service.reconcile_account(r.account_id, repair=True)
+                print("✅ Drifted balances repaired.")
+        except Exception as e: print(f"❌ Error reconciling balances: {e}")
+
+    def _handle_archive(self):
+        try:
+            status = self.archive_service.status()
+            if status:
+                print("\n--- Archived Months ---"); print(json.dumps(status, indent=2, default=json_default)); print("-----------------------\n")
+            cutoff = self.archive_service.cutoff()
+            if not self.prompt.confirm(f"Archive incomes and expenses dated before {cutoff:%Y-%m}?", default=False).ask(): return
+            results = self.archive_service.archive_old_months()
+            if not results: print("Nothing to archive."); return
+            print("✅ Archived:"); print(json.dumps(results, indent=2, default=json_default))
+        except ArchiveError as e: print(f"❌ Error: {e}")
 
     def _handle_add_debt(self):
-        name = questionary.text("Enter debt name (e.g., Laptop Loan):").ask()
+        name = self.prompt.text("Enter debt name (e.g., Laptop Loan):").ask()
         if not name: return
-        amount_str = questionary.text("Enter total loan amount:").ask()
-        emi_str = questionary.text("Enter monthly EMI (optional):").ask()
+        amount_str = self.prompt.text("Enter total loan amount:").ask()
+        emi_str = self.prompt.text("Enter monthly EMI (optional):").ask()
         try:
-            debt = self.debt_service.add_debt(name, float(amount_str) if amount_str else 0.0, float(emi_str) if emi_str else None)
-            print("✅ Debt added successfully:"); print(json.dumps(debt, indent=2, default=str))
+            debt = self.debt_service.add_debt(name, Money.from_rupees(amount_str) if amount_str else Money(0), Money.from_rupees(emi_str) if emi_str else None)
+            print("✅ Debt added successfully:"); print(json.dumps(debt, indent=2, default=json_default))
         except Exception as e: print(f"❌ Error: {e}")
 
     def _handle_list_debts(self):
         debts = self.debt_service.list_debts()
-        print("\n--- All Debts ---"); print(json.dumps(debts, indent=2, default=str)); print("-----------------\n")
+        print("\n--- All Debts ---"); print(json.dumps(debts, indent=2, default=json_default)); print("-----------------\n")
     
     def _handle_edit_debt(self):
         debts = self.debt_service.list_debts()
         if not debts: print("No debts found to edit."); return
-        debt_choice = questionary.select("Which debt do you want to edit?", choices=[f"{d['debt_id']}: {d['name']}" for d in debts]).ask()
+        debt_choice = self.prompt.select("Which debt do you want to edit?", choices=[f"{d.debt_id}: {d.name}" for d in debts]).ask()
         if not debt_choice: return
         debt_id = int(debt_choice.split(':')[0])
         current_debt = self.debt_service.debt_dao.get_debt_by_id(debt_id)
         print("Leave a field blank to keep its current value.")
-        new_name = questionary.text("Enter new name:", default=current_debt['name']).ask()
-        new_total_str = questionary.text("Enter new total amount:", default=str(current_debt['total_amount'])).ask()
-        new_emi_str = questionary.text("Enter new monthly EMI:", default=str(current_debt.get('monthly_emi') or '')).ask()
+        new_name = self.prompt.text("Enter new name:", default=current_debt.name).ask()
+        new_total_str = self.prompt.text("Enter new total amount:", default=str(current_debt.total_amount)).ask()
+        new_emi_str = self.prompt.text("Enter new monthly EMI:", default=str(current_debt.monthly_emi or '')).ask()
         try:
             updated_debt = self.debt_service.update_debt_details(
                 debt_id=debt_id, name=new_name,
-                total_amount=float(new_total_str) if new_total_str else None,
-                monthly_emi=float(new_emi_str) if new_emi_str else None
+                total_amount=Money.from_rupees(new_total_str) if new_total_str else None,
+                monthly_emi=Money.from_rupees(new_emi_str) if new_emi_str else None
             )
-            print("✅ Debt updated successfully:"); print(json.dumps(updated_debt, indent=2, default=str))
+            print("✅ Debt updated successfully:"); print(json.dumps(updated_debt, indent=2, default=json_default))
         except (DebtError, Exception) as e: print(f"❌ Error: {e}")
 
     def _handle_make_debt_payment(self):
         debts = self.debt_service.list_debts()
         if not debts: print("No debts found to make a payment on."); return
-        debt_choice = questionary.select("Which debt are you paying?",
-            choices=[f"{d['debt_id']}: {d['name']} (Remaining: {d['remaining_amount']})" for d in debts]).ask()
+        debt_choice = self.prompt.select("Which debt are you paying?",
+            choices=[f"{d.debt_id}: {d.name} (Remaining: {d.remaining_amount})" for d in debts]).ask()
         if not debt_choice: return
         debt_id = int(debt_choice.split(':')[0])
         account_id = self._select_account("Which account are you paying FROM?")
         if not account_id: return
-        amount_str = questionary.text("Enter payment amount:").ask()
+        amount_str = self.prompt.text("Enter payment amount:").ask()
         if not amount_str: return
         try:
-            amount = float(amount_str)
+            amount = Money.from_rupees(amount_str)
             updated_debt = self.debt_service.make_manual_payment(debt_id, account_id, amount)
-            print("✅ Payment successful! Debt updated:"); print(json.dumps(updated_debt, indent=2, default=str))
+            print("✅ Payment successful! Debt updated:"); print(json.dumps(updated_debt, indent=2, default=json_default))
         except (DebtError, TransactionError, Exception) as e: print(f"❌ Error: {e}")
 
     def _handle_create_goal(self):
-        name = questionary.text("What is the name of your goal?").ask()
+        name = self.prompt.text("What is the name of your goal?").ask()
         if not name: return
-        budget_str = questionary.text("What is the budget? (optional)").ask()
-        budget = float(budget_str) if budget_str else None
+        budget_str = self.prompt.text("What is the budget? (optional)").ask()
+        budget = Money.from_rupees(budget_str) if budget_str else None
+        priority = self.prompt.select("Priority (1 = highest)?", choices=[str(p) for p in PRIORITIES], default="3").ask()
+        if not priority: return
         try:
-            goal = self.goal_service.create_new_goal(name, budget)
-            print("✅ Goal created successfully:"); print(json.dumps(goal, indent=2, default=str))
+            goal = self.goal_service.create_new_goal(name, budget, int(priority))
+            print("✅ Goal created successfully:"); print(json.dumps(goal, indent=2, default=json_default))
         except GoalError as e: print(f"❌ Error: {e}")
 
     def _handle_list_goals(self):
         goals = self.goal_service.list_all_goals()
-        print("\n--- All Goals ---"); print(json.dumps(goals, indent=2, default=str)); print("-----------------\n")
+        print("\n--- All Goals ---"); print(json.dumps(goals, indent=2, default=json_default)); print("-----------------\n")
 
     def _handle_manage_specific_goal(self):
         goals = self.goal_service.list_all_goals()
         if not goals: print("No goals found. Please create one first."); return
-        goal_choice = questionary.select("Which goal do you want to manage?",
-            choices=[f"{g['goal_id']}: {g['name']}" for g in goals]).ask()
+        goal_choice = self.prompt.select("Which goal do you want to manage?",
+            choices=[f"{g.goal_id}: {g.name}" for g in goals]).ask()
         if goal_choice:
             goal_id = int(goal_choice.split(':')[0])
             self._specific_goal_menu(goal_id)
             
     def _handle_edit_goal(self, goal_id: int):
         print("Leave a field blank to keep its current value.")
-        current_goal = self.goal_service.get_goal_details(goal_id)
-        new_name = questionary.text("Enter new goal name:", default=current_goal['name']).ask()
-        new_budget_str = questionary.text("Enter new budget:", default=str(current_goal['budget'])).ask()
+        current_goal = self.goal_service.get_goal_details(goal_id).goal
+        new_name = self.prompt.text("Enter new goal name:", default=current_goal.name).ask()
+        new_budget_str = self.prompt.text("Enter new budget:", default=str(current_goal.budget or '')).ask()
+        new_priority = self.prompt.select("Priority (1 = highest):", choices=[str(p) for p in PRIORITIES],
+                                          default=str(current_goal.priority)).ask()
         new_name = new_name if new_name else None
-        new_budget = float(new_budget_str) if new_budget_str else None
+        new_budget = Money.from_rupees(new_budget_str) if new_budget_str else None
+        new_priority = int(new_priority) if new_priority else None
         try:
-            updated_goal = self.goal_service.update_goal_details(goal_id, new_name, new_budget)
-            print("✅ Goal updated successfully:"); print(json.dumps(updated_goal, indent=2, default=str))
+            updated_goal = self.goal_service.update_goal_details(goal_id, new_name, new_budget, new_priority)
+            print("✅ Goal updated successfully:"); print(json.dumps(updated_goal, indent=2, default=json_default))
         except GoalError as e: print(f"❌ Error: {e}")
 
     def _handle_add_expense(self):
         account_id = self._select_account("Which account to use for this expense?")
         if not account_id: return
         categories = ["Food", "Transport", "Rent", "Utilities", "Entertainment", "Shopping", "EMI", "Other (create new)"]
-        amount_str = questionary.text("Enter expense amount:").ask()
+        amount_str = self.prompt.text("Enter expense amount:").ask()
         if not amount_str: return
-        category_choice = questionary.select("Select a category:", choices=categories).ask()
+        category_choice = self.prompt.select("Select a category:", choices=categories).ask()
         if not category_choice: return
         if category_choice == "Other (create new)":
-            category_name = questionary.text("Enter the new category name:").ask()
+            category_name = self.prompt.text("Enter the new category name:").ask()
             if not category_name: return
         else: category_name = category_choice
-        desc = questionary.text("Enter description (optional):").ask()
+        desc = self.prompt.text("Enter description (optional):").ask()
         try:
-            trx = self.transaction_service.add_expense(float(amount_str), category_name, account_id, desc)
-            print("✅ Expense added successfully:"); print(json.dumps(trx, indent=2, default=str))
+            amount = Money.from_rupees(amount_str)
+            alerts = []
+            try:
+                trx = self.transaction_service.add_expense(amount, category_name, account_id, desc, budget_alerts=alerts)
+            except DuplicateTransactionError as e:
+                if not self.prompt.confirm(f"{e} Save anyway?", default=False).ask(): return
+                trx = self.transaction_service.add_expense(amount, category_name, account_id, desc, allow_duplicate=True,
+                                                           budget_alerts=alerts)
+            print("✅ Expense added successfully:"); print(json.dumps(trx, indent=2, default=json_default))
+            for alert in alerts: print(f"⚠️  {alert}")
         except TransactionError as e: print(f"❌ Error: {e}")
 
+    def _handle_set_budget(self):
+        category_name = self.prompt.text("Category name:").ask()
+        if not category_name: return
+        limit_str = self.prompt.text("Monthly limit:").ask()
+        if not limit_str: return
+        thresholds_str = self.prompt.text("Alert at (fractions of the limit, comma-separated):", default="0.8, 1.0").ask()
+        if thresholds_str is None: return
+        try:
+            thresholds = [float(t) for t in thresholds_str.split(",") if t.strip()]
+            budget = self.budget_service.set_budget(category_name, Money.from_rupees(limit_str), thresholds)
+            print("✅ Budget saved:"); print(json.dumps(budget, indent=2, default=json_default))
+        except (BudgetError, ValueError, ArithmeticError) as e: print(f"❌ Error: {e}")
+
+    def _handle_budget_status(self):
+        statuses = self.budget_service.get_budget_status()
+        if not statuses: print("No category budgets set."); return
+        print("\n--- Budget Status (this month) ---"); print(json.dumps(statuses, indent=2, default=json_default)); print("----------------------------------\n")
+
     def _handle_add_income(self):
         account_id = self._select_account("Which account will this income go into?")
         if not account_id: return
-        amount_str = questionary.text("Enter income amount:").ask()
+        amount_str = self.prompt.text("Enter income amount:").ask()
         if not amount_str: return
-        desc = questionary.text("Enter description (optional):").ask()
+        desc = self.prompt.text("Enter description (optional):").ask()
         try:
-            trx = self.transaction_service.add_income(float(amount_str), account_id, desc)
-            print("✅ Income added successfully:"); print(json.dumps(trx, indent=2, default=str))
+            amount = Money.from_rupees(amount_str)
+            try:
+                trx = self.transaction_service.add_income(amount, account_id, desc)
+            except DuplicateTransactionError as e:
+                if not self.prompt.confirm(f"{e} Save anyway?", default=False).ask(): return
+                trx = self.transaction_service.add_income(amount, account_id, desc, allow_duplicate=True)
+            print("✅ Income added successfully:"); print(json.dumps(trx, indent=2, default=json_default))
         except TransactionError as e: print(f"❌ Error: {e}")
 
     def _handle_allocate_to_goal(self):
@@ -594,43 +791,81 @@ class GoalManagerCLI:
         if not account_id: return
         goals = self.goal_service.list_all_goals()
         if not goals: print("No goals found to allocate to."); return
-        goal_choice = questionary.select("Which goal do you want to allocate savings TO?", choices=[f"{g['goal_id']}: {g['name']}" for g in goals]).ask()
+        goal_choice = self.prompt.select("Which goal do you want to allocate savings TO?", choices=[f"{g.goal_id}: {g.name}" for g in goals]).ask()
         if not goal_choice: return
         goal_id = int(goal_choice.split(':')[0])
-        amount_str = questionary.text(f"Enter amount to allocate from your account to '{goal_choice.split(': ')[1]}':").ask()
-        desc = questionary.text("Enter description (optional):").ask()
+        amount_str = self.prompt.text(f"Enter amount to allocate from your account to '{goal_choice.split(': ')[1]}':").ask()
+        desc = self.prompt.text("Enter description (optional):").ask()
         try:
-            trx = self.transaction_service.allocate_to_goal(goal_id, float(amount_str), account_id, desc)
-            print("✅ Amount allocated successfully:"); print(json.dumps(trx, indent=2, default=str))
+            trx = self.transaction_service.allocate_to_goal(goal_id, Money.from_rupees(amount_str), account_id, desc)
+            print("✅ Amount allocated successfully:"); print(json.dumps(trx, indent=2, default=json_default))
         except TransactionError as e: print(f"❌ Error: {e}")
+
+    def _handle_auto_allocate(self):
+        account_id = self._select_account("Which account are you allocating savings FROM?")
+        if not account_id: return
+        amount_str = self.prompt.text("Enter the amount to split across your goals:").ask()
+        if not amount_str: return
+        try:
+            plan = self.allocation_service.preview(Money.from_rupees(amount_str), account_id)
+        except AllocationError as e: print(f"❌ Error: {e}"); return
+        cur = currency_symbol(self.currency_service.base)
+        print("\n--- Proposed Split ---")
+        for a in plan.allocations:
+            print(f"P{a.priority} {a.goal_name:<25} needs {cur}{a.remaining_to_save:>12,.2f}  gets {cur}{a.amount:>12,.2f}")
+        print(f"Allocated: {cur}{plan.allocated:,.2f} | Not needed by any goal: {cur}{plan.unallocated:,.2f}")
+        print("----------------------\n")
+        if plan.allocated <= Money(0) or not self.prompt.confirm("Save this split?").ask(): return
+        desc = self.prompt.text("Enter description (optional):").ask()
+        try:
+            transactions, account = self.allocation_service.commit(plan, desc)
+            print(f"✅ Saved to {len(transactions)} goals. New balance of '{account.name}': {cur}{account.balance:,.2f}")
+        except AllocationError as e: print(f"❌ Error: {e}")
             
     def _handle_setup_recurring_transaction(self):
         account_id = self._select_account("Which account is this transaction for?")
         if not account_id: return
-        ttype = questionary.select("Is this recurring income or expense?", choices=["Income", "Expense"]).ask()
+        ttype = self.prompt.select("Is this recurring income or expense?", choices=["Income", "Expense"]).ask()
         if not ttype: return
-        amount = float(questionary.text("Enter the monthly amount:").ask())
-        desc = questionary.text("Enter a description (e.g., Monthly Salary, Rent EMI):").ask()
-        start_date = questionary.text("Enter the first payment date (YYYY-MM-DD):").ask()
+        frequency = self.prompt.select("How often does it repeat?", choices=list(FREQUENCIES), default="monthly").ask()
+        if not frequency: return
+        amount_str = self.prompt.text(f"Enter the {frequency} amount:").ask()
+        if not amount_str: return
+        desc = self.prompt.text("Enter a description (e.g., Monthly Salary, Rent EMI):").ask()
+        start_date = self.prompt.text("Enter the first payment date (YYYY-MM-DD):").ask()
+        if not start_date: return
+        end_date = self.prompt.text("End date (YYYY-MM-DD, optional):").ask() or None
+        max_occurrences = self.prompt.text("Number of payments (optional):").ask() or None
         debt_id = None
-        if ttype == 'Expense' and questionary.confirm("Is this an EMI for a specific debt?").ask():
+        if ttype == 'Expense' and self.prompt.confirm("Is this an EMI for a specific debt?").ask():
             debts = self.debt_service.list_debts()
             if debts:
-                debt_choice = questionary.select("Which debt is this EMI for?", 
-                    choices=[f"{d['debt_id']}: {d['name']}" for d in debts]).ask()
+                debt_choice = self.prompt.select("Which debt is this EMI for?", 
+                    choices=[f"{d.debt_id}: {d.name}" for d in debts]).ask()
                 if debt_choice: debt_id = int(debt_choice.split(':')[0])
             else: print("No debts found to link this to.")
         try:
-            recurring_dao = self.recurring_service.recurring_dao
-            recurring_dao.create_recurring_transaction(
-                account_id=account_id, description=desc, amount=amount, type=ttype, 
-                frequency='monthly', start_date=start_date, next_due_date=start_date, debt_id=debt_id
+            self.recurring_service.create_recurring_transaction(
+                account_id=account_id, amount=Money.from_rupees(amount_str), type=ttype, start_date=date.fromisoformat(start_date),
+                frequency=frequency, description=desc, debt_id=debt_id,
+                end_date=date.fromisoformat(end_date) if end_date else None,
+                max_occurrences=int(max_occurrences) if max_occurrences else None,
             )
             print("✅ Recurring transaction set up successfully!")
-        except Exception as e: print(f"❌ Error setting up recurring transaction: {e}")
+        except (RecurringTransactionError, ValueError, ArithmeticError) as e:
+            print(f"❌ Error setting up recurring transaction: {e}")
+
+    def _handle_upcoming_payments(self):
+        days = self.prompt.text("Show payments for the next how many days?", default="30").ask()
+        if not days: return
+        try:
+            upcoming = self.recurring_service.upcoming_payments(int(days))
+        except ValueError as e: print(f"❌ Error: {e}"); return
+        if not upcoming: print("No recurring payments due in that period."); return
+        print("\n--- Upcoming Payments ---"); print(json.dumps(upcoming, indent=2, default=json_default)); print("-------------------------\n")
 
     def _handle_spending_report(self):
-        month_str = questionary.text("Enter the month for the report (e.g., YYYY-MM):",
+        month_str = self.prompt.text("Enter the month for the report (e.g., YYYY-MM):",
             validate=lambda text: True if len(text) == 7 and text[4] == '-' else "Please use YYYY-MM format.").ask()
         if not month_str: return
         try:
@@ -638,11 +873,104 @@ class GoalManagerCLI:
             _, last_day = calendar.monthrange(year, month)
             start_date = f"{year}-{month:02d}-01"; end_date = f"{year}-{month:02d}-{last_day}"
             report = self.reporting_service.generate_spending_summary(start_date, end_date)
-            print("\n--- Monthly Spending Summary ---"); print(json.dumps(report, indent=2, default=str)); print("--------------------------------\n")
+            print("\n--- Monthly Spending Summary ---"); print(json.dumps(report, indent=2, default=json_default)); print("--------------------------------\n")
         except Exception as e: print(f"❌ Error generating report: {e}")
 
+    def _handle_spending_trend(self):
+        start_date = self.prompt.text("Start date (YYYY-MM-DD):").ask()
+        if not start_date: return
+        end_date = self.prompt.text("End date (YYYY-MM-DD):", default=date.today().isoformat()).ask()
+        if not end_date: return
+        bucket = self.prompt.select("Group by:", choices=list(TREND_BUCKETS)).ask()
+        if not bucket: return
+        try:
+            trend = self.reporting_service.generate_spending_trend(start_date, end_date, bucket)
+            print("\n--- Spending Trend ---"); print(json.dumps(trend, indent=2, default=json_default)); print("----------------------\n")
+        except ReportingError as e: print(f"❌ Error generating trend: {e}")
+
+    def _handle_unusual_expenses(self):
+        flagged = self.anomaly_service.flagged(20)
+        if not flagged: print("Nothing unusual so far."); return
+        print("\n--- Unusual Expenses ---"); print(json.dumps(flagged, indent=2, default=json_default)); print("------------------------\n")
+
+    def _handle_duplicates(self):
+        print("Scanning the ledger for duplicates...")
+        groups = self.duplicate_service.scan()
+        if not groups: print("No duplicate transactions found."); return
+        print("\n--- Duplicate Transactions ---"); print(json.dumps(groups, indent=2, default=json_default)); print("------------------------------\n")
+
+    def _handle_top_spending(self):
+        start_date = self.prompt.text("Start date (YYYY-MM-DD):", default=date(date.today().year, 1, 1).isoformat()).ask()
+        if not start_date: return
+        end_date = self.prompt.text("End date (YYYY-MM-DD):", default=date.today().isoformat()).ask()
+        if not end_date: return
+        limit_str = self.prompt.text("How many to show?", default="10").ask()
+        if not limit_str: return
+        try:
+            top = self.reporting_service.generate_top_spending(start_date, end_date, int(limit_str))
+            print("\n--- Top Categories & Payees ---"); print(json.dumps(top, indent=2, default=json_default)); print("-------------------------------\n")
+        except ValueError: print("❌ Invalid number.")
+        except ReportingError as e: print(f"❌ Error generating report: {e}")
+
+    def _handle_balance_history(self):
+        start_date = self.prompt.text("Start date (YYYY-MM-DD):").ask()
+        if not start_date: return
+        end_date = self.prompt.text("End date (YYYY-MM-DD):", default=date.today().isoformat()).ask()
+        if not end_date: return
+        step = self.prompt.select("One point per:", choices=list(HISTORY_STEPS)).ask()
+        if not step: return
+        try:
+            history = self.net_worth_service.balance_history(date.fromisoformat(start_date), date.fromisoformat(end_date), step)
+            print("\n--- Balance History ---"); print(json.dumps(history, indent=2, default=json_default)); print("-----------------------\n")
+        except (NetWorthError, ValueError) as e: print(f"❌ Error: {e}")
+
+    def _handle_cash_flow_forecast(self):
+        days = self.prompt.text("Forecast horizon in days:", default="365").ask()
+        if not days: return
+        threshold = self.prompt.text("Warn when a balance drops below:", default="0").ask()
+        if threshold is None: return
+        try:
+            forecast = self.cash_flow_service.forecast(int(days), Money.from_rupees(threshold or "0"))
+        except (CashFlowError, ValueError, ArithmeticError) as e: print(f"❌ Error: {e}"); return
+        print("\n--- Cash-Flow Forecast ---"); print(json.dumps(forecast["accounts"], indent=2, default=json_default)); print("--------------------------\n")
+        for summary in forecast["accounts"]:
+            if summary["first_below_threshold"]:
+                print(f"⚠️  '{summary['account_name']}' drops below {threshold} on {summary['first_below_threshold']}.")
+
+    def _handle_goal_forecasts(self):
+        print("Running simulations for all active goals...")
+        forecasts = self.forecast_service.forecast_active_goals(wait=True)
+        if not forecasts: print("No active goals with enough saving history to forecast."); return
+        print("\n--- Goal Completion Forecasts ---"); print(json.dumps(forecasts, indent=2, default=json_default)); print("---------------------------------\n")
+
+    def _handle_export_transactions(self):
+        fmt = self.prompt.select("Export format:", choices=list(ExportService.FORMATS)).ask()
+        if not fmt: return
+        path = self.prompt.text("Output file path:", default=f"transactions.{fmt}").ask()
+        if not path: return
+        start_date = self.prompt.text("Start date (YYYY-MM-DD, optional):").ask() or None
+        end_date = self.prompt.text("End date (YYYY-MM-DD, optional):").ask() or None
+        account_id = None
+        if self.prompt.confirm("Export a single account only?", default=False).ask():
+            account_id = self._select_account("Which account do you want to export?")
+            if not account_id: return
+        try:
+            with open(path, "w", newline="", encoding="utf-8") if fmt == "csv" else open(path, "wb") as output:
+                stats = self.export_service.export_transactions(output, fmt, start_date, end_date, account_id)
+            print(f"✅ Exported {stats['rows']} transactions to {path} "
+                  f"in {stats['seconds']}s ({stats['rows_per_second']:,.0f} rows/sec).")
+        except (ExportError, OSError, ValueError) as e: print(f"❌ Error exporting transactions: {e}")
+
 def main():
-    cli = GoalManagerCLI()
+    args = sys.argv[1:]
+    profile_dir = None
+    if args[:1] == ["--profile"] and len(args) >= 2:
+        profile_dir, args = args[1], args[2:]
+    # Any other arguments select the non-interactive, JSON-printing command mode.
+    if args:
+        from src.cli.commands import main as run_commands
+        sys.exit(run_commands(args, lambda: GoalManagerCLI(profile_dir)))
+    cli = GoalManagerCLI(profile_dir)
     cli.run()
 
 if __name__ == "__main__":
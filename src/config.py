@@ -30,8 +30,13 @@ config = AppConfig()
 '''
 # src/config.py
 import os
+from typing import Optional
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from src.dao.scheduler import RequestScheduler
+from src.dao.local_replica import LocalReplica, replica_path
+from src.dao.fx_rates import FxRates
+from src.dao.transaction_archive import TransactionArchive
 
 # Load environment variables from .env file for local development
 load_dotenv()
@@ -49,12 +54,37 @@ except Exception: # Handles cases where st.secrets is not available
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# Direct PostgreSQL connection string, only needed to apply schema migrations.
+DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Limits for calls to the backend, shared by every DAO of the process.
+MAX_CONCURRENCY = int(os.getenv("GOAL_MANAGER_MAX_CONCURRENCY", "8"))
+RATE_LIMIT = float(os.getenv("GOAL_MANAGER_RATE_LIMIT", "20"))
+RATE_BURST = int(os.getenv("GOAL_MANAGER_RATE_BURST", "40"))
+
+# Directory of the CLI's on-disk replica; set it to "off" to always read from the backend.
+REPLICA_DIR = os.getenv("GOAL_MANAGER_REPLICA_DIR", os.path.join(os.path.expanduser("~"), ".goal_manager"))
+
+# Currency that totals, reports and goal progress are shown in, and the local
+# CSV file (date,currency,rate) with the value of other currencies in it.
+BASE_CURRENCY = os.getenv("GOAL_MANAGER_BASE_CURRENCY", "INR").upper()
+FX_RATES_FILE = os.getenv("GOAL_MANAGER_FX_RATES", os.path.join(os.path.expanduser("~"), ".goal_manager", "fx_rates.csv"))
+
+# Directory of the monthly partition files of archived transactions ("off" disables
+# archiving), and how many closed months stay in the transactions table.
+ARCHIVE_DIR = os.getenv("GOAL_MANAGER_ARCHIVE_DIR", os.path.join(os.path.expanduser("~"), ".goal_manager", "archive"))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("GOAL_MANAGER_ARCHIVE_AFTER_MONTHS", "12"))
+
 
 class AppConfig:
     """
     Manages application configuration and shared resources like the database client.
     """
     _supabase_client: Client = None
+    _request_scheduler: RequestScheduler = None
+    _local_replica: LocalReplica = None
+    _fx_rates: FxRates = None
+    _transaction_archive: TransactionArchive = None
 
     def get_supabase_client(self) -> Client:
         """
@@ -67,5 +97,45 @@ class AppConfig:
             self._supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
         return self._supabase_client
 
+    def get_request_scheduler(self) -> RequestScheduler:
+        """
+        Returns the singleton scheduler that admits backend calls by priority
+        and keeps them under the configured concurrency and rate limits.
+        """
+        if self._request_scheduler is None:
+            self._request_scheduler = RequestScheduler(
+                max_concurrency=MAX_CONCURRENCY,
+                rate_per_second=RATE_LIMIT,
+                burst=RATE_BURST,
+            )
+        return self._request_scheduler
+
+    def get_local_replica(self) -> Optional[LocalReplica]:
+        """
+        Returns the singleton on-disk replica of the listed tables,
+        or None when it is switched off.
+        """
+        if self._local_replica is None and REPLICA_DIR.lower() != "off":
+            self._local_replica = LocalReplica(replica_path(REPLICA_DIR, SUPABASE_URL))
+        return self._local_replica
+
+    def get_fx_rates(self) -> FxRates:
+        """
+        Returns the singleton exchange-rate table, loaded once from the
+        local rate file into memory.
+        """
+        if self._fx_rates is None:
+            self._fx_rates = FxRates.from_file(FX_RATES_FILE, BASE_CURRENCY)
+        return self._fx_rates
+
+    def get_transaction_archive(self) -> Optional[TransactionArchive]:
+        """
+        Returns the singleton store of archived-transaction partition files,
+        or None when archiving is switched off.
+        """
+        if self._transaction_archive is None and ARCHIVE_DIR.lower() != "off":
+            self._transaction_archive = TransactionArchive(ARCHIVE_DIR)
+        return self._transaction_archive
+
 # Creates a single, reusable instance of the AppConfig class
 config = AppConfig()
\ No newline at end of file
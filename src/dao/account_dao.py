@@ -1,6 +1,15 @@
 # src/dao/account_dao.py
-from typing import List, Dict, Optional
+from typing import List, Optional, Iterable
+import pyarrow as pa
 from supabase import Client
+from src.dao.scheduler import idempotent
+from src.dao.column_updates import update_columns
+from src.dao.columnar import decode_csv, record_schema, select_list
+from src.models.money import Money
+from src.models.records import Account
+
+# Columns of list_accounts_arrow: the fields of Account.
+ACCOUNT_SCHEMA = record_schema(Account)
 
 class AccountDAO:
     """
@@ -10,23 +19,39 @@ class AccountDAO:
         self.db = db_client
         self.table = "accounts"
 
-    def create_account(self, name: str, initial_balance: float = 0.0) -> Optional[Dict]:
+    def create_account(self, name: str, initial_balance: Money, currency: str = "INR") -> Optional[Account]:
         """Creates a new account."""
-        payload = {"name": name, "balance": initial_balance}
+        payload = {"name": name, "balance": initial_balance.to_db(), "opening_balance": initial_balance.to_db(),
+                   "currency": currency}
         resp = self.db.table(self.table).insert(payload).execute()
-        return resp.data[0] if resp.data else None
+        return Account.from_row(resp.data[0]) if resp.data else None
 
-    def get_account_by_id(self, account_id: int) -> Optional[Dict]:
+    @idempotent
+    def get_account_by_id(self, account_id: int) -> Optional[Account]:
         """Retrieves a single account by its ID."""
         resp = self.db.table(self.table).select("*").eq("account_id", account_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return Account.from_row(resp.data[0]) if resp.data else None
 
-    def list_accounts(self) -> List[Dict]:
+    @idempotent
+    def list_accounts(self) -> List[Account]:
         """Lists all accounts."""
         resp = self.db.table(self.table).select("*").order("name").execute()
-        return resp.data or []
+        return [Account.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def list_accounts_arrow(self) -> pa.Table:
+        """Lists all accounts as an Arrow table, decoded column by column from a CSV response."""
+        resp = self.db.table(self.table).select(select_list(ACCOUNT_SCHEMA)).order("name").csv().execute()
+        return decode_csv(resp.data, ACCOUNT_SCHEMA)
 
-    def update_account_balance(self, account_id: int, new_balance: float) -> Optional[Dict]:
+    def update_account_balance(self, account_id: int, new_balance: Money) -> Optional[Account]:
         """Updates the balance of a specific account."""
-        resp = self.db.table(self.table).update({"balance": new_balance}).eq("account_id", account_id).execute()
-        return resp.data[0] if resp.data else None
\ No newline at end of file
+        resp = self.db.table(self.table).update({"balance": new_balance.to_db()}).eq("account_id", account_id).execute()
+        return Account.from_row(resp.data[0]) if resp.data else None
+
+    def save_accounts(self, accounts: List[Account], columns: Iterable[str]) -> List[Account]:
+        """Writes the given columns of many changed accounts, one request per distinct set of new values."""
+        if not accounts:
+            return []
+        rows = update_columns(self.db, self.table, "account_id", accounts, columns)
+        return [Account.from_row(row) for row in rows]
@@ -0,0 +1,56 @@
+# src/dao/archive_dao.py
+from typing import Iterator, List, Optional
+from datetime import date
+from supabase import Client
+from src.dao.scheduler import idempotent
+from src.dao.pagination import iter_keyset_pages
+from src.models.records import ArchivedMonth, TransactionRollup
+
+class ArchiveDAO:
+    """
+    Data Access Object for the backend side of the transaction archive: the daily
+    'transaction_rollups' of archived transactions and the 'archived_months' list.
+    """
+    def __init__(self, db_client: Client):
+        self.db = db_client
+        self.table = "transaction_rollups"
+        self.months_table = "archived_months"
+
+    @idempotent
+    def list_archived_months(self) -> List[ArchivedMonth]:
+        """Every archived month (first day), oldest first."""
+        resp = self.db.table(self.months_table).select("*").order("month").execute()
+        return [ArchivedMonth.from_row(row) for row in resp.data or []]
+
+    def archive_transactions(self, month: date, transaction_ids: List[int]) -> int:
+        """
+        Moves transactions of a month into the rollups and deletes them, in one backend
+        transaction. Returns how many were archived.
+        This requires the archive_transactions PostgreSQL function in Supabase.
+        """
+        resp = self.db.rpc('archive_transactions', {
+            'p_month': month.isoformat(), 'p_transaction_ids': transaction_ids,
+        }).execute()
+        return resp.data or 0
+
+    def iter_rollups(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        type: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[List[TransactionRollup]]:
+        """
+        Yields rollups of the given (inclusive) day range, with their category name and
+        account currency, one page at a time, using keyset pagination on rollup_id.
+        """
+        def query():
+            q = self.db.table(self.table).select("*, categories(name), accounts(currency)")
+            if start_date:
+                q = q.gte("day", start_date)
+            if end_date:
+                q = q.lte("day", end_date)
+            if type is not None:
+                q = q.eq("type", type)
+            return q
+        yield from iter_keyset_pages(query, TransactionRollup.from_row, "rollup_id", page_size=page_size)
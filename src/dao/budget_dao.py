@@ -0,0 +1,66 @@
+# src/dao/budget_dao.py
+from typing import List, Optional
+from datetime import date
+from supabase import Client
+from src.dao.scheduler import idempotent
+from src.models.money import Money
+from src.models.records import CategoryBudget
+
+class BudgetDAO:
+    """
+    Data Access Object for 'category_budgets' and their running month-to-date
+    totals in 'category_monthly_totals'.
+    """
+    def __init__(self, db_client: Client):
+        self.db = db_client
+        self.table = "category_budgets"
+        self.totals_table = "category_monthly_totals"
+
+    def set_budget(self, category_id: int, monthly_limit: Money, alert_thresholds: List[float]) -> Optional[CategoryBudget]:
+        """Creates or replaces the monthly limit of a category."""
+        payload = {
+            "category_id": category_id,
+            "monthly_limit": monthly_limit.to_db(),
+            "alert_thresholds": alert_thresholds,
+        }
+        resp = self.db.table(self.table).upsert(payload, on_conflict="category_id").execute()
+        return CategoryBudget.from_row(resp.data[0]) if resp.data else None
+
+    def delete_budget(self, category_id: int) -> None:
+        """Removes the limit of a category; its running totals are kept."""
+        self.db.table(self.table).delete().eq("category_id", category_id).execute()
+
+    @idempotent
+    def list_budgets_with_totals(self, month: date) -> List[CategoryBudget]:
+        """
+        Retrieves every budget with its category name and the running total of the
+        given month (first day) in a single request.
+        """
+        resp = (
+            self.db.table(self.table)
+            .select("*, categories(name, category_monthly_totals(total_spent))")
+            .eq("categories.category_monthly_totals.month", month.isoformat())
+            .execute()
+        )
+        return [CategoryBudget.from_row(row) for row in resp.data or []]
+
+    def add_to_monthly_total(self, category_id: int, month: date, amount: Money) -> Optional[CategoryBudget]:
+        """
+        Atomically adds an amount to a category's running total for a month.
+        Returns the new total together with the category's budget, or None when
+        the category has no budget. Uses the record_category_spend PostgreSQL function.
+        """
+        resp = self.db.rpc('record_category_spend', {
+            'p_category_id': category_id,
+            'p_month': month.isoformat(),
+            'p_amount': amount.to_db(),
+        }).execute()
+        row = resp.data[0] if isinstance(resp.data, list) and resp.data else resp.data
+        if not row or row.get("monthly_limit") is None:
+            return None
+        return CategoryBudget(
+            category_id=category_id,
+            monthly_limit=Money.from_db(row["monthly_limit"]),
+            alert_thresholds=[float(t) for t in row.get("alert_thresholds") or [0.8, 1.0]],
+            spent=Money.from_db(row["total_spent"]),
+        )
@@ -1,6 +1,7 @@
 # src/dao/category_dao.py
-from typing import Dict, Optional
+from typing import Optional
 from supabase import Client
+from src.models.records import Category
 
 class CategoryDAO:
     """
@@ -10,7 +11,7 @@ class CategoryDAO:
         self.db = db_client
         self.table = "categories"
 
-    def get_or_create_category(self, name: str) -> Optional[Dict]:
+    def get_or_create_category(self, name: str) -> Optional[Category]:
         """
         Fetches a category by name. If it doesn't exist, it creates it.
         This is useful to avoid creating duplicate categories.
@@ -18,8 +19,8 @@ class CategoryDAO:
         # Check if category exists
         get_resp = self.db.table(self.table).select("*").eq("name", name).limit(1).execute()
         if get_resp.data:
-            return get_resp.data[0]
+            return Category.from_row(get_resp.data[0])
         
         # If not, create it
         create_resp = self.db.table(self.table).insert({"name": name}).execute()
-        return create_resp.data[0] if create_resp.data else None
\ No newline at end of file
+        return Category.from_row(create_resp.data[0]) if create_resp.data else None
\ No newline at end of file
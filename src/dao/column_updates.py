@@ -0,0 +1,27 @@
+# src/dao/column_updates.py
+from typing import Dict, Iterable, List
+
+from src.models.records import Record
+
+
+def update_columns(db, table: str, key: str, records: List[Record], columns: Iterable[str]) -> List[Dict]:
+    """
+    Writes only the given columns of many changed records and returns the updated rows.
+    Records whose new values are the same share one request (an UPDATE over their keys),
+    so untouched columns keep whatever other sessions wrote in the meantime.
+    An upsert cannot do this: it inserts the partial row first, which fails on the
+    table's other NOT NULL columns.
+    """
+    columns = [c for c in columns if c != key]
+    # Step 1: Group the records by the encoded values of the changed columns.
+    groups: Dict[tuple, List] = {}
+    for r in records:
+        values = r.to_db_row(columns)
+        groups.setdefault(tuple(sorted(values.items())), []).append(getattr(r, key))
+
+    # Step 2: One update per distinct set of values.
+    rows: List[Dict] = []
+    for values, ids in groups.items():
+        resp = db.table(table).update(dict(values)).in_(key, ids).execute()
+        rows.extend(resp.data or [])
+    return rows
@@ -0,0 +1,59 @@
+# src/dao/columnar.py
+import io
+import typing
+from dataclasses import fields
+from datetime import date
+from typing import Union
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from src.models.money import Money
+
+# Arrow type of each record field type. Money columns hold rupees, as Record.to_dict shows them.
+_ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bool: pa.bool_(),
+    Money: pa.float64(),
+    date: pa.date32(),
+}
+
+
+def record_schema(record_cls) -> pa.Schema:
+    """Arrow schema with one column per field of a record, in field order."""
+    columns = []
+    for f in fields(record_cls):
+        kind = f.type
+        if typing.get_origin(kind) is Union:  # Optional[X]
+            kind = next(arg for arg in typing.get_args(kind) if arg is not type(None))
+        columns.append(pa.field(f.name, _ARROW_TYPES[kind]))
+    return pa.schema(columns)
+
+
+def select_list(schema: pa.Schema) -> str:
+    """PostgREST select list of exactly the schema's columns."""
+    return ",".join(schema.names)
+
+
+def decode_csv(body: Union[str, bytes, list, None], schema: pa.Schema) -> pa.Table:
+    """
+    Decodes a PostgREST text/csv response body straight into an Arrow table of the
+    given schema, one typed column at a time, without building a dict per row.
+    Empty fields are nulls; quoted empty strings stay empty strings.
+    """
+    if not body:
+        return schema.empty_table()
+    data = body.encode() if isinstance(body, str) else body
+    return pa_csv.read_csv(
+        io.BytesIO(data),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=schema,
+            include_columns=schema.names,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=["t", "true"],
+            false_values=["f", "false"],
+        ),
+    )
@@ -1,6 +1,15 @@
 # src/dao/debt_dao.py
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable
+import pyarrow as pa
 from supabase import Client
+from src.dao.scheduler import idempotent
+from src.dao.column_updates import update_columns
+from src.dao.columnar import decode_csv, record_schema, select_list
+from src.models.money import Money
+from src.models.records import Debt, to_row
+
+# Columns of list_debts_arrow: the fields of Debt.
+DEBT_SCHEMA = record_schema(Debt)
 
 class DebtDAO:
     """
@@ -10,35 +19,50 @@ class DebtDAO:
         self.db = db_client
         self.table = "debts"
 
-    def create_debt(self, name: str, total_amount: float, monthly_emi: Optional[float]) -> Optional[Dict]:
+    def create_debt(self, name: str, total_amount: Money, monthly_emi: Optional[Money]) -> Optional[Debt]:
         """Creates a new debt record."""
-        payload = {
+        payload = to_row({
             "name": name,
             "total_amount": total_amount,
             "remaining_amount": total_amount,
             "monthly_emi": monthly_emi
-        }
+        })
         resp = self.db.table(self.table).insert(payload).execute()
-        return resp.data[0] if resp.data else None
+        return Debt.from_row(resp.data[0]) if resp.data else None
 
-    def list_debts(self) -> List[Dict]:
+    @idempotent
+    def list_debts(self) -> List[Debt]:
         """Lists all debts."""
         resp = self.db.table(self.table).select("*").order("created_at").execute()
-        return resp.data or []
+        return [Debt.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def list_debts_arrow(self) -> pa.Table:
+        """Lists all debts as an Arrow table, decoded column by column from a CSV response."""
+        resp = self.db.table(self.table).select(select_list(DEBT_SCHEMA)).order("created_at").csv().execute()
+        return decode_csv(resp.data, DEBT_SCHEMA)
 
-    def update_debt_balance(self, debt_id: int, new_remaining_amount: float) -> Optional[Dict]:
+    def update_debt_balance(self, debt_id: int, new_remaining_amount: Money) -> Optional[Debt]:
         """Updates the remaining balance of a debt."""
-        resp = self.db.table(self.table).update({"remaining_amount": new_remaining_amount}).eq("debt_id", debt_id).execute()
-        return resp.data[0] if resp.data else None
+        resp = self.db.table(self.table).update({"remaining_amount": new_remaining_amount.to_db()}).eq("debt_id", debt_id).execute()
+        return Debt.from_row(resp.data[0]) if resp.data else None
 
     # NEW METHOD: To get a specific debt for editing
-    def get_debt_by_id(self, debt_id: int) -> Optional[Dict]:
+    @idempotent
+    def get_debt_by_id(self, debt_id: int) -> Optional[Debt]:
         """Retrieves a single debt by its ID."""
         resp = self.db.table(self.table).select("*").eq("debt_id", debt_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return Debt.from_row(resp.data[0]) if resp.data else None
 
     # NEW METHOD: To update any part of a debt record
-    def update_debt(self, debt_id: int, updates: Dict) -> Optional[Dict]:
+    def update_debt(self, debt_id: int, updates: Dict) -> Optional[Debt]:
         """Updates a debt's details."""
-        resp = self.db.table(self.table).update(updates).eq("debt_id", debt_id).execute()
-        return resp.data[0] if resp.data else None
\ No newline at end of file
+        resp = self.db.table(self.table).update(to_row(updates)).eq("debt_id", debt_id).execute()
+        return Debt.from_row(resp.data[0]) if resp.data else None
+
+    def save_debts(self, debts: List[Debt], columns: Iterable[str]) -> List[Debt]:
+        """Writes the given columns of many changed debts, one request per distinct set of new values."""
+        if not debts:
+            return []
+        rows = update_columns(self.db, self.table, "debt_id", debts, columns)
+        return [Debt.from_row(row) for row in rows]
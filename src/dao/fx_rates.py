@@ -0,0 +1,92 @@
+# src/dao/fx_rates.py
+import csv
+import os
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class FxRateError(ValueError):
+    """Raised for a malformed rate file or a currency without rates."""
+    pass
+
+
+def to_days(values: Iterable) -> np.ndarray:
+    """Days since 1970-01-01 of dates or ISO date/timestamp strings; a missing value counts as today."""
+    today = date.today().isoformat()
+    return np.array([(v.isoformat() if isinstance(v, date) else v[:10]) if v else today for v in values],
+                    dtype="datetime64[D]").astype(np.int64)
+
+
+class FxRates:
+    """
+    In-memory, date-indexed table of exchange rates into one base currency,
+    read from a local CSV file (columns date, currency, rate; the rate is the
+    value of one unit of the currency in the base currency), so no network is
+    needed. Each currency keeps its rate dates sorted; the rate of a day is the
+    latest one on or before it, looked up for whole arrays with np.searchsorted.
+    Days before the first known rate use that first rate.
+    """
+    def __init__(self, base: str, series: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None):
+        self.base = base.upper()
+        # currency -> (rate days since epoch, ascending; rates)
+        self._series = series or {}
+
+    @classmethod
+    def from_file(cls, path: Optional[str], base: str) -> "FxRates":
+        """Loads a rate file. A missing file gives a table that only knows the base currency."""
+        base = base.upper()
+        entries: Dict[str, List[Tuple[str, float]]] = {}
+        if path and os.path.exists(path):
+            with open(path, newline="") as f:
+                for line, row in enumerate(csv.DictReader(f), start=2):
+                    try:
+                        currency, day, rate = row["currency"].strip().upper(), row["date"].strip()[:10], float(row["rate"])
+                    except (KeyError, AttributeError, TypeError, ValueError):
+                        raise FxRateError(f"{path}, line {line}: expected date, currency and rate columns.")
+                    if rate <= 0:
+                        raise FxRateError(f"{path}, line {line}: rate must be positive.")
+                    if currency != base:
+                        entries.setdefault(currency, []).append((day, rate))
+
+        series = {}
+        for currency, rows in entries.items():
+            try:
+                days = np.array([day for day, _ in rows], dtype="datetime64[D]").astype(np.int64)
+            except ValueError as e:
+                raise FxRateError(f"{path}: bad date for {currency}: {e}")
+            # Stable, so the later line wins for a repeated date.
+            order = np.argsort(days, kind="stable")
+            series[currency] = (days[order], np.array([rate for _, rate in rows])[order])
+        return cls(base, series)
+
+    def currencies(self) -> List[str]:
+        return sorted({self.base, *self._series})
+
+    def supports(self, currency: str) -> bool:
+        return currency == self.base or currency in self._series
+
+    def rates(self, currency: str, days: np.ndarray) -> np.ndarray:
+        """Rate of a currency on each of the given days."""
+        if currency == self.base:
+            return np.ones(len(days))
+        series = self._series.get(currency)
+        if series is None:
+            raise FxRateError(f"No exchange rates from {currency} to {self.base}.")
+        rate_days, rates = series
+        i = np.searchsorted(rate_days, days, side="right") - 1
+        return rates[np.maximum(i, 0)]
+
+    def convert(self, paise: Sequence[int], currencies: Sequence[str], days: np.ndarray) -> np.ndarray:
+        """Amounts (paise) in the given currencies on the given days, as base-currency paise."""
+        paise = np.asarray(paise, dtype=np.int64)
+        currencies = np.asarray(currencies, dtype=object)
+        foreign = set(currencies.tolist()) - {self.base}
+        if not foreign:
+            return paise
+        rates = np.ones(len(paise))
+        for currency in foreign:
+            mask = currencies == currency
+            rates[mask] = self.rates(currency, np.asarray(days)[mask])
+        return np.rint(paise * rates).astype(np.int64)
@@ -1,6 +1,10 @@
 # src/dao/goal_dao.py
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable
 from supabase import Client
+from src.dao.scheduler import idempotent
+from src.dao.column_updates import update_columns
+from src.models.money import Money
+from src.models.records import Goal, to_row
 
 class GoalDAO:
     """
@@ -10,23 +14,32 @@ class GoalDAO:
         self.db = db_client
         self.table = "goals"
 
-    def create_goal(self, name: str, budget: Optional[float] = None) -> Optional[Dict]:
+    def create_goal(self, name: str, budget: Optional[Money] = None, priority: int = 3) -> Optional[Goal]:
         """Creates a new goal."""
-        payload = {"name": name, "budget": budget}
+        payload = to_row({"name": name, "budget": budget, "priority": priority})
         resp = self.db.table(self.table).insert(payload).execute()
-        return resp.data[0] if resp.data else None
+        return Goal.from_row(resp.data[0]) if resp.data else None
 
-    def get_goal_by_id(self, goal_id: int) -> Optional[Dict]:
+    @idempotent
+    def get_goal_by_id(self, goal_id: int) -> Optional[Goal]:
         """Retrieves a single goal by its primary key."""
         resp = self.db.table(self.table).select("*").eq("goal_id", goal_id).limit(1).execute()
-        return resp.data[0] if resp.data else None
+        return Goal.from_row(resp.data[0]) if resp.data else None
 
-    def list_goals(self) -> List[Dict]:
+    @idempotent
+    def list_goals(self) -> List[Goal]:
         """Lists all goals."""
         resp = self.db.table(self.table).select("*").order("created_at").execute()
-        return resp.data or []
+        return [Goal.from_row(row) for row in resp.data or []]
 
-    def update_goal(self, goal_id: int, updates: Dict) -> Optional[Dict]:
+    def update_goal(self, goal_id: int, updates: Dict) -> Optional[Goal]:
         """Updates a goal's details (e.g., name, status, budget)."""
-        resp = self.db.table(self.table).update(updates).eq("goal_id", goal_id).execute()
-        return resp.data[0] if resp.data else None
\ No newline at end of file
+        resp = self.db.table(self.table).update(to_row(updates)).eq("goal_id", goal_id).execute()
+        return Goal.from_row(resp.data[0]) if resp.data else None
+
+    def save_goals(self, goals: List[Goal], columns: Iterable[str]) -> List[Goal]:
+        """Writes the given columns of many changed goals, one request per distinct set of new values."""
+        if not goals:
+            return []
+        rows = update_columns(self.db, self.table, "goal_id", goals, columns)
+        return [Goal.from_row(row) for row in rows]
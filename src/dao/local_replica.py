@@ -0,0 +1,195 @@
+# src/dao/local_replica.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from supabase import Client
+from src.dao.migrations import apply_sqlite
+from src.dao.scheduler import Priority, RequestScheduler, priority
+from src.models.records import json_default
+
+logger = logging.getLogger(__name__)
+
+# Replicated tables: primary key and the column lists are ordered by.
+REPLICATED_TABLES = {
+    "accounts": ("account_id", "name"),
+    "goals": ("goal_id", "created_at"),
+    "debts": ("debt_id", "created_at"),
+    "categories": ("category_id", "name"),
+    "steps": ("step_id", "created_at"),
+}
+
+# Rows changed by transactions that were still open at the last sync can carry an
+# updated_at just below the watermark, so each sync re-reads this window.
+SYNC_LOOKBACK = timedelta(minutes=5)
+
+
+class LocalReplica:
+    """
+    On-disk SQLite copy of the small, frequently listed tables.
+    A sync pulls only the rows whose updated_at is past the table's watermark
+    (keyset-paginated on updated_at and primary key) and applies rows with a
+    deleted_at as tombstones. Lists are then served locally.
+    """
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        apply_sqlite(self._conn)
+        self._lock = threading.Lock()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    # --- Local reads ---
+    def is_ready(self, table: str) -> bool:
+        """Whether the table has been synced at least once, so local reads are complete."""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM replica_watermarks WHERE table_name = ?", (table,)).fetchone()
+        return row is not None
+
+    def rows(self, table: str, goal_id: Optional[int] = None) -> List[Dict]:
+        sql = "SELECT data FROM replica_rows WHERE table_name = ?"
+        params: tuple = (table,)
+        if goal_id is not None:
+            sql += " AND goal_id = ?"
+            params += (goal_id,)
+        with self._lock:
+            result = self._conn.execute(sql + " ORDER BY sort_key, pk", params).fetchall()
+        return [json.loads(data) for (data,) in result]
+
+    def find(self, table: str, column: str, value) -> Optional[Dict]:
+        """First row of a table whose column equals value."""
+        return next((row for row in self.rows(table) if row.get(column) == value), None)
+
+    # --- Local writes ---
+    def upsert(self, table: str, rows: List[Dict]) -> None:
+        pk, sort_column = REPLICATED_TABLES[table]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO replica_rows (table_name, pk, sort_key, goal_id, data) VALUES (?, ?, ?, ?, ?)",
+                [(table, row[pk], str(row.get(sort_column) or ""), row.get("goal_id"), json.dumps(row, default=json_default))
+                 for row in rows],
+            )
+
+    def delete(self, table: str, pks: List[int]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM replica_rows WHERE table_name = ? AND pk = ?", [(table, pk) for pk in pks])
+
+    # --- Delta sync ---
+    def sync(self, db: Client, scheduler: Optional[RequestScheduler] = None, page_size: int = 1000) -> Dict[str, int]:
+        """Pulls rows changed since each table's watermark. Returns the number of rows applied per table."""
+        applied = {}
+        with priority(Priority.BACKGROUND):
+            for table in REPLICATED_TABLES:
+                applied[table] = self._sync_table(db, scheduler, table, page_size)
+        return applied
+
+    def _sync_table(self, db: Client, scheduler: Optional[RequestScheduler], table: str, page_size: int) -> int:
+        pk, _ = REPLICATED_TABLES[table]
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at FROM replica_watermarks WHERE table_name = ?", (table,)).fetchone()
+        watermark = row[0] if row else None
+        cursor_ts = (datetime.fromisoformat(watermark) - SYNC_LOOKBACK).isoformat() if watermark else None
+        cursor_pk = 0
+        applied = 0
+
+        while True:
+            query = db.table(table).select("*")
+            if cursor_ts:
+                query = query.or_(f'updated_at.gt."{cursor_ts}",and(updated_at.eq."{cursor_ts}",{pk}.gt.{cursor_pk})')
+            query = query.order("updated_at").order(pk).limit(page_size)
+            resp = scheduler.run_read(query.execute) if scheduler else query.execute()
+            page = resp.data or []
+
+            live = [r for r in page if not r.get("deleted_at")]
+            tombstones = [r[pk] for r in page if r.get("deleted_at")]
+            if live:
+                self.upsert(table, live)
+            if tombstones:
+                self.delete(table, tombstones)
+            applied += len(page)
+
+            if page:
+                cursor_ts, cursor_pk = page[-1].get("updated_at"), page[-1][pk]
+                if cursor_ts and (watermark is None or cursor_ts > watermark):
+                    watermark = cursor_ts
+            # Only an empty page ends the scan: PostgREST may cap pages below page_size.
+            if not page or not cursor_ts:
+                break
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replica_watermarks (table_name, updated_at, synced_at) VALUES (?, ?, ?)",
+                (table, watermark, datetime.now().isoformat()),
+            )
+        return applied
+
+    def start_background_sync(self, db: Client, scheduler: Optional[RequestScheduler] = None) -> threading.Thread:
+        """Runs sync() on a daemon thread, so startup does not wait for the network."""
+        def run():
+            try:
+                applied = self.sync(db, scheduler)
+                logger.info("Local replica synced: %s", applied)
+            except Exception as e:
+                logger.warning("Local replica sync failed: %s", e)
+
+        self._sync_thread = threading.Thread(target=run, name="replica-sync", daemon=True)
+        self._sync_thread.start()
+        return self._sync_thread
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> None:
+        if self._sync_thread:
+            self._sync_thread.join(timeout)
+
+
+class ReplicatedDAO:
+    """
+    Wraps a DAO so the named list reads are served from a LocalReplica once its
+    table has been synced. Every other call goes to the backend, and the records
+    it returns are written through to the replica, so the CLI sees its own writes.
+    """
+    def __init__(self, dao, replica: LocalReplica, record_cls, local_reads: Dict[str, Callable]):
+        self._dao = dao
+        self._replica = replica
+        self._record_cls = record_cls
+        self._local_reads = local_reads
+
+    def _write_through(self, result):
+        records = result if isinstance(result, list) else [result]
+        # Column encoding (Money as exact decimal strings), as the backend's rows are stored.
+        rows = [r.to_db_row() for r in records if isinstance(r, self._record_cls)]
+        if rows:
+            self._replica.upsert(self._dao.table, rows)
+        return result
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._dao, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        local = self._local_reads.get(name)
+        if local:
+            def read(*args, **kwargs):
+                if self._replica.is_ready(self._dao.table):
+                    rows = local(self._replica, *args, **kwargs)
+                    if isinstance(rows, list):
+                        return [self._record_cls.from_row(row) for row in rows]
+                    if rows is not None:
+                        return self._record_cls.from_row(rows)
+                return self._write_through(attr(*args, **kwargs))
+            return read
+
+        def call(*args, **kwargs):
+            return self._write_through(attr(*args, **kwargs))
+        return call
+
+
+def replica_path(base_dir: str, supabase_url: str) -> str:
+    """One replica file per backend project."""
+    digest = hashlib.sha1((supabase_url or "").encode()).hexdigest()[:12]
+    return os.path.join(base_dir, f"replica-{digest}.sqlite3")
@@ -0,0 +1,819 @@
+# src/dao/migrations.py
+import argparse
+import inspect
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass
+from datetime import date
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class MigrationError(Exception):
+    """Custom exception for schema migration errors."""
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema version: PostgreSQL for the backend, SQLite for the local replica (if it changes)."""
+    version: int
+    name: str
+    postgres: str
+    sqlite: str = ""
+
+
+_REPLICATED = (("accounts", "account_id"), ("goals", "goal_id"), ("debts", "debt_id"),
+               ("categories", "category_id"), ("steps", "step_id"))
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", postgres="""
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    balance numeric(14, 2) NOT NULL DEFAULT 0,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS categories (
+    category_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL
+);
+CREATE TABLE IF NOT EXISTS goals (
+    goal_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    budget numeric(14, 2),
+    status text NOT NULL DEFAULT 'Active',
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS steps (
+    step_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    goal_id bigint NOT NULL REFERENCES goals (goal_id) ON DELETE CASCADE,
+    description text NOT NULL,
+    status text NOT NULL DEFAULT 'Pending',
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS debts (
+    debt_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    total_amount numeric(14, 2) NOT NULL,
+    remaining_amount numeric(14, 2) NOT NULL,
+    monthly_emi numeric(14, 2),
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    account_id bigint NOT NULL REFERENCES accounts (account_id),
+    goal_id bigint REFERENCES goals (goal_id),
+    category_id bigint REFERENCES categories (category_id),
+    amount numeric(14, 2) NOT NULL,
+    type text NOT NULL,
+    description text,
+    transaction_date timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS recurring_transactions (
+    recurring_transaction_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    account_id bigint NOT NULL REFERENCES accounts (account_id),
+    debt_id bigint REFERENCES debts (debt_id),
+    description text,
+    amount numeric(14, 2) NOT NULL,
+    type text NOT NULL,
+    frequency text NOT NULL DEFAULT 'monthly',
+    start_date date,
+    next_due_date date NOT NULL
+);
+CREATE OR REPLACE FUNCTION spending_report_by_category(start_date date, end_date date)
+RETURNS TABLE (category_name text, total_spent numeric)
+LANGUAGE sql STABLE AS $$
+    SELECT coalesce(c.name, 'Uncategorized'), sum(t.amount)
+    FROM transactions t
+    LEFT JOIN categories c ON c.category_id = t.category_id
+    WHERE t.type = 'Expense'
+      AND t.transaction_date >= start_date
+      AND t.transaction_date < end_date + 1
+    GROUP BY 1
+    ORDER BY 2 DESC
+$$;
+"""),
+    Migration(2, "reconciliation_checkpoints", postgres="""
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS opening_balance numeric(14, 2);
+-- Existing accounts: the opening balance is whatever the ledger does not explain.
+UPDATE accounts a SET opening_balance = a.balance - coalesce((
+    SELECT sum(CASE WHEN t.type IN ('Income', 'Transfer In') THEN t.amount ELSE -t.amount END)
+    FROM transactions t WHERE t.account_id = a.account_id
+), 0)
+WHERE opening_balance IS NULL;
+ALTER TABLE accounts ALTER COLUMN opening_balance SET DEFAULT 0, ALTER COLUMN opening_balance SET NOT NULL;
+CREATE TABLE IF NOT EXISTS reconciliation_checkpoints (
+    account_id bigint PRIMARY KEY REFERENCES accounts (account_id) ON DELETE CASCADE,
+    last_transaction_id bigint NOT NULL,
+    ledger_balance numeric(14, 2) NOT NULL,
+    checkpointed_at timestamptz NOT NULL DEFAULT now()
+);
+"""),
+    Migration(3, "hot_path_indexes", postgres="""
+-- Goal details: transactions of one goal in date order.
+CREATE INDEX IF NOT EXISTS transactions_goal_id_idx ON transactions (goal_id, transaction_date) WHERE goal_id IS NOT NULL;
+-- Reports and exports filtered on a date range.
+CREATE INDEX IF NOT EXISTS transactions_transaction_date_idx ON transactions (transaction_date);
+-- Reconciliation pages through one account's ledger by id.
+CREATE INDEX IF NOT EXISTS transactions_account_id_idx ON transactions (account_id, transaction_id);
+CREATE INDEX IF NOT EXISTS recurring_transactions_next_due_date_idx ON recurring_transactions (next_due_date);
+CREATE INDEX IF NOT EXISTS steps_goal_id_idx ON steps (goal_id, created_at);
+-- Before this index, concurrent get_or_create_category calls could both insert a name.
+-- Merge such duplicates into the lowest category_id, so the unique index can be built.
+UPDATE transactions t SET category_id = d.keep_id
+FROM (SELECT category_id, min(category_id) OVER (PARTITION BY name) AS keep_id FROM categories) d
+WHERE t.category_id = d.category_id AND d.category_id <> d.keep_id;
+DELETE FROM categories c USING categories k WHERE k.name = c.name AND k.category_id < c.category_id;
+-- get_or_create_category looks categories up by name; unique also stops duplicate creates.
+CREATE UNIQUE INDEX IF NOT EXISTS categories_name_key ON categories (name);
+"""),
+    Migration(4, "spending_trend", postgres="""
+CREATE OR REPLACE FUNCTION spending_trend_by_category(start_date date, end_date date, bucket text DEFAULT 'month')
+RETURNS TABLE (period date, category_name text, total_spent numeric)
+LANGUAGE sql STABLE AS $$
+    SELECT date_trunc(bucket, t.transaction_date)::date, coalesce(c.name, 'Uncategorized'), sum(t.amount)
+    FROM transactions t
+    LEFT JOIN categories c ON c.category_id = t.category_id
+    WHERE t.type = 'Expense'
+      AND t.transaction_date >= start_date
+      AND t.transaction_date < end_date + 1
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+$$;
+"""),
+    Migration(5, "category_budgets", postgres="""
+CREATE TABLE IF NOT EXISTS category_budgets (
+    category_id bigint PRIMARY KEY REFERENCES categories (category_id) ON DELETE CASCADE,
+    monthly_limit numeric(14, 2) NOT NULL CHECK (monthly_limit > 0),
+    alert_thresholds numeric[] NOT NULL DEFAULT '{0.8, 1.0}'
+);
+CREATE TABLE IF NOT EXISTS category_monthly_totals (
+    category_id bigint NOT NULL REFERENCES categories (category_id) ON DELETE CASCADE,
+    month date NOT NULL,
+    total_spent numeric(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_id, month)
+);
+-- Expenses recorded before this migration count towards their month too.
+INSERT INTO category_monthly_totals (category_id, month, total_spent)
+SELECT category_id, date_trunc('month', transaction_date)::date, sum(amount)
+FROM transactions
+WHERE type = 'Expense' AND category_id IS NOT NULL
+GROUP BY 1, 2
+ON CONFLICT DO NOTHING;
+CREATE OR REPLACE FUNCTION record_category_spend(p_category_id bigint, p_month date, p_amount numeric)
+RETURNS TABLE (total_spent numeric, monthly_limit numeric, alert_thresholds numeric[])
+LANGUAGE plpgsql AS $$
+#variable_conflict use_column
+DECLARE
+    v_total numeric;
+BEGIN
+    INSERT INTO category_monthly_totals AS m (category_id, month, total_spent)
+    VALUES (p_category_id, p_month, p_amount)
+    ON CONFLICT (category_id, month) DO UPDATE SET total_spent = m.total_spent + EXCLUDED.total_spent
+    RETURNING m.total_spent INTO v_total;
+    RETURN QUERY
+        SELECT v_total, b.monthly_limit, b.alert_thresholds
+        FROM (SELECT 1) AS one
+        LEFT JOIN category_budgets b ON b.category_id = p_category_id;
+END
+$$;
+"""),
+    Migration(6, "recurring_limits", postgres="""
+ALTER TABLE recurring_transactions
+    ADD COLUMN IF NOT EXISTS end_date date,
+    ADD COLUMN IF NOT EXISTS max_occurrences integer CHECK (max_occurrences > 0),
+    ADD COLUMN IF NOT EXISTS occurrence_count integer NOT NULL DEFAULT 0,
+    -- An ended rule has no next due date.
+    ALTER COLUMN next_due_date DROP NOT NULL;
+"""),
+    Migration(7, "transfers", postgres="""
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS transfer_id uuid;
+-- One leg of each direction per transfer; also the idempotency lookup.
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_transfer_id_key ON transactions (transfer_id, type) WHERE transfer_id IS NOT NULL;
+CREATE OR REPLACE FUNCTION transfer_funds(
+    p_transfer_id uuid, p_from_account_id bigint, p_to_account_id bigint, p_amount numeric, p_description text DEFAULT NULL
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- A retried call returns the legs written by the first one.
+    IF EXISTS (SELECT 1 FROM transactions WHERE transfer_id = p_transfer_id) THEN
+        RETURN QUERY SELECT * FROM transactions WHERE transfer_id = p_transfer_id ORDER BY transaction_id;
+        RETURN;
+    END IF;
+    IF p_amount <= 0 THEN
+        RAISE EXCEPTION 'Transfer amount must be positive.';
+    END IF;
+    -- Lock both accounts in id order, so opposite transfers cannot deadlock.
+    PERFORM 1 FROM accounts WHERE account_id IN (p_from_account_id, p_to_account_id) ORDER BY account_id FOR UPDATE;
+    IF NOT EXISTS (SELECT 1 FROM accounts WHERE account_id = p_from_account_id) THEN
+        RAISE EXCEPTION 'Account with ID % not found.', p_from_account_id;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM accounts WHERE account_id = p_to_account_id) THEN
+        RAISE EXCEPTION 'Account with ID % not found.', p_to_account_id;
+    END IF;
+    UPDATE accounts SET balance = balance - p_amount WHERE account_id = p_from_account_id AND balance >= p_amount;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Insufficient funds in account %.', p_from_account_id;
+    END IF;
+    UPDATE accounts SET balance = balance + p_amount WHERE account_id = p_to_account_id;
+    INSERT INTO transactions (account_id, amount, type, description, transfer_id)
+    VALUES (p_from_account_id, p_amount, 'Transfer Out', p_description, p_transfer_id),
+           (p_to_account_id, p_amount, 'Transfer In', p_description, p_transfer_id);
+    RETURN QUERY SELECT * FROM transactions WHERE transfer_id = p_transfer_id ORDER BY transaction_id;
+END
+$$;
+"""),
+    Migration(8, "replica_sync", postgres="""
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END
+$$;
+""" + "".join(f"""
+ALTER TABLE {table}
+    ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now(),
+    ADD COLUMN IF NOT EXISTS deleted_at timestamptz;
+CREATE INDEX IF NOT EXISTS {table}_updated_at_idx ON {table} (updated_at, {pk});
+CREATE OR REPLACE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table}
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+""" for table, pk in _REPLICATED), sqlite="""
+CREATE TABLE IF NOT EXISTS replica_rows (
+    table_name TEXT NOT NULL,
+    pk INTEGER NOT NULL,
+    sort_key TEXT,
+    goal_id INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (table_name, pk)
+);
+DROP INDEX IF EXISTS replica_rows_goal;
+CREATE INDEX IF NOT EXISTS replica_rows_sorted ON replica_rows (table_name, sort_key, pk);
+CREATE INDEX IF NOT EXISTS replica_rows_by_goal ON replica_rows (table_name, goal_id, sort_key, pk);
+CREATE TABLE IF NOT EXISTS replica_watermarks (
+    table_name TEXT PRIMARY KEY,
+    updated_at TEXT,
+    synced_at TEXT NOT NULL
+);
+"""),
+    Migration(9, "goal_priorities", postgres="""
+-- 1 is the highest priority; auto-allocation fills goals tier by tier.
+ALTER TABLE goals ADD COLUMN IF NOT EXISTS priority smallint NOT NULL DEFAULT 3;
+CREATE OR REPLACE FUNCTION allocate_to_goals(p_account_id bigint, p_allocations jsonb, p_description text DEFAULT NULL)
+RETURNS SETOF transactions
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_total numeric;
+    v_ids bigint[];
+BEGIN
+    SELECT coalesce(sum((a->>'amount')::numeric), 0) INTO v_total FROM jsonb_array_elements(p_allocations) a;
+    IF v_total <= 0 THEN
+        RAISE EXCEPTION 'Allocation total must be positive.';
+    END IF;
+    PERFORM 1 FROM accounts WHERE account_id = p_account_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Account with ID % not found.', p_account_id;
+    END IF;
+    UPDATE accounts SET balance = balance - v_total WHERE account_id = p_account_id AND balance >= v_total;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Insufficient funds in account %.', p_account_id;
+    END IF;
+    WITH inserted AS (
+        INSERT INTO transactions (account_id, goal_id, amount, type, description)
+        SELECT p_account_id, (a->>'goal_id')::bigint, (a->>'amount')::numeric, 'Saving', p_description
+        FROM jsonb_array_elements(p_allocations) a
+        RETURNING transaction_id
+    )
+    SELECT array_agg(transaction_id) INTO v_ids FROM inserted;
+    RETURN QUERY SELECT * FROM transactions WHERE transaction_id = ANY(v_ids) ORDER BY transaction_id;
+END
+$$;
+"""),
+    Migration(10, "account_currencies", postgres="""
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS currency text NOT NULL DEFAULT 'INR' CHECK (currency ~ '^[A-Z]{3}$');
+-- Expense totals per category, account currency and day, for reports converted at daily rates.
+CREATE OR REPLACE FUNCTION spending_by_category_currency(start_date date, end_date date)
+RETURNS TABLE (category_name text, currency text, day date, total_spent numeric)
+LANGUAGE sql STABLE AS $$
+    SELECT coalesce(c.name, 'Uncategorized'), a.currency, t.transaction_date::date, sum(t.amount)
+    FROM transactions t
+    JOIN accounts a ON a.account_id = t.account_id
+    LEFT JOIN categories c ON c.category_id = t.category_id
+    WHERE t.type = 'Expense'
+      AND t.transaction_date >= start_date
+      AND t.transaction_date < end_date + 1
+    GROUP BY 1, 2, 3
+$$;
+-- Transfers move one amount, so both accounts must share a currency.
+CREATE OR REPLACE FUNCTION transfer_funds(
+    p_transfer_id uuid, p_from_account_id bigint, p_to_account_id bigint, p_amount numeric, p_description text DEFAULT NULL
+)
+RETURNS SETOF transactions
+LANGUAGE plpgsql AS $$
+BEGIN
+    -- A retried call returns the legs written by the first one.
+    IF EXISTS (SELECT 1 FROM transactions WHERE transfer_id = p_transfer_id) THEN
+        RETURN QUERY SELECT * FROM transactions WHERE transfer_id = p_transfer_id ORDER BY transaction_id;
+        RETURN;
+    END IF;
+    IF p_amount <= 0 THEN
+        RAISE EXCEPTION 'Transfer amount must be positive.';
+    END IF;
+    -- Lock both accounts in id order, so opposite transfers cannot deadlock.
+    PERFORM 1 FROM accounts WHERE account_id IN (p_from_account_id, p_to_account_id) ORDER BY account_id FOR UPDATE;
+    IF NOT EXISTS (SELECT 1 FROM accounts WHERE account_id = p_from_account_id) THEN
+        RAISE EXCEPTION 'Account with ID % not found.', p_from_account_id;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM accounts WHERE account_id = p_to_account_id) THEN
+        RAISE EXCEPTION 'Account with ID % not found.', p_to_account_id;
+    END IF;
+    IF (SELECT count(DISTINCT currency) FROM accounts WHERE account_id IN (p_from_account_id, p_to_account_id)) > 1 THEN
+        RAISE EXCEPTION 'Accounts % and % are in different currencies.', p_from_account_id, p_to_account_id;
+    END IF;
+    UPDATE accounts SET balance = balance - p_amount WHERE account_id = p_from_account_id AND balance >= p_amount;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Insufficient funds in account %.', p_from_account_id;
+    END IF;
+    UPDATE accounts SET balance = balance + p_amount WHERE account_id = p_to_account_id;
+    INSERT INTO transactions (account_id, amount, type, description, transfer_id)
+    VALUES (p_from_account_id, p_amount, 'Transfer Out', p_description, p_transfer_id),
+           (p_to_account_id, p_amount, 'Transfer In', p_description, p_transfer_id);
+    RETURN QUERY SELECT * FROM transactions WHERE transfer_id = p_transfer_id ORDER BY transaction_id;
+END
+$$;
+"""),
+    Migration(11, "transaction_fingerprints", postgres="""
+-- Hash of account, type, amount, day and normalized description, set by the client.
+-- Existing rows keep NULL (many NULLs are allowed); the duplicate scan covers them.
+ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fingerprint text;
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_fingerprint_key ON transactions (fingerprint);
+"""),
+    Migration(12, "transaction_archive", postgres="""
+-- Archived incomes and expenses live in local monthly partition files; the backend
+-- keeps their daily totals per account, category and type for reports and history.
+CREATE TABLE IF NOT EXISTS transaction_rollups (
+    rollup_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    day date NOT NULL,
+    account_id bigint NOT NULL REFERENCES accounts (account_id),
+    category_id bigint REFERENCES categories (category_id),
+    type text NOT NULL,
+    total numeric(14, 2) NOT NULL,
+    transaction_count integer NOT NULL
+);
+-- One rollup per day, account, category and type; uncategorized rows share category 0.
+-- An expression index rather than UNIQUE NULLS NOT DISTINCT, which needs PostgreSQL 15.
+CREATE UNIQUE INDEX IF NOT EXISTS transaction_rollups_key
+    ON transaction_rollups (day, account_id, coalesce(category_id, 0), type);
+CREATE INDEX IF NOT EXISTS transaction_rollups_day_idx ON transaction_rollups (day);
+CREATE TABLE IF NOT EXISTS archived_months (
+    month date PRIMARY KEY,
+    transaction_count integer NOT NULL,
+    archived_at timestamptz NOT NULL DEFAULT now()
+);
+-- Moves the given transactions of one month (already written to its partition file)
+-- into the rollups, in one transaction. Reconciliation checkpoints that have not
+-- folded a moved row yet take it in now, so later scans still add up. Fails, and
+-- changes nothing, unless every given transaction is still there and archivable.
+CREATE OR REPLACE FUNCTION archive_transactions(p_month date, p_transaction_ids bigint[])
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    CREATE TEMP TABLE moved (LIKE transactions) ON COMMIT DROP;
+    WITH deleted AS (
+        DELETE FROM transactions
+        WHERE transaction_id = ANY (p_transaction_ids)
+          AND transaction_date >= p_month AND transaction_date < p_month + interval '1 month'
+          AND type IN ('Income', 'Expense') AND goal_id IS NULL AND transfer_id IS NULL
+        RETURNING *
+    )
+    INSERT INTO moved SELECT * FROM deleted;
+    SELECT count(*) INTO v_count FROM moved;
+    IF v_count <> cardinality(p_transaction_ids) THEN
+        RAISE EXCEPTION 'Expected % archivable transactions in %, found %; nothing was archived.',
+            cardinality(p_transaction_ids), to_char(p_month, 'YYYY-MM'), v_count;
+    END IF;
+
+    INSERT INTO transaction_rollups (day, account_id, category_id, type, total, transaction_count)
+    SELECT transaction_date::date, account_id, category_id, type, sum(amount), count(*)
+    FROM moved GROUP BY 1, 2, 3, 4
+    ON CONFLICT (day, account_id, coalesce(category_id, 0), type) DO UPDATE
+        SET total = transaction_rollups.total + EXCLUDED.total,
+            transaction_count = transaction_rollups.transaction_count + EXCLUDED.transaction_count;
+
+    UPDATE reconciliation_checkpoints c
+    SET ledger_balance = c.ledger_balance + s.signed
+    FROM (
+        SELECT m.account_id, sum(CASE WHEN m.type = 'Income' THEN m.amount ELSE -m.amount END) AS signed
+        FROM moved m JOIN reconciliation_checkpoints rc ON rc.account_id = m.account_id
+        WHERE m.transaction_id > rc.last_transaction_id
+        GROUP BY m.account_id
+    ) s
+    WHERE c.account_id = s.account_id;
+    -- Accounts never reconciled start from their opening balance plus what was archived.
+    INSERT INTO reconciliation_checkpoints (account_id, last_transaction_id, ledger_balance)
+    SELECT a.account_id, 0, a.opening_balance + s.signed
+    FROM (
+        SELECT account_id, sum(CASE WHEN type = 'Income' THEN amount ELSE -amount END) AS signed
+        FROM moved GROUP BY account_id
+    ) s
+    JOIN accounts a ON a.account_id = s.account_id
+    ON CONFLICT (account_id) DO NOTHING;
+
+    INSERT INTO archived_months (month, transaction_count) VALUES (p_month, v_count)
+    ON CONFLICT (month) DO UPDATE
+        SET transaction_count = archived_months.transaction_count + EXCLUDED.transaction_count, archived_at = now();
+    RETURN v_count;
+END
+$$;
+"""),
+    Migration(13, "hot_path_indexes", postgres="""
+-- DAO queries the plan check now covers. Without these indexes they are primary-key
+-- passes whose filter discards most of the rows read.
+-- iter_expenses_after: one type, in id order.
+CREATE INDEX IF NOT EXISTS transactions_type_id_idx ON transactions (type, transaction_id);
+-- get_oldest_archivable_date and iter_archivable_pages: only the rows that can be archived.
+CREATE INDEX IF NOT EXISTS transactions_archivable_idx ON transactions (transaction_date)
+    WHERE type IN ('Income', 'Expense') AND goal_id IS NULL AND transfer_id IS NULL;
+"""),
+    Migration(14, "latest_goal_savings", postgres="""
+-- The newest allocation of each goal, the cache key of its forecast.
+CREATE INDEX IF NOT EXISTS transactions_goal_savings_idx ON transactions (goal_id, transaction_id) WHERE type = 'Saving';
+CREATE OR REPLACE FUNCTION latest_saving_ids(p_goal_ids bigint[])
+RETURNS TABLE (goal_id bigint, transaction_id bigint)
+LANGUAGE sql STABLE AS $$
+    SELECT t.goal_id, max(t.transaction_id)
+    FROM transactions t
+    WHERE t.goal_id = ANY(p_goal_ids) AND t.type = 'Saving'
+    GROUP BY t.goal_id
+$$;
+"""),
+]
+
+_VERSIONS_TABLE = {
+    "postgres": """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version integer PRIMARY KEY, name text NOT NULL, applied_at timestamptz NOT NULL DEFAULT now()
+);""",
+    "sqlite": """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);""",
+}
+
+# Hot queries that no DAO read method sends itself: lookups inside the backend
+# functions and unique indexes, get_or_create_category, and the replica's delta sync.
+# The DAOs' own queries are taken from the DAOs by dao_hot_queries().
+POSTGRES_HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "transfer legs": (
+        "SELECT * FROM transactions WHERE transfer_id = %s", ("00000000-0000-0000-0000-000000000000",)),
+    "transaction by fingerprint": (
+        "SELECT transaction_id FROM transactions WHERE fingerprint = %s", ("0" * 32,)),
+    "latest saving per goal": (
+        "SELECT goal_id, max(transaction_id) FROM transactions WHERE goal_id = ANY(%s) AND type = 'Saving' "
+        "GROUP BY goal_id", ([1, 2],)),
+    "category by name": (
+        "SELECT * FROM categories WHERE name = %s LIMIT 1", ("Food",)),
+    "category monthly total": (
+        "SELECT * FROM category_monthly_totals WHERE category_id = %s AND month = %s", (1, "2024-01-01")),
+    **{f"{table} changed since watermark": (
+        f"SELECT * FROM {table} WHERE updated_at > %s OR (updated_at = %s AND {pk} > %s) "
+        f"ORDER BY updated_at, {pk} LIMIT 1000", ("2024-01-01", "2024-01-01", 0))
+       for table, pk in _REPLICATED},
+}
+
+# Representative arguments of the DAO read methods, by parameter name.
+_SAMPLE_ARGS = {
+    "account_id": 1,
+    "goal_id": 1,
+    "debt_id": 1,
+    "goal_ids": [1, 2],
+    "start_date": "2024-01-01",
+    "end_date": "2024-02-01",
+    "before": "2024-01-01",
+    "month": date(2024, 1, 1),
+    "type": "Expense",
+    "types": ["Income", "Expense"],
+    "after_transaction_id": 0,
+    "page_size": 1000,
+}
+
+
+class _NotAQuery(Exception):
+    """Raised by the recording client for calls that are not plain table reads (RPCs)."""
+    pass
+
+
+class _RecordedQuery:
+    """Stands in for a PostgREST request builder and renders the request as SQL on execute()."""
+    def __init__(self, table: str, sink: List[Tuple[str, tuple]]):
+        self.table = table
+        self.sink = sink
+        self.columns = "*"
+        self.conditions: List[str] = []
+        self.params: List = []
+        self.ordering: List[str] = []
+        self.row_limit: Optional[int] = None
+        self._negate = False
+
+    def select(self, columns: str = "*") -> "_RecordedQuery":
+        # Embedded resources ("categories(name)") are separate primary-key lookups.
+        depth, item, items = 0, "", []
+        for char in columns + ",":
+            depth += (char == "(") - (char == ")")
+            if char == "," and depth == 0:
+                items.append(item.strip())
+                item = ""
+            else:
+                item += char
+        self.columns = ", ".join(i for i in items if i and "(" not in i) or "*"
+        return self
+
+    @property
+    def not_(self) -> "_RecordedQuery":
+        self._negate = True
+        return self
+
+    def _where(self, column: str, condition: str, *params) -> "_RecordedQuery":
+        negate, self._negate = self._negate, False
+        if "." in column:  # a filter on an embedded resource
+            return self
+        self.conditions.append(f"NOT ({condition})" if negate else condition)
+        self.params.extend(params)
+        return self
+
+    def eq(self, column, value): return self._where(column, f"{column} = %s", value)
+    def gt(self, column, value): return self._where(column, f"{column} > %s", value)
+    def gte(self, column, value): return self._where(column, f"{column} >= %s", value)
+    def lt(self, column, value): return self._where(column, f"{column} < %s", value)
+    def lte(self, column, value): return self._where(column, f"{column} <= %s", value)
+    def in_(self, column, values): return self._where(column, f"{column} = ANY(%s)", list(values))
+    def is_(self, column, value): return self._where(column, f"{column} IS {str(value).upper()}")
+
+    def order(self, column: str, desc: bool = False) -> "_RecordedQuery":
+        self.ordering.append(f"{column} DESC" if desc else column)
+        return self
+
+    def limit(self, count: int) -> "_RecordedQuery":
+        self.row_limit = count
+        return self
+
+    def csv(self) -> "_RecordedQuery":
+        return self
+
+    def execute(self):
+        sql = f"SELECT {self.columns} FROM {self.table}"
+        if self.conditions:
+            sql += " WHERE " + " AND ".join(self.conditions)
+        if self.ordering:
+            sql += " ORDER BY " + ", ".join(self.ordering)
+        if self.row_limit is not None:
+            sql += f" LIMIT {self.row_limit}"
+        self.sink.append((sql, tuple(self.params)))
+        return SimpleNamespace(data=[])
+
+
+class _RecordingClient:
+    """A Supabase client whose table reads are recorded instead of sent."""
+    def __init__(self):
+        self.queries: List[Tuple[str, tuple]] = []
+
+    def table(self, name: str) -> _RecordedQuery:
+        return _RecordedQuery(name, self.queries)
+
+    def rpc(self, *args, **kwargs):
+        raise _NotAQuery()
+
+
+def dao_hot_queries() -> Dict[str, Tuple[str, tuple]]:
+    """
+    The filtered queries the DAOs send, as SQL with representative parameters, recorded
+    by calling every read method (@idempotent or paged) with _SAMPLE_ARGS. Queries
+    without a WHERE clause are full listings, expected to scan, and are left out.
+    """
+    from src.dao.account_dao import AccountDAO
+    from src.dao.archive_dao import ArchiveDAO
+    from src.dao.budget_dao import BudgetDAO
+    from src.dao.category_dao import CategoryDAO
+    from src.dao.debt_dao import DebtDAO
+    from src.dao.goal_dao import GoalDAO
+    from src.dao.reconciliation_dao import ReconciliationDAO
+    from src.dao.recurring_transaction_dao import RecurringTransactionDAO
+    from src.dao.step_dao import StepDAO
+    from src.dao.transaction_dao import TransactionDAO
+
+    queries = {}
+    for dao_cls in (AccountDAO, ArchiveDAO, BudgetDAO, CategoryDAO, DebtDAO, GoalDAO, ReconciliationDAO,
+                    RecurringTransactionDAO, StepDAO, TransactionDAO):
+        for name, method in inspect.getmembers(dao_cls, inspect.isfunction):
+            if name.startswith("_") or not (getattr(method, "idempotent", False) or inspect.isgeneratorfunction(method)):
+                continue
+            if ".rpc(" in inspect.getsource(method):
+                continue  # backend functions; their inner lookups are in POSTGRES_HOT_QUERIES
+            params = list(inspect.signature(method).parameters.values())[1:]
+            missing = [p.name for p in params if p.name not in _SAMPLE_ARGS and p.default is inspect.Parameter.empty]
+            if missing:
+                raise MigrationError(f"No sample value for {dao_cls.__name__}.{name}({', '.join(missing)}); add it to _SAMPLE_ARGS.")
+            client = _RecordingClient()
+            try:
+                result = method(dao_cls(client), **{p.name: _SAMPLE_ARGS[p.name] for p in params if p.name in _SAMPLE_ARGS})
+                if inspect.isgenerator(result):
+                    list(result)
+            except _NotAQuery:
+                continue
+            for i, (sql, values) in enumerate(client.queries):
+                if " WHERE " in sql:
+                    queries[f"{dao_cls.__name__}.{name}" + (f" #{i + 1}" if i else "")] = (sql, values)
+    return queries
+
+
+def hot_postgres_queries() -> Dict[str, Tuple[str, tuple]]:
+    """Every backend query that must be served by an index."""
+    return {**dao_hot_queries(), **POSTGRES_HOT_QUERIES}
+
+# The queries LocalReplica runs on every list read.
+SQLITE_HOT_QUERIES: Dict[str, Tuple[str, tuple]] = {
+    "replica rows": (
+        "SELECT data FROM replica_rows WHERE table_name = ? ORDER BY sort_key, pk", ("goals",)),
+    "replica rows by goal": (
+        "SELECT data FROM replica_rows WHERE table_name = ? AND goal_id = ? ORDER BY sort_key, pk", ("steps", 1)),
+    "replica watermark": (
+        "SELECT updated_at FROM replica_watermarks WHERE table_name = ?", ("goals",)),
+}
+
+
+def pending(applied: Set[int], backend: str) -> List[Migration]:
+    """Migrations not yet applied, oldest first. SQLite only needs the versions that change it."""
+    return [m for m in MIGRATIONS if m.version not in applied and (backend == "postgres" or m.sqlite)]
+
+
+def render_postgres(applied: Optional[Set[int]] = None) -> str:
+    """
+    The pending migrations as one script, for pasting into the Supabase SQL editor.
+    Each version runs in its own transaction and records itself in schema_migrations.
+    """
+    parts = [_VERSIONS_TABLE["postgres"]]
+    for m in pending(applied or set(), "postgres"):
+        parts.append(f"-- {m.version:03d} {m.name}\nBEGIN;\n{m.postgres.strip()}\n"
+                     f"INSERT INTO schema_migrations (version, name) VALUES ({m.version}, '{m.name}') "
+                     f"ON CONFLICT DO NOTHING;\nCOMMIT;")
+    return "\n\n".join(parts) + "\n"
+
+
+def _connect_postgres(dsn: str):
+    try:
+        import psycopg
+    except ImportError:
+        raise MigrationError("Applying migrations needs psycopg; use 'sql' to print the script instead.")
+    # Autocommit, so each conn.transaction() below is a real transaction per migration.
+    return psycopg.connect(dsn, autocommit=True)
+
+
+def apply_postgres(dsn: str) -> List[int]:
+    """Applies the pending migrations to the backend database. Returns the versions applied."""
+    with _connect_postgres(dsn) as conn:
+        conn.execute(_VERSIONS_TABLE["postgres"])
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+        done = []
+        for m in pending(applied, "postgres"):
+            try:
+                with conn.transaction():
+                    conn.execute(m.postgres)
+                    conn.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (m.version, m.name))
+            except Exception as e:
+                raise MigrationError(f"Migration {m.version} ({m.name}) failed: {e}") from e
+            done.append(m.version)
+        return done
+
+
+def apply_sqlite(conn: sqlite3.Connection) -> List[int]:
+    """Applies the pending migrations to a local SQLite database. Returns the versions applied."""
+    conn.execute(_VERSIONS_TABLE["sqlite"])
+    applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+    done = []
+    for m in pending(applied, "sqlite"):
+        try:
+            # executescript commits first, so the script and its version row are wrapped together.
+            conn.executescript(f"BEGIN;\n{m.sqlite}\n"
+                               f"INSERT INTO schema_migrations (version, name) VALUES ({m.version}, '{m.name}');\nCOMMIT;")
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise MigrationError(f"Migration {m.version} ({m.name}) failed: {e}") from e
+        done.append(m.version)
+    return done
+
+
+def _plan_nodes(plan: Dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+# A scan whose filter discards more rows than this (and more than it keeps) is not
+# served by a fitting index, even if it is an index scan.
+MAX_ROWS_REMOVED_BY_FILTER = 1000
+
+
+def _plan_problems(plan: Dict) -> List[str]:
+    """Scans in an EXPLAIN ANALYZE plan that read rows no index condition selected."""
+    problems = []
+    for node in _plan_nodes(plan):
+        kind = node["Node Type"]
+        target = node.get("Index Name") or node.get("Relation Name")
+        if kind == "Seq Scan":
+            problems.append(f"Seq Scan on {target}")
+        elif "Index" in kind and "Index Cond" not in node and "Filter" in node:
+            # With sequential scans off, a missing index shows up as a whole-index pass.
+            problems.append(f"{kind} of all of {target}, filtered by {node['Filter']}")
+        removed = node.get("Rows Removed by Filter", 0)
+        if removed > MAX_ROWS_REMOVED_BY_FILTER and removed > node.get("Actual Rows", 0) * node.get("Actual Loops", 1):
+            problems.append(f"{kind} on {target} removed {removed} rows by filter {node.get('Filter')}")
+    return problems
+
+
+def check_postgres_plans(dsn: str) -> Dict[str, List[str]]:
+    """
+    EXPLAIN ANALYZEs every hot query with sequential scans disabled. A Seq Scan left in
+    a plan, an index scan with no index condition, or a filter that discards many rows
+    means no fitting index serves it. Returns the problems per query and raises
+    MigrationError if there are any.
+    """
+    problems = {}
+    with _connect_postgres(dsn) as conn:
+        for name, (sql, params) in hot_postgres_queries().items():
+            with conn.transaction():
+                conn.execute("SET LOCAL enable_seqscan = off")
+                plan = conn.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params).fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            found = _plan_problems(plan[0]["Plan"])
+            if found:
+                problems[name] = found
+    if problems:
+        raise MigrationError(f"Unindexed scans on hot paths: {problems}")
+    return problems
+
+
+def check_sqlite_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """EXPLAIN QUERY PLAN for the replica's queries; a SCAN step means a full pass over a table or index."""
+    scans = {}
+    for name, (sql, params) in SQLITE_HOT_QUERIES.items():
+        steps = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        full = [step for step in steps if step.startswith("SCAN")]
+        if full:
+            scans[name] = full
+    if scans:
+        raise MigrationError(f"Full scans on hot paths: {scans}")
+    return scans
+
+
+def main(argv: List[str]) -> int:
+    """
+    python -m src.dao.migrations sql       print the backend migrations for the SQL editor
+    python -m src.dao.migrations upgrade   apply them to DATABASE_URL and to the local replica
+    python -m src.dao.migrations check     fail if a hot query is not served by an index
+    """
+    from src.config import DATABASE_URL, REPLICA_DIR, SUPABASE_URL
+    from src.dao.local_replica import replica_path
+
+    parser = argparse.ArgumentParser(prog="python -m src.dao.migrations", description="Schema migrations.")
+    parser.add_argument("action", choices=["sql", "upgrade", "check"])
+    parser.add_argument("--database-url", default=DATABASE_URL, help="PostgreSQL connection string of the backend.")
+    parser.add_argument("--sqlite", default=None, help="Local SQLite database (default: the CLI replica).")
+    args = parser.parse_args(argv)
+
+    if args.action == "sql":
+        print(render_postgres(), end="")
+        return 0
+
+    sqlite_path = args.sqlite or (replica_path(REPLICA_DIR, SUPABASE_URL) if REPLICA_DIR.lower() != "off" else None)
+    try:
+        if args.database_url:
+            if args.action == "upgrade":
+                print(f"Backend: applied {apply_postgres(args.database_url) or 'nothing'}")
+            else:
+                check_postgres_plans(args.database_url)
+                print(f"Backend: {len(hot_postgres_queries())} hot queries use indexes.")
+        else:
+            print("Backend: skipped (no DATABASE_URL).")
+        if sqlite_path:
+            conn = sqlite3.connect(sqlite_path)
+            try:
+                applied = apply_sqlite(conn)
+                if args.action == "upgrade":
+                    print(f"Local replica: applied {applied or 'nothing'}")
+                else:
+                    check_sqlite_plans(conn)
+                    print(f"Local replica: {len(SQLITE_HOT_QUERIES)} hot queries use indexes.")
+            finally:
+                conn.close()
+    except MigrationError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
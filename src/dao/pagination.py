@@ -0,0 +1,26 @@
+# src/dao/pagination.py
+from typing import Any, Callable, Dict, Iterator, List
+
+
+def iter_keyset_pages(
+    query: Callable[[], Any],
+    decode: Callable[[Dict], Any],
+    key: str,
+    after: Any = 0,
+    page_size: int = 1000
+) -> Iterator[List]:
+    """
+    Yields the decoded rows of a query one page at a time, using keyset pagination
+    on `key`: each page is the next rows with key > the last one seen, so every page
+    is an indexed range scan. query() returns a new, filtered request builder.
+    Stops only on an empty page: PostgREST caps pages at its max-rows setting, so a
+    page shorter than page_size does not mean the rows have run out.
+    """
+    last = after
+    while True:
+        resp = query().gt(key, last).order(key).limit(page_size).execute()
+        page = [decode(row) for row in resp.data or []]
+        if not page:
+            return
+        yield page
+        last = getattr(page[-1], key)
@@ -0,0 +1,39 @@
+# src/dao/reconciliation_dao.py
+from typing import Dict, Optional
+from datetime import datetime, timezone
+from supabase import Client
+from src.dao.scheduler import idempotent
+from src.models.money import Money
+from src.models.records import ReconciliationCheckpoint
+
+class ReconciliationDAO:
+    """
+    Data Access Object for handling 'reconciliation_checkpoints' table operations.
+    """
+    def __init__(self, db_client: Client):
+        self.db = db_client
+        self.table = "reconciliation_checkpoints"
+
+    @idempotent
+    def list_checkpoints(self) -> Dict[int, ReconciliationCheckpoint]:
+        """Returns the latest checkpoint of every account, keyed by account ID."""
+        resp = self.db.table(self.table).select("*").execute()
+        checkpoints = [ReconciliationCheckpoint.from_row(row) for row in resp.data or []]
+        return {c.account_id: c for c in checkpoints}
+
+    @idempotent
+    def get_checkpoint(self, account_id: int) -> Optional[ReconciliationCheckpoint]:
+        """Retrieves the checkpoint of a single account."""
+        resp = self.db.table(self.table).select("*").eq("account_id", account_id).limit(1).execute()
+        return ReconciliationCheckpoint.from_row(resp.data[0]) if resp.data else None
+
+    def save_checkpoint(self, account_id: int, last_transaction_id: int, ledger_balance: Money) -> Optional[ReconciliationCheckpoint]:
+        """Creates or replaces the checkpoint of an account."""
+        payload = {
+            "account_id": account_id,
+            "last_transaction_id": last_transaction_id,
+            "ledger_balance": ledger_balance.to_db(),
+            "checkpointed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        resp = self.db.table(self.table).upsert(payload, on_conflict="account_id").execute()
+        return ReconciliationCheckpoint.from_row(resp.data[0]) if resp.data else None
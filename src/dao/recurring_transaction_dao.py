@@ -1,7 +1,9 @@
 # src/dao/recurring_transaction_dao.py
-from typing import List, Dict, Optional
+from typing import List, Optional
 from supabase import Client
+from src.dao.scheduler import idempotent
 import datetime
+from src.models.records import RecurringTransaction, to_row
 
 class RecurringTransactionDAO:
     """
@@ -11,19 +13,56 @@ class RecurringTransactionDAO:
         self.db = db_client
         self.table = "recurring_transactions"
 
-    def create_recurring_transaction(self, **kwargs) -> Optional[Dict]:
+    def create_recurring_transaction(self, **kwargs) -> Optional[RecurringTransaction]:
         """Creates a new recurring transaction."""
-        resp = self.db.table(self.table).insert(kwargs).execute()
-        return resp.data[0] if resp.data else None
+        resp = self.db.table(self.table).insert(to_row(kwargs)).execute()
+        return RecurringTransaction.from_row(resp.data[0]) if resp.data else None
 
-    def get_due_transactions(self) -> List[Dict]:
+    @idempotent
+    def list_recurring_transactions(self) -> List[RecurringTransaction]:
+        """Lists all recurring transactions."""
+        resp = self.db.table(self.table).select("*").order("next_due_date").execute()
+        return [RecurringTransaction.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def list_active_recurring_transactions(self) -> List[RecurringTransaction]:
+        """Lists the recurring transactions that still have a next due date."""
+        resp = self.db.table(self.table).select("*").not_.is_("next_due_date", "null").execute()
+        return [RecurringTransaction.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def get_due_transactions(self) -> List[RecurringTransaction]:
         """Fetches all recurring transactions that are due to be processed."""
         today = datetime.date.today().isoformat()
         resp = self.db.table(self.table).select("*").lte("next_due_date", today).execute()
-        return resp.data or []
+        return [RecurringTransaction.from_row(row) for row in resp.data or []]
 
-    def update_next_due_date(self, recurring_id: int, new_due_date: datetime.date) -> Optional[Dict]:
+    def update_next_due_date(self, recurring_id: int, new_due_date: datetime.date) -> Optional[RecurringTransaction]:
         """Updates the next_due_date for a recurring transaction."""
         updates = {"next_due_date": new_due_date.isoformat()}
         resp = self.db.table(self.table).update(updates).eq("recurring_transaction_id", recurring_id).execute()
-        return resp.data[0] if resp.data else None
\ No newline at end of file
+        return RecurringTransaction.from_row(resp.data[0]) if resp.data else None
+
+    def advance_schedule(
+        self,
+        recurring_id: int,
+        expected_due_date: Optional[datetime.date],
+        new_due_date: Optional[datetime.date],
+        occurrence_count: int,
+    ) -> Optional[RecurringTransaction]:
+        """
+        Moves a rule to its next occurrence only if its next_due_date is still
+        expected_due_date, so two processes never claim the same occurrence.
+        Returns None when another process got there first.
+        """
+        updates = {
+            "next_due_date": new_due_date.isoformat() if new_due_date else None,
+            "occurrence_count": occurrence_count,
+        }
+        query = self.db.table(self.table).update(updates).eq("recurring_transaction_id", recurring_id)
+        if expected_due_date is None:
+            query = query.is_("next_due_date", "null")
+        else:
+            query = query.eq("next_due_date", expected_due_date.isoformat())
+        resp = query.execute()
+        return RecurringTransaction.from_row(resp.data[0]) if resp.data else None
@@ -0,0 +1,240 @@
+# src/dao/scheduler.py
+import contextlib
+import contextvars
+import inspect
+import logging
+import random
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Priority classes for backend calls; lower values are served first."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("backend_priority", default=Priority.INTERACTIVE)
+
+
+@contextlib.contextmanager
+def priority(level: Priority):
+    """Runs the enclosed backend calls at the given priority (interactive by default)."""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# HTTP statuses worth retrying: rate limiting and gateway errors. A plain 500 may
+# have been applied already, so it is never retried.
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+# Statuses that mean the request was turned away before it ran. A gateway error can
+# arrive after a write has committed, so only these are retried for other writes.
+UNSENT_STATUSES = {429}
+
+
+def idempotent(fn: Callable) -> Callable:
+    """
+    Marks a DAO method as safe to repeat: a read, or a write keyed by an idempotency
+    id. Only these are retried after a gateway error.
+    """
+    fn.idempotent = True
+    return fn
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Best-effort HTTP status of a failed backend call."""
+    for candidate in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        try:
+            return int(candidate)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _is_retryable(error: Exception, repeatable: bool) -> bool:
+    if _status_code(error) in (RETRYABLE_STATUSES if repeatable else UNSENT_STATUSES):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    # Only errors where the request never reached the server.
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`."""
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes one token, sleeping until one is available. Returns the time slept."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class RequestScheduler:
+    """
+    Sits between services and DAOs and admits backend calls by priority.
+    At most max_concurrency calls run at once, and interactive_reserve of those
+    slots are kept for interactive calls, so a large background job never
+    starves the UI. Every call also takes a token from a shared token bucket,
+    and calls rejected with 429 or that failed to connect are retried with
+    jittered exponential backoff. Calls marked @idempotent are also retried
+    after 502/503/504.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        rate_per_second: float = 20.0,
+        burst: int = 40,
+        interactive_reserve: int = 2,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = {level: 0 for level in Priority}
+        self._stats = {
+            level: {"calls": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "retries": 0, "failures": 0}
+            for level in Priority
+        }
+
+    def _can_run(self, level: Priority) -> bool:
+        if any(self._waiting[higher] for higher in Priority if higher < level):
+            return False
+        limit = self.max_concurrency if level == Priority.INTERACTIVE else self.max_concurrency - self.interactive_reserve
+        return self._active < limit
+
+    def _acquire_slot(self, level: Priority) -> float:
+        started = time.monotonic()
+        with self._cond:
+            self._waiting[level] += 1
+            try:
+                while not self._can_run(level):
+                    self._cond.wait()
+            finally:
+                self._waiting[level] -= 1
+            self._active += 1
+            # Lower-priority waiters may have been held back by this one.
+            self._cond.notify_all()
+        return time.monotonic() - started
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Runs one backend call at the caller's current priority."""
+        return self._call(fn, args, kwargs, retry=True, repeatable=getattr(fn, "idempotent", False))
+
+    def run_read(self, fn: Callable, *args, **kwargs) -> Any:
+        """Runs one backend read, such as a query's execute, at the caller's current priority."""
+        return self._call(fn, args, kwargs, retry=True, repeatable=True)
+
+    def _call(self, fn: Callable, args, kwargs, retry: bool, repeatable: bool = False) -> Any:
+        level = _current_priority.get()
+        stats = self._stats[level]
+        waited = 0.0
+        attempt = 0
+        try:
+            while True:
+                # A slot is only held while the call runs; token waits and backoff
+                # happen outside it, so retrying calls cannot crowd out others.
+                waited += self.bucket.acquire()
+                waited += self._acquire_slot(level)
+                try:
+                    return fn(*args, **kwargs)
+                except Exception as e:
+                    if not retry or attempt >= self.max_retries or not _is_retryable(e, repeatable):
+                        with self._cond:
+                            stats["failures"] += 1
+                        raise
+                    delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    logger.warning("Backend call failed (%s); retrying in %.2fs", e, delay)
+                    with self._cond:
+                        stats["retries"] += 1
+                    attempt += 1
+                finally:
+                    self._release_slot()
+                time.sleep(delay)
+        finally:
+            with self._cond:
+                stats["calls"] += 1
+                stats["wait_seconds"] += waited
+                stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+    def stats(self) -> Dict:
+        """Current queue depth and cumulative wait statistics per priority class."""
+        with self._cond:
+            result = {"active": self._active, "max_concurrency": self.max_concurrency}
+            for level in Priority:
+                s = dict(self._stats[level])
+                s["queued"] = self._waiting[level]
+                s["avg_wait_seconds"] = round(s["wait_seconds"] / s["calls"], 4) if s["calls"] else 0.0
+                result[level.name.lower()] = s
+        return result
+
+
+class ScheduledDAO:
+    """
+    Wraps a DAO so every public method call goes through a RequestScheduler.
+    Generator methods are scheduled per item, so each page of a paged scan
+    waits its turn instead of holding a slot for the whole scan.
+    """
+    def __init__(self, dao, scheduler: RequestScheduler):
+        self._dao = dao
+        self._scheduler = scheduler
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._dao, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if inspect.isgeneratorfunction(attr):
+            def paged(*args, **kwargs):
+                iterator = attr(*args, **kwargs)
+                done = object()
+                while True:
+                    # A failed generator cannot be resumed, so pages are not retried.
+                    item = self._scheduler._call(next, (iterator, done), {}, retry=False)
+                    if item is done:
+                        return
+                    yield item
+            return paged
+
+        def scheduled(*args, **kwargs):
+            return self._scheduler.run(attr, *args, **kwargs)
+        return scheduled
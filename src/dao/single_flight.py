@@ -0,0 +1,111 @@
+# src/dao/single_flight.py
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+
+class _Call:
+    """An in-flight backend request that other callers can wait on."""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads into one backend request.
+    Callers that arrive while a request is in flight wait for it and share its
+    result, and the result is served for result_ttl seconds afterwards.
+    Invalidating a table bumps its generation, so reads issued after a write
+    never join or reuse a result fetched before it.
+    """
+    def __init__(self, result_ttl: float = 2.0):
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self._generations: Dict[str, int] = {}
+        self.stats = {"backend_calls": 0, "shared": 0, "window_hits": 0}
+
+    def do(self, table: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs fn once for all concurrent callers of the same (table, key)."""
+        with self._lock:
+            full_key = (table, self._generations.get(table, 0), key)
+            cached = self._results.get(full_key)
+            if cached and cached[0] > time.monotonic():
+                self.stats["window_hits"] += 1
+                return cached[1]
+            call = self._inflight.get(full_key)
+            leader = call is None
+            if leader:
+                call = self._inflight[full_key] = _Call()
+                self.stats["backend_calls"] += 1
+            else:
+                self.stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[full_key]
+                # A write during the request makes its result stale; don't keep it.
+                if call.error is None and self._generations.get(table, 0) == full_key[1]:
+                    self._results[full_key] = (time.monotonic() + self.result_ttl, call.value)
+            call.done.set()
+        return call.value
+
+    def invalidate(self, table: str) -> None:
+        """Drops shared results of a table after a write."""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [k for k in self._results if k[0] == table]:
+                del self._results[key]
+
+
+class CoalescingDAO:
+    """
+    Wraps a DAO so the named read methods go through a SingleFlight and the named
+    write methods invalidate the DAO's table (plus any extra tables they change).
+    Everything else is passed straight through.
+    Shared results are returned as new lists of the same records, which callers
+    must treat as read-only.
+    """
+    def __init__(self, dao, flight: SingleFlight, reads: Iterable[str], writes: Iterable[str], invalidates: Iterable[str] = ()):
+        self._dao = dao
+        self._flight = flight
+        self._reads = frozenset(reads)
+        self._writes = frozenset(writes)
+        self._invalidates = (dao.table, *invalidates)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._dao, name)
+
+        if name in self._reads:
+            def read(*args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                result = self._flight.do(self._dao.table, key, lambda: attr(*args, **kwargs))
+                return list(result) if isinstance(result, list) else result
+            return read
+
+        if name in self._writes:
+            def write(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    for table in self._invalidates:
+                        self._flight.invalidate(table)
+            return write
+
+        return attr
@@ -1,6 +1,9 @@
 # src/dao/step_dao.py
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable
 from supabase import Client
+from src.dao.scheduler import idempotent
+from src.dao.column_updates import update_columns
+from src.models.records import Step
 
 class StepDAO:
     """
@@ -10,18 +13,26 @@ class StepDAO:
         self.db = db_client
         self.table = "steps"
 
-    def create_step(self, goal_id: int, description: str) -> Optional[Dict]:
+    def create_step(self, goal_id: int, description: str) -> Optional[Step]:
         """Creates a new step for a given goal."""
         payload = {"goal_id": goal_id, "description": description}
         resp = self.db.table(self.table).insert(payload).execute()
-        return resp.data[0] if resp.data else None
+        return Step.from_row(resp.data[0]) if resp.data else None
 
-    def get_steps_by_goal_id(self, goal_id: int) -> List[Dict]:
+    @idempotent
+    def get_steps_by_goal_id(self, goal_id: int) -> List[Step]:
         """Retrieves all steps associated with a single goal."""
         resp = self.db.table(self.table).select("*").eq("goal_id", goal_id).order("created_at").execute()
-        return resp.data or []
+        return [Step.from_row(row) for row in resp.data or []]
 
-    def update_step(self, step_id: int, updates: Dict) -> Optional[Dict]:
+    def update_step(self, step_id: int, updates: Dict) -> Optional[Step]:
         """Updates a step's details (e.g., description, status)."""
         resp = self.db.table(self.table).update(updates).eq("step_id", step_id).execute()
-        return resp.data[0] if resp.data else None
\ No newline at end of file
+        return Step.from_row(resp.data[0]) if resp.data else None
+
+    def save_steps(self, steps: List[Step], columns: Iterable[str]) -> List[Step]:
+        """Writes the given columns of many changed steps, one request per distinct set of new values."""
+        if not steps:
+            return []
+        rows = update_columns(self.db, self.table, "step_id", steps, columns)
+        return [Step.from_row(row) for row in rows]
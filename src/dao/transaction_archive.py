@@ -0,0 +1,151 @@
+# src/dao/transaction_archive.py
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from src.models.money import Money
+from src.models.records import Transaction
+
+# Columns of a partition file. Amounts are exact integer paise.
+SCHEMA = pa.schema([
+    ("transaction_id", pa.int64()),
+    ("transaction_date", pa.string()),
+    ("type", pa.string()),
+    ("amount", pa.int64()),
+    ("account_id", pa.int64()),
+    ("account_name", pa.string()),
+    ("category_id", pa.int64()),
+    ("category_name", pa.string()),
+    ("description", pa.string()),
+    ("fingerprint", pa.string()),
+])
+
+
+class ArchiveFileError(ValueError):
+    """Raised for a partition file that could not be written or read back."""
+    pass
+
+
+def month_start(value) -> date:
+    """First day of the month of a date or ISO date/timestamp string."""
+    day = date.fromisoformat(value[:10]) if isinstance(value, str) else value
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def to_table(transactions: Sequence[Transaction]) -> pa.Table:
+    return pa.table({
+        "transaction_id": [t.transaction_id for t in transactions],
+        "transaction_date": [t.transaction_date for t in transactions],
+        "type": [t.type for t in transactions],
+        "amount": [t.amount.paise for t in transactions],
+        "account_id": [t.account_id for t in transactions],
+        "account_name": [t.account_name for t in transactions],
+        "category_id": [t.category_id for t in transactions],
+        "category_name": [t.category_name for t in transactions],
+        "description": [t.description for t in transactions],
+        "fingerprint": [t.fingerprint for t in transactions],
+    }, schema=SCHEMA)
+
+
+def to_transactions(table: pa.Table) -> List[Transaction]:
+    return [Transaction(
+        transaction_id=row["transaction_id"], account_id=row["account_id"], amount=Money(row["amount"]),
+        type=row["type"], transaction_date=row["transaction_date"], category_id=row["category_id"],
+        description=row["description"], account_name=row["account_name"], category_name=row["category_name"],
+        fingerprint=row["fingerprint"],
+    ) for row in table.to_pylist()]
+
+
+class TransactionArchive:
+    """
+    Archived transactions on local disk, one zstd-compressed Arrow IPC (Feather v2)
+    file per month. Files are memory-mapped when read and only the requested columns
+    are decoded. A partition is first written to a temporary file and only published,
+    by an atomic rename, once the backend has moved its rows, so a published file
+    never holds rows that are still in the transactions table.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, month: date) -> str:
+        return os.path.join(self.directory, f"transactions-{month:%Y-%m}.arrow")
+
+    def has(self, month: date) -> bool:
+        return os.path.exists(self.path(month))
+
+    def read(self, month: date, columns: Optional[List[str]] = None) -> pa.Table:
+        try:
+            return feather.read_table(self.path(month), columns=columns, memory_map=True)
+        except (OSError, pa.ArrowException) as e:
+            raise ArchiveFileError(f"Cannot read {self.path(month)}: {e}") from e
+
+    def stage(self, month: date, transactions: Sequence[Transaction]) -> str:
+        """
+        Writes the month's partition, with any rows it already holds, to a temporary
+        file in the archive directory and returns its path for publish() or discard().
+        """
+        table = to_table(transactions)
+        if self.has(month):
+            table = pa.concat_tables([self.read(month), table])
+            table = table.take(pc.sort_indices(table["transaction_id"]))
+        os.makedirs(self.directory, exist_ok=True)
+        fd, staged = tempfile.mkstemp(prefix=f".transactions-{month:%Y-%m}-", suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            feather.write_feather(table, staged, compression="zstd")
+            with open(staged, "rb") as f:
+                os.fsync(f.fileno())
+            written = feather.read_table(staged, columns=["transaction_id"], memory_map=True).num_rows
+            if written != table.num_rows:
+                raise ArchiveFileError(f"{staged}: wrote {written} of {table.num_rows} rows.")
+        except (OSError, pa.ArrowException) as e:
+            self.discard(staged)
+            raise ArchiveFileError(f"Cannot write the partition of {month:%Y-%m}: {e}") from e
+        except ArchiveFileError:
+            self.discard(staged)
+            raise
+        return staged
+
+    def publish(self, month: date, staged: str) -> None:
+        os.replace(staged, self.path(month))
+
+    def discard(self, staged: str) -> None:
+        if os.path.exists(staged):
+            os.remove(staged)
+
+    def scan(
+        self,
+        month: date,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        account_id: Optional[int] = None,
+        type: Optional[str] = None,
+    ) -> pa.Table:
+        """Rows of one partition within an (inclusive) date range, optionally of one account and type."""
+        table = self.read(month)
+        conditions = []
+        if start_date:
+            conditions.append(pc.greater_equal(table["transaction_date"], start_date))
+        if end_date:
+            # end_date is inclusive; transaction_date carries a time component.
+            day_after = date.fromisoformat(end_date) + timedelta(days=1)
+            conditions.append(pc.less(table["transaction_date"], day_after.isoformat()))
+        if account_id is not None:
+            conditions.append(pc.equal(table["account_id"], account_id))
+        if type is not None:
+            conditions.append(pc.equal(table["type"], type))
+        if not conditions:
+            return table
+        mask = conditions[0]
+        for condition in conditions[1:]:
+            mask = pc.and_(mask, condition)
+        return table.filter(mask)
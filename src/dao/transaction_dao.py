@@ -1,6 +1,11 @@
 # src/dao/transaction_dao.py
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator
 from supabase import Client
+from src.dao.scheduler import idempotent
+from datetime import date, timedelta
+from src.dao.pagination import iter_keyset_pages
+from src.models.money import Money
+from src.models.records import Transaction, to_row
 
 class TransactionDAO:
     """
@@ -12,34 +17,236 @@ class TransactionDAO:
 
     def create_transaction(
         self,
-        amount: float,
+        amount: Money,
         type: str,
         account_id: int, # UPDATED: account_id is now required
         goal_id: Optional[int] = None,
         category_id: Optional[int] = None,
-        description: Optional[str] = None
-    ) -> Optional[Dict]:
-        """Creates a new transaction, which must be linked to an account."""
+        description: Optional[str] = None,
+        fingerprint: Optional[str] = None
+    ) -> Optional[Transaction]:
+        """
+        Creates a new transaction, which must be linked to an account. A fingerprint
+        already in the ledger is rejected by the backend's unique index.
+        """
         payload = {
             "account_id": account_id,
             "goal_id": goal_id,
             "category_id": category_id,
-            "amount": amount,
+            "amount": amount.to_db(),
             "type": type,
-            "description": description
+            "description": description,
+            "fingerprint": fingerprint
         }
         resp = self.db.table(self.table).insert(payload).execute()
-        return resp.data[0] if resp.data else None
+        return Transaction.from_row(resp.data[0]) if resp.data else None
+
+    def create_transactions(self, rows: List[Dict]) -> List[Transaction]:
+        """Inserts many transactions in a single request."""
+        if not rows:
+            return []
+        resp = self.db.table(self.table).insert([to_row(row) for row in rows]).execute()
+        return [Transaction.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def transfer_funds(
+        self, transfer_id: str, from_account_id: int, to_account_id: int, amount: Money, description: Optional[str] = None
+    ) -> List[Transaction]:
+        """
+        Writes both legs of a transfer and both balance changes in one transaction,
+        using the transfer_funds PostgreSQL function. The function is idempotent on
+        transfer_id, so a retried call returns the legs written by the first one.
+        """
+        resp = self.db.rpc('transfer_funds', {
+            'p_transfer_id': transfer_id,
+            'p_from_account_id': from_account_id,
+            'p_to_account_id': to_account_id,
+            'p_amount': amount.to_db(),
+            'p_description': description,
+        }).execute()
+        return [Transaction.from_row(row) for row in resp.data or []]
+
+    def allocate_to_goals(self, account_id: int, allocations: Dict[int, Money], description: Optional[str] = None) -> List[Transaction]:
+        """
+        Writes one 'Saving' transaction per goal and a single deduction of their
+        total from the account, in one transaction, using the allocate_to_goals
+        PostgreSQL function. It fails as a whole if the account lacks funds.
+        """
+        resp = self.db.rpc('allocate_to_goals', {
+            'p_account_id': account_id,
+            'p_allocations': [{'goal_id': goal_id, 'amount': amount.to_db()} for goal_id, amount in allocations.items()],
+            'p_description': description,
+        }).execute()
+        return [Transaction.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def get_goal_amounts(self, goal_ids: List[int]) -> List[Transaction]:
+        """Amount, type and goal of every transaction of the given goals, in one request."""
+        if not goal_ids:
+            return []
+        resp = self.db.table(self.table).select("transaction_id, account_id, goal_id, amount, type, transaction_date").in_("goal_id", goal_ids).execute()
+        return [Transaction.from_row(row) for row in resp.data or []]
+
+    @idempotent
+    def get_latest_saving_ids(self, goal_ids: List[int]) -> Dict[int, int]:
+        """
+        ID of the most recent 'Saving' transaction of each of the given goals, in one request.
+        Goals without savings are left out. This requires the latest_saving_ids PostgreSQL function.
+        """
+        if not goal_ids:
+            return {}
+        resp = self.db.rpc('latest_saving_ids', {'p_goal_ids': goal_ids}).execute()
+        return {row["goal_id"]: row["transaction_id"] for row in resp.data or []}
 
-    def get_transactions_by_goal_id(self, goal_id: int) -> List[Dict]:
+    @idempotent
+    def get_transactions_by_goal_id(self, goal_id: int) -> List[Transaction]:
         """Retrieves all transactions associated with a single goal."""
         resp = self.db.table(self.table).select("*, categories(name)").eq("goal_id", goal_id).order("transaction_date").execute()
-        return resp.data or []
+        return [Transaction.from_row(row) for row in resp.data or []]
 
+    def iter_transaction_pages(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        account_id: Optional[int] = None,
+        page_size: int = 1000,
+        type: Optional[str] = None
+    ) -> Iterator[List[Transaction]]:
+        """
+        Yields transactions, joined with account, category and goal names, one page at a time.
+        Uses keyset pagination on transaction_id so every page is an indexed range scan.
+        """
+        def query():
+            q = self.db.table(self.table).select("*, accounts(name), categories(name), goals(name)")
+            if start_date:
+                q = q.gte("transaction_date", start_date)
+            if end_date:
+                # end_date is inclusive; transaction_date carries a time component.
+                day_after = date.fromisoformat(end_date) + timedelta(days=1)
+                q = q.lt("transaction_date", day_after.isoformat())
+            if account_id is not None:
+                q = q.eq("account_id", account_id)
+            if type is not None:
+                q = q.eq("type", type)
+            return q
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", page_size=page_size)
+
+    def iter_account_transactions_after(
+        self, account_id: int, after_transaction_id: int, page_size: int = 1000
+    ) -> Iterator[List[Transaction]]:
+        """
+        Yields an account's transactions with an ID greater than after_transaction_id,
+        oldest first, one page at a time. Only the columns needed for balances are fetched.
+        """
+        def query():
+            return (
+                self.db.table(self.table)
+                .select("transaction_id, account_id, amount, type, transaction_date")
+                .eq("account_id", account_id)
+            )
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", after_transaction_id, page_size=page_size)
+
+    def iter_ledger_after(self, after_transaction_id: int, page_size: int = 1000) -> Iterator[List[Transaction]]:
+        """
+        Yields transactions of every account with an ID greater than after_transaction_id,
+        oldest first, with only the columns needed for dated balances.
+        """
+        def query():
+            return (
+                self.db.table(self.table)
+                .select("transaction_id, account_id, amount, type, transaction_date")
+            )
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", after_transaction_id, page_size=page_size)
+
+    def iter_expenses_after(self, after_transaction_id: int, page_size: int = 1000) -> Iterator[List[Transaction]]:
+        """
+        Yields expenses with an ID greater than after_transaction_id, oldest first,
+        with their category name and the columns needed to score them.
+        """
+        def query():
+            return (
+                self.db.table(self.table)
+                .select("transaction_id, account_id, category_id, amount, type, transaction_date, description, categories(name)")
+                .eq("type", "Expense")
+            )
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", after_transaction_id, page_size=page_size)
+
+    def iter_fingerprints_after(
+        self, after_transaction_id: int, types: List[str], page_size: int = 1000
+    ) -> Iterator[List[Transaction]]:
+        """
+        Yields transactions of the given types with an ID greater than after_transaction_id,
+        oldest first, with their stored fingerprint and the columns a fingerprint is computed from.
+        """
+        def query():
+            return (
+                self.db.table(self.table)
+                .select("transaction_id, account_id, amount, type, transaction_date, description, fingerprint")
+                .in_("type", types)
+            )
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", after_transaction_id, page_size=page_size)
+
+    def iter_archivable_pages(self, start_date: str, end_date: str, page_size: int = 1000) -> Iterator[List[Transaction]]:
+        """
+        Yields the transactions of a date range (end exclusive) that can be archived,
+        general incomes and expenses outside goals and transfers, joined with account
+        and category names, one page at a time.
+        """
+        def query():
+            return (
+                self.db.table(self.table)
+                .select("*, accounts(name), categories(name)")
+                .gte("transaction_date", start_date)
+                .lt("transaction_date", end_date)
+                .in_("type", ["Income", "Expense"])
+                .is_("goal_id", "null")
+                .is_("transfer_id", "null")
+            )
+        yield from iter_keyset_pages(query, Transaction.from_row, "transaction_id", page_size=page_size)
+
+    @idempotent
+    def get_oldest_archivable_date(self, before: str) -> Optional[str]:
+        """Date of the oldest archivable transaction before the given date, if any."""
+        resp = (
+            self.db.table(self.table)
+            .select("transaction_date")
+            .lt("transaction_date", before)
+            .in_("type", ["Income", "Expense"])
+            .is_("goal_id", "null")
+            .is_("transfer_id", "null")
+            .order("transaction_date")
+            .limit(1)
+            .execute()
+        )
+        return resp.data[0]["transaction_date"] if resp.data else None
+
+    @idempotent
     def get_spending_report(self, start_date: str, end_date: str) -> List[Dict]:
         """
         Fetches aggregated spending data, grouped by category.
         This requires a PostgreSQL function in Supabase.
         """
         resp = self.db.rpc('spending_report_by_category', {'start_date': start_date, 'end_date': end_date}).execute()
-        return resp.data or []
\ No newline at end of file
+        return resp.data or []
+
+    @idempotent
+    def get_spending_trend(self, start_date: str, end_date: str, bucket: str = "month") -> List[Dict]:
+        """
+        Fetches expense totals per category and period ('month', 'quarter' or 'year')
+        in one request. Each row has the period start date, category_name and total_spent.
+        This requires the spending_trend_by_category PostgreSQL function in Supabase.
+        """
+        resp = self.db.rpc('spending_trend_by_category', {
+            'start_date': start_date, 'end_date': end_date, 'bucket': bucket,
+        }).execute()
+        return resp.data or []
+
+    @idempotent
+    def get_daily_spending_by_currency(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Fetches expense totals per category, account currency and day in one request.
+        Each row has category_name, currency, day and total_spent.
+        This requires the spending_by_category_currency PostgreSQL function in Supabase.
+        """
+        resp = self.db.rpc('spending_by_category_currency', {'start_date': start_date, 'end_date': end_date}).execute()
+        return resp.data or []
@@ -0,0 +1,187 @@
+# src/dao/unit_of_work.py
+import contextlib
+import contextvars
+import copy
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+from src.models.money import to_money
+from src.models.records import Account, Debt, Goal, Record, Step
+
+
+class UnitOfWork:
+    """
+    Per-action identity map and change set. Every entity is loaded at most once
+    and always returned as the same instance; updates change that instance and
+    are written together when the action commits, only the fields they changed,
+    so concurrent edits to other fields of the same rows are kept.
+    """
+    def __init__(self):
+        self.identities: Dict[Tuple[type, Hashable], Record] = {}
+        self.queries: Dict[Hashable, Any] = {}
+        # id(dao) -> (dao, {primary key: (record, changed fields)}), in the order tables were first changed.
+        self.dirty: Dict[int, Tuple["UnitOfWorkDAO", Dict[Hashable, Tuple[Record, Set[str]]]]] = {}
+
+    def register(self, record: Record, key: str) -> Record:
+        """The action's instance of a loaded record; the first load wins."""
+        identity = (type(record), getattr(record, key))
+        known = self.identities.get(identity)
+        if known is None:
+            # A private copy: records may be shared with other sessions (see CoalescingDAO).
+            known = self.identities[identity] = copy.copy(record)
+        return known
+
+    def forget_queries(self, dao: "UnitOfWorkDAO") -> None:
+        for query in [q for q in self.queries if q[0] == id(dao)]:
+            del self.queries[query]
+
+    def flush(self) -> None:
+        """Writes the changed fields of every changed record, table by table."""
+        for dao, changes in list(self.dirty.values()):
+            dao.save(list(changes.values()))
+        self.dirty.clear()
+
+
+_current_unit: contextvars.ContextVar = contextvars.ContextVar("unit_of_work", default=None)
+
+
+@contextlib.contextmanager
+def unit_of_work():
+    """
+    Runs the enclosed service calls as one unit of work, committed when the block
+    exits normally and discarded if it raises. Nested units join the outermost one,
+    so a service action calling other actions still commits once.
+    """
+    current = _current_unit.get()
+    if current is not None:
+        yield current
+        return
+    unit = UnitOfWork()
+    token = _current_unit.set(unit)
+    try:
+        yield unit
+        unit.flush()
+    finally:
+        _current_unit.reset(token)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current_unit.get()
+
+
+class UnitOfWorkDAO:
+    """
+    Wraps a DAO so that, inside a unit of work, the named getters and queries are
+    served from its identity map and the named updates are deferred to its commit.
+    `updates` maps an update method to a function turning its arguments (after the
+    primary key) into field changes; changed records are written with the `save`
+    method, which takes a list of records and the columns to write. Outside a unit
+    of work, and for updates of records the action has not loaded, calls go
+    straight to the DAO.
+    """
+    def __init__(self, dao, record_cls, key: str, getters: Iterable[str] = (), queries: Iterable[str] = (),
+                 updates: Optional[Dict[str, Callable[..., Dict]]] = None, save: Optional[str] = None):
+        self._dao = dao
+        self._record_cls = record_cls
+        self._key = key
+        self._getters = frozenset(getters)
+        self._queries = frozenset(queries)
+        self._updates = updates or {}
+        self._save = save
+
+    def save(self, changes: List[Tuple[Record, Set[str]]]):
+        """Saves the records, one save call per set of changed fields."""
+        groups: Dict[FrozenSet[str], List[Record]] = {}
+        for record, changed in changes:
+            groups.setdefault(frozenset(changed), []).append(record)
+        for changed, records in groups.items():
+            getattr(self._dao, self._save)(records, sorted(changed))
+
+    def _canonical(self, unit: UnitOfWork, result):
+        if isinstance(result, self._record_cls):
+            return unit.register(result, self._key)
+        if isinstance(result, list):
+            return [self._canonical(unit, item) for item in result]
+        return result
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._dao, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        if name in self._getters:
+            def get(record_id, *args, **kwargs):
+                unit = _current_unit.get()
+                if unit is None:
+                    return attr(record_id, *args, **kwargs)
+                known = unit.identities.get((self._record_cls, record_id))
+                if known is not None:
+                    return known
+                return self._canonical(unit, attr(record_id, *args, **kwargs))
+            return get
+
+        if name in self._queries:
+            def query(*args, **kwargs):
+                unit = _current_unit.get()
+                if unit is None:
+                    return attr(*args, **kwargs)
+                key = (id(self), name, args, tuple(sorted(kwargs.items())))
+                if key not in unit.queries:
+                    unit.queries[key] = self._canonical(unit, attr(*args, **kwargs))
+                result = unit.queries[key]
+                return list(result) if isinstance(result, list) else result
+            return query
+
+        if name in self._updates and self._save:
+            def update(record_id, *args, **kwargs):
+                unit = _current_unit.get()
+                known = unit and unit.identities.get((self._record_cls, record_id))
+                if not known:
+                    result = attr(record_id, *args, **kwargs)
+                    if unit is not None:
+                        unit.identities.pop((self._record_cls, record_id), None)
+                        unit.forget_queries(self)
+                        result = self._canonical(unit, result)
+                    return result
+                changes = self._updates[name](*args, **kwargs)
+                for field, value in changes.items():
+                    setattr(known, field, value)
+                _, changed = unit.dirty.setdefault(id(self), (self, {}))[1].setdefault(record_id, (known, set()))
+                changed.update(changes)
+                return known
+            return update
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            unit = _current_unit.get()
+            if unit is not None:
+                # Creates and other writes may change what the cached queries return.
+                unit.forget_queries(self)
+                result = self._canonical(unit, result)
+            return result
+        return call
+
+
+# How the DAO of each table takes part in a unit of work.
+IDENTITY_MAPPED = {
+    "accounts": dict(
+        record_cls=Account, key="account_id", getters=["get_account_by_id"], queries=["list_accounts"],
+        updates={"update_account_balance": lambda new_balance: {"balance": to_money(new_balance)}},
+        save="save_accounts"),
+    "goals": dict(
+        record_cls=Goal, key="goal_id", getters=["get_goal_by_id"], queries=["list_goals"],
+        updates={"update_goal": lambda updates: dict(updates)}, save="save_goals"),
+    "steps": dict(
+        record_cls=Step, key="step_id", queries=["get_steps_by_goal_id"],
+        updates={"update_step": lambda updates: dict(updates)}, save="save_steps"),
+    "debts": dict(
+        record_cls=Debt, key="debt_id", getters=["get_debt_by_id"], queries=["list_debts"],
+        updates={"update_debt_balance": lambda new_remaining: {"remaining_amount": to_money(new_remaining)},
+                 "update_debt": lambda updates: dict(updates)},
+        save="save_debts"),
+}
+
+
+def identity_mapped(dao):
+    """Wraps a DAO in a UnitOfWorkDAO if its table takes part in units of work."""
+    spec = IDENTITY_MAPPED.get(dao.table)
+    return UnitOfWorkDAO(dao, **spec) if spec else dao
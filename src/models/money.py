@@ -0,0 +1,123 @@
+# src/models/money.py
+from decimal import Decimal, ROUND_HALF_UP
+from functools import total_ordering
+from typing import Iterable, Optional, Union
+
+_CENT = Decimal("0.01")
+
+
+@total_ordering
+class Money:
+    """
+    An exact amount of money stored as an integer number of paise (minor units).
+    Arithmetic between Money values never accumulates float error.
+    """
+    __slots__ = ("paise",)
+
+    def __init__(self, paise: int = 0):
+        if not isinstance(paise, int):
+            raise TypeError(f"Money must be built from integer paise, got {type(paise).__name__}.")
+        self.paise = paise
+
+    @classmethod
+    def from_rupees(cls, value: Union[int, float, str, Decimal]) -> "Money":
+        """Builds Money from a rupee amount, rounding half-up to the nearest paisa."""
+        rupees = Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+        return cls(int(rupees * 100))
+
+    @classmethod
+    def from_db(cls, value) -> Optional["Money"]:
+        """
+        Decodes a numeric(…, 2) column value; NULL stays None.
+        JSON numbers take a fast path since they never carry more than two decimals.
+        """
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return cls(value * 100)
+        if isinstance(value, float):
+            return cls(round(value * 100))
+        return cls.from_rupees(value)
+
+    @classmethod
+    def total(cls, values: Iterable["Money"]) -> "Money":
+        """Sums Money values exactly."""
+        return cls(sum(value.paise for value in values))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.paise).scaleb(-2)
+
+    def to_db(self) -> str:
+        """Encodes the amount for a numeric column without going through float."""
+        return str(self.to_decimal())
+
+    def ratio(self, other: "Money") -> float:
+        """Returns self / other as a float, e.g. for progress percentages."""
+        return self.paise / other.paise
+
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.paise + other.paise)
+
+    def __radd__(self, other) -> "Money":
+        # Lets the built-in sum() start from 0.
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        return Money(self.paise - other.paise)
+
+    def __mul__(self, factor: int) -> "Money":
+        if not isinstance(factor, int):
+            return NotImplemented
+        return Money(self.paise * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money(-self.paise)
+
+    def __abs__(self) -> "Money":
+        return Money(abs(self.paise))
+
+    def __bool__(self) -> bool:
+        return self.paise != 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.paise == other.paise
+
+    def __lt__(self, other: "Money") -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.paise < other.paise
+
+    def __hash__(self) -> int:
+        return hash(self.paise)
+
+    def __float__(self) -> float:
+        return self.paise / 100
+
+    def __format__(self, spec: str) -> str:
+        return format(self.to_decimal(), spec) if spec else str(self)
+
+    def __str__(self) -> str:
+        return str(self.to_decimal())
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+
+ZERO = Money(0)
+
+
+def to_money(value) -> Optional[Money]:
+    """Coerces user input (rupees as int/float/str) into Money; Money and None pass through."""
+    if value is None or isinstance(value, Money):
+        return value
+    return Money.from_rupees(value)
@@ -0,0 +1,314 @@
+# src/models/records.py
+from dataclasses import dataclass, field, fields
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+from src.models.money import Money, ZERO
+
+# How each transaction type moves the balance of its account.
+BALANCE_EFFECT = {"Income": 1, "Expense": -1, "Saving": -1, "Transfer Out": -1, "Transfer In": 1}
+
+# The two legs of an account-to-account transfer; neither is spending.
+TRANSFER_TYPES = ("Transfer Out", "Transfer In")
+
+
+def _date(value) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+
+
+def _plain(value):
+    """Converts records, Money and dates into JSON/DataFrame friendly values."""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, Money):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def to_row(values: Dict) -> Dict:
+    """Encodes a dict of column values (Money, dates) for a database write."""
+    row = {}
+    for key, value in values.items():
+        if isinstance(value, Money):
+            value = value.to_db()
+        elif isinstance(value, date):
+            value = value.isoformat()
+        row[key] = value
+    return row
+
+
+def json_default(value):
+    """`default=` hook for json.dumps that understands records and Money."""
+    plain = _plain(value)
+    return str(value) if plain is value else plain
+
+
+class Record:
+    """Base class for the slotted domain records decoded by the DAOs."""
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        return {f.name: _plain(getattr(self, f.name)) for f in fields(self)}
+
+    def to_db_row(self, columns: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Encodes every field (or only the given columns) for a database write;
+        only for records whose fields are all columns.
+        """
+        names = [f.name for f in fields(self)] if columns is None else columns
+        return to_row({name: getattr(self, name) for name in names})
+
+
+@dataclass(slots=True)
+class Account(Record):
+    account_id: int
+    name: str
+    balance: Money
+    created_at: Optional[str] = None
+    # Balance the account was opened with, the starting point of its ledger.
+    opening_balance: Money = ZERO
+    # ISO 4217 code; balances and transactions of the account are in this currency.
+    currency: str = "INR"
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Account":
+        return cls(row["account_id"], row["name"], Money.from_db(row["balance"]), row.get("created_at"),
+                   Money.from_db(row.get("opening_balance")) or ZERO, row.get("currency") or "INR")
+
+
+@dataclass(slots=True)
+class Category(Record):
+    category_id: int
+    name: str
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Category":
+        return cls(row["category_id"], row["name"])
+
+
+@dataclass(slots=True)
+class Goal(Record):
+    goal_id: int
+    name: str
+    budget: Optional[Money]
+    status: str = "Active"
+    created_at: Optional[str] = None
+    # 1 is the highest; auto-allocation fills higher priorities first.
+    priority: int = 3
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Goal":
+        return cls(row["goal_id"], row["name"], Money.from_db(row.get("budget")),
+                   row.get("status", "Active"), row.get("created_at"), row.get("priority") or 3)
+
+
+@dataclass(slots=True)
+class Step(Record):
+    step_id: int
+    goal_id: int
+    description: str
+    status: str = "Pending"
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Step":
+        return cls(row["step_id"], row["goal_id"], row["description"],
+                   row.get("status", "Pending"), row.get("created_at"))
+
+
+@dataclass(slots=True)
+class Transaction(Record):
+    transaction_id: int
+    account_id: int
+    amount: Money
+    type: str
+    transaction_date: Optional[str] = None
+    goal_id: Optional[int] = None
+    category_id: Optional[int] = None
+    description: Optional[str] = None
+    # Names from joined tables, only present when the query embeds them.
+    account_name: Optional[str] = None
+    category_name: Optional[str] = None
+    goal_name: Optional[str] = None
+    # Shared by both legs of a transfer.
+    transfer_id: Optional[str] = None
+    # Duplicate-detection key (see duplicate_service); None for rows saved as deliberate repeats.
+    fingerprint: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Transaction":
+        return cls(
+            row["transaction_id"], row["account_id"], Money.from_db(row["amount"]), row["type"],
+            row.get("transaction_date"), row.get("goal_id"), row.get("category_id"), row.get("description"),
+            (row.get("accounts") or {}).get("name"),
+            (row.get("categories") or {}).get("name"),
+            (row.get("goals") or {}).get("name"),
+            row.get("transfer_id"), row.get("fingerprint"),
+        )
+
+    @property
+    def signed_amount(self) -> Money:
+        """The amount with the sign of its effect on the account balance."""
+        return self.amount * BALANCE_EFFECT.get(self.type, 0)
+
+
+@dataclass(slots=True)
+class Debt(Record):
+    debt_id: int
+    name: str
+    total_amount: Money
+    remaining_amount: Money
+    monthly_emi: Optional[Money] = None
+    created_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "Debt":
+        return cls(row["debt_id"], row["name"], Money.from_db(row["total_amount"]),
+                   Money.from_db(row["remaining_amount"]), Money.from_db(row.get("monthly_emi")),
+                   row.get("created_at"))
+
+
+@dataclass(slots=True)
+class RecurringTransaction(Record):
+    recurring_transaction_id: int
+    account_id: int
+    amount: Money
+    type: str
+    frequency: str
+    # None once the rule has ended.
+    next_due_date: Optional[date]
+    description: Optional[str] = None
+    start_date: Optional[date] = None
+    debt_id: Optional[int] = None
+    end_date: Optional[date] = None
+    max_occurrences: Optional[int] = None
+    occurrence_count: int = 0
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "RecurringTransaction":
+        return cls(
+            row["recurring_transaction_id"], row["account_id"], Money.from_db(row["amount"]), row["type"],
+            row.get("frequency", "monthly"), _date(row.get("next_due_date")), row.get("description"),
+            _date(row.get("start_date")), row.get("debt_id"), _date(row.get("end_date")),
+            row.get("max_occurrences"), row.get("occurrence_count") or 0,
+        )
+
+
+@dataclass(slots=True)
+class ReconciliationCheckpoint(Record):
+    account_id: int
+    last_transaction_id: int
+    ledger_balance: Money
+    checkpointed_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "ReconciliationCheckpoint":
+        return cls(row["account_id"], row["last_transaction_id"], Money.from_db(row["ledger_balance"]),
+                   row.get("checkpointed_at"))
+
+
+# Daily total of the archived transactions of one account, category and type.
+@dataclass(slots=True)
+class TransactionRollup(Record):
+    rollup_id: int
+    day: str
+    account_id: int
+    type: str
+    total: Money
+    transaction_count: int
+    category_id: Optional[int] = None
+    # From joined tables, only present when the query embeds them.
+    category_name: Optional[str] = None
+    currency: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "TransactionRollup":
+        return cls(
+            row["rollup_id"], str(row["day"])[:10], row["account_id"], row["type"], Money.from_db(row["total"]),
+            row["transaction_count"], row.get("category_id"),
+            (row.get("categories") or {}).get("name"),
+            (row.get("accounts") or {}).get("currency"),
+        )
+
+    @property
+    def signed_total(self) -> Money:
+        return self.total * BALANCE_EFFECT.get(self.type, 0)
+
+
+@dataclass(slots=True)
+class ArchivedMonth(Record):
+    month: str
+    transaction_count: int
+    archived_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "ArchivedMonth":
+        return cls(str(row["month"])[:10], row["transaction_count"], row.get("archived_at"))
+
+
+@dataclass(slots=True)
+class CategoryBudget(Record):
+    category_id: int
+    monthly_limit: Money
+    # Fractions of the limit at which a BudgetWarning is returned.
+    alert_thresholds: List[float] = field(default_factory=lambda: [0.8, 1.0])
+    category_name: Optional[str] = None
+    # Month-to-date spend, when the row was read together with its running total.
+    spent: Money = ZERO
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "CategoryBudget":
+        category = row.get("categories") or {}
+        totals = category.get("category_monthly_totals") or []
+        return cls(row["category_id"], Money.from_db(row["monthly_limit"]),
+                   [float(t) for t in row.get("alert_thresholds") or [0.8, 1.0]], category.get("name"),
+                   Money.total(Money.from_db(t["total_spent"]) for t in totals))
+
+
+@dataclass(slots=True)
+class GoalSummary(Record):
+    budget: Money = ZERO
+    amount_saved: Money = ZERO
+    amount_spent_on_goal: Money = ZERO
+    remaining_to_save: Money = ZERO
+    progress_percentage: float = 0.0
+
+
+@dataclass(slots=True)
+class GoalDetails(Record):
+    goal: Goal
+    steps: List[Step] = field(default_factory=list)
+    financial_summary: GoalSummary = field(default_factory=GoalSummary)
+
+    def to_dict(self) -> Dict:
+        # Flattened like the old goal row, so JSON output keeps its shape.
+        details = self.goal.to_dict()
+        details["steps"] = _plain(self.steps)
+        details["financial_summary"] = self.financial_summary.to_dict()
+        return details
+
+
+@dataclass(slots=True)
+class GoalAllocation(Record):
+    goal_id: int
+    goal_name: str
+    priority: int
+    remaining_to_save: Money
+    amount: Money = ZERO
+
+
+@dataclass(slots=True)
+class AllocationPlan(Record):
+    account_id: int
+    amount: Money
+    allocations: List[GoalAllocation] = field(default_factory=list)
+    # Left over once every active goal is fully funded.
+    unallocated: Money = ZERO
+
+    @property
+    def allocated(self) -> Money:
+        return Money.total(a.amount for a in self.allocations)
@@ -0,0 +1,164 @@
+# src/profiling.py
+import contextlib
+import cProfile
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from typing import ContextManager, Dict, List, Optional, Tuple
+
+# Setting this environment variable to a directory turns profiling on.
+PROFILE_DIR_ENV = "GOAL_MANAGER_PROFILE_DIR"
+
+# Shared no-op context manager returned when profiling is off.
+_DISABLED = contextlib.nullcontext()
+
+_MAX_STACK_DEPTH = 64
+
+# cProfile (built on process-wide sys.monitoring from Python 3.12) and tracemalloc
+# are process-wide, so one action is profiled at a time. Actions that overlap it,
+# such as reruns of other Streamlit sessions, run unprofiled.
+_active_lock = threading.Lock()
+# The profiler of the action running on this thread, if it is being profiled.
+_local = threading.local()
+
+
+def _start_tracing() -> bool:
+    """Starts tracing, or resets the peak if tracing was started outside the profiler."""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        return False
+    tracemalloc.start(10)
+    return True
+
+
+def _stop_tracing(owned: bool) -> Tuple[tracemalloc.Snapshot, int]:
+    """Takes the action's snapshot and peak, then stops tracing if the profiler started it."""
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    if owned:
+        tracemalloc.stop()
+    return snapshot, peak
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # built-ins
+        return name.replace(";", ":")
+    return f"{name} ({os.path.basename(filename)}:{lineno})".replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """
+    Converts cProfile data into flamegraph 'collapsed' lines ("a;b;c <microseconds>").
+    cProfile only records caller/callee pairs, so time is split across the call
+    paths of a function in proportion to the cumulative time each edge carries.
+    """
+    raw: Dict = stats.stats
+    callees: Dict = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_cumulative))
+
+    totals: Dict[str, float] = {}
+
+    def walk(func, path: List[str], cumulative: float, depth: int):
+        _, _, self_time, func_cumulative, _ = raw[func]
+        if func_cumulative <= 0 or depth > _MAX_STACK_DEPTH:
+            return
+        share = cumulative / func_cumulative
+        stack = path + [_frame_label(func)]
+        key = ";".join(stack)
+        totals[key] = totals.get(key, 0.0) + self_time * share
+        for callee, edge_cumulative in callees.get(func, []):
+            if callee in raw and _frame_label(callee) not in path:  # skip recursion cycles
+                walk(callee, stack, edge_cumulative * share, depth + 1)
+
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        if not callers:
+            walk(func, [], cumulative, 0)
+
+    return [f"{stack} {int(seconds * 1_000_000)}" for stack, seconds in totals.items() if seconds >= 1e-6]
+
+
+class ActionProfiler:
+    """
+    Opt-in profiling of individual user actions (CLI menu actions, Streamlit reruns).
+    For each action it writes a pstats file, a flamegraph-compatible collapsed-stack
+    file and the top allocation sites to the output directory.
+    When disabled, profile() returns a shared no-op context manager.
+    Nested or overlapping actions are not profiled; see _active_lock.
+    """
+    def __init__(self, output_dir: Optional[str] = None, top_allocations: int = 25):
+        self.output_dir = output_dir
+        self.top_allocations = top_allocations
+
+    @classmethod
+    def from_env(cls, output_dir: Optional[str] = None) -> "ActionProfiler":
+        """Uses the given directory, falling back to GOAL_MANAGER_PROFILE_DIR."""
+        return cls(output_dir or os.getenv(PROFILE_DIR_ENV) or None)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.output_dir)
+
+    def profile(self, action: str) -> ContextManager:
+        """Context manager that profiles the enclosed block as one action."""
+        if not self.output_dir:
+            return _DISABLED
+        return self._profile(action)
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Leaves the enclosed block (e.g. waiting at a prompt) out of the action being profiled."""
+        profiler = getattr(_local, "profiler", None)
+        if profiler is None:
+            yield
+            return
+        profiler.disable()
+        try:
+            yield
+        finally:
+            profiler.enable()
+
+    @contextlib.contextmanager
+    def _profile(self, action: str):
+        if not _active_lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            profiler = cProfile.Profile()
+            owned = _start_tracing()
+            _local.profiler = profiler
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                _local.profiler = None
+                snapshot, peak = _stop_tracing(owned)
+                self._write(action, profiler, snapshot, peak)
+        finally:
+            _active_lock.release()
+
+    def _write(self, action: str, profiler: cProfile.Profile, snapshot: tracemalloc.Snapshot, peak: int) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "-", action).strip("-").lower() or "action"
+        base = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{slug}")
+
+        stats = pstats.Stats(profiler)
+        stats.dump_stats(f"{base}.pstats")
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(collapsed_stacks(stats)) + "\n")
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+            f.write(f"Top {self.top_allocations} allocation sites still live at the end of '{action}'\n")
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+                f.write(f"{stat}\n")
@@ -1,18 +1,37 @@
 # src/services/account_service.py
-from typing import List, Dict, Optional
+from typing import List, Optional
+import pyarrow as pa
 from src.dao.account_dao import AccountDAO
+from src.models.money import Money, ZERO, to_money
+from src.models.records import Account
+from src.services.currency_service import CurrencyService
 
 class AccountService:
     """
     Handles business logic for financial accounts.
     """
-    def __init__(self, account_dao: AccountDAO):
+    def __init__(self, account_dao: AccountDAO, currency_service: Optional[CurrencyService] = None):
         self.account_dao = account_dao
+        # Converts balances held in other currencies for totals.
+        self.currency_service = currency_service
 
-    def create_account(self, name: str, initial_balance: float = 0.0) -> Optional[Dict]:
-        """Creates a new account."""
-        return self.account_dao.create_account(name, initial_balance)
+    def create_account(self, name: str, initial_balance: Money = ZERO, currency: Optional[str] = None) -> Optional[Account]:
+        """Creates a new account, in the base currency unless another one is given."""
+        if self.currency_service:
+            currency = self.currency_service.validate(currency)
+        return self.account_dao.create_account(name, to_money(initial_balance), currency or "INR")
 
-    def list_accounts(self) -> List[Dict]:
+    def list_accounts(self) -> List[Account]:
         """Lists all available accounts."""
-        return self.account_dao.list_accounts()
\ No newline at end of file
+        return self.account_dao.list_accounts()
+
+    def list_accounts_arrow(self) -> pa.Table:
+        """Lists all accounts as an Arrow table (one column per Account field), for display."""
+        return self.account_dao.list_accounts_arrow()
+
+    def total_balance(self, accounts: Optional[List[Account]] = None) -> Money:
+        """Sum of the account balances, in the base currency."""
+        accounts = self.list_accounts() if accounts is None else accounts
+        if self.currency_service:
+            return self.currency_service.accounts_total(accounts)
+        return Money.total(acc.balance for acc in accounts)
@@ -0,0 +1,116 @@
+# src/services/allocation_service.py
+from typing import Dict, List, Optional, Tuple
+
+from src.dao.account_dao import AccountDAO
+from src.dao.goal_dao import GoalDAO
+from src.dao.transaction_dao import TransactionDAO
+from src.services.goal_service import GoalService
+from src.services.currency_service import CurrencyService
+from src.models.money import Money, ZERO, to_money
+from src.models.records import Account, AllocationPlan, GoalAllocation, Transaction
+
+
+class AllocationError(Exception):
+    """Custom exception for income auto-allocation errors."""
+    pass
+
+
+def split_evenly(amount: int, capacities: List[int]) -> List[int]:
+    """
+    Splits amount (paise) into equal shares capped at each capacity, handing what
+    a capped share leaves over to the others ("water filling"). Indivisible paise
+    go one each to the earliest entries. Returns the share of each entry.
+    """
+    shares = [0] * len(capacities)
+    # Smallest capacities first: once one fits in the even share, it is filled outright.
+    order = sorted(range(len(capacities)), key=lambda i: (capacities[i], i))
+    left = amount
+    for n, i in enumerate(order):
+        even = left // (len(order) - n)
+        if capacities[i] <= even:
+            shares[i] = capacities[i]
+            left -= capacities[i]
+            continue
+        # Every remaining entry can take more than the even share.
+        rest = sorted(order[n:])
+        even, extra = divmod(left, len(rest))
+        for k, j in enumerate(rest):
+            shares[j] = even + (1 if k < extra else 0)
+        break
+    return shares
+
+
+class AllocationService:
+    """
+    Splits an income across the active goals and saves it in one write. Goals
+    are funded by priority: the highest-priority tier is filled up to each goal's
+    remaining-to-save before the next tier gets anything, and an amount smaller
+    than a tier's needs is shared evenly within it.
+    """
+    def __init__(self, goal_service: GoalService, goal_dao: GoalDAO, account_dao: AccountDAO,
+                 transaction_dao: TransactionDAO, currency_service: Optional[CurrencyService] = None):
+        self.goal_service = goal_service
+        self.goal_dao = goal_dao
+        self.account_dao = account_dao
+        self.transaction_dao = transaction_dao
+        self.currency_service = currency_service
+
+    def preview(self, amount: Money, account_id: int) -> AllocationPlan:
+        """Computes the split of an amount across the active goals without writing anything."""
+        amount = to_money(amount)
+        if amount <= ZERO:
+            raise AllocationError("Amount to allocate must be positive.")
+        account = self.account_dao.get_account_by_id(account_id)
+        if not account:
+            raise AllocationError(f"Account with ID {account_id} not found.")
+        # What goals still need is in the base currency, so the split must be too.
+        if self.currency_service and account.currency != self.currency_service.base:
+            raise AllocationError(f"'{account.name}' is in {account.currency}; "
+                                  f"auto-allocation needs an account in {self.currency_service.base}.")
+
+        # Step 1: What each active goal still needs, from one summary query.
+        goals = [g for g in self.goal_dao.list_goals() if g.status == "Active"]
+        summaries = self.goal_service.summarize_goals(goals)
+        candidates = [g for g in goals if summaries[g.goal_id].remaining_to_save > ZERO]
+
+        # Step 2: Fill the tiers in priority order.
+        tiers: Dict[int, List] = {}
+        for goal in candidates:
+            tiers.setdefault(goal.priority, []).append(goal)
+        plan = AllocationPlan(account_id=account_id, amount=amount)
+        left = amount.paise
+        for level in sorted(tiers):
+            tier = tiers[level]
+            needs = [summaries[g.goal_id].remaining_to_save.paise for g in tier]
+            shares = split_evenly(min(left, sum(needs)), needs)
+            for goal, share in zip(tier, shares):
+                plan.allocations.append(GoalAllocation(goal.goal_id, goal.name, goal.priority,
+                                                       summaries[goal.goal_id].remaining_to_save, Money(share)))
+            left -= sum(shares)
+        plan.unallocated = Money(left)
+
+        if account.balance < plan.allocated:
+            raise AllocationError(f"Insufficient funds in '{account.name}'. "
+                                  f"Required: {plan.allocated}, Available: {account.balance}.")
+        return plan
+
+    def commit(self, plan: AllocationPlan, description: Optional[str] = None) -> Tuple[List[Transaction], Optional[Account]]:
+        """
+        Writes a previewed plan: one 'Saving' transaction per funded goal and a single
+        deduction from the account, in one backend call. Returns the transactions and
+        the account re-read with its new balance.
+        """
+        allocations = {a.goal_id: a.amount for a in plan.allocations if a.amount > ZERO}
+        if not allocations:
+            raise AllocationError("Nothing to allocate: no active goal needs savings.")
+        try:
+            transactions = self.transaction_dao.allocate_to_goals(plan.account_id, allocations, description)
+        except Exception as e:
+            # The database function reports missing accounts and insufficient funds.
+            raise AllocationError(f"Allocation failed: {getattr(e, 'message', None) or e}") from e
+        # Re-read, so cached copies of the account see the new balance.
+        return transactions, self.account_dao.get_account_by_id(plan.account_id)
+
+    def allocate(self, amount: Money, account_id: int, description: Optional[str] = None) -> Tuple[List[Transaction], Optional[Account]]:
+        """Splits an amount across the active goals and writes it; see preview() and commit()."""
+        return self.commit(self.preview(amount, account_id), description)
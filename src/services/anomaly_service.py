@@ -0,0 +1,229 @@
+# src/services/anomaly_service.py
+import math
+import threading
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.dao.transaction_dao import TransactionDAO
+from src.models.money import Money
+from src.models.records import Transaction
+
+# Expenses are scored against their category and against their account.
+DIMENSIONS = ("category", "account")
+
+
+class AnomalyError(Exception):
+    """Custom exception for anomaly detection errors."""
+    pass
+
+
+class RunningStats:
+    """Count, mean and sum of squared deviations (paise) of one group, updated with Welford's method."""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def score(self, x: float) -> float:
+        """How many standard deviations x lies above the mean; 0 without enough spread."""
+        std = self.std()
+        return (x - self.mean) / std if std > 0 else 0.0
+
+
+def expanding_scores(
+    codes: np.ndarray, amounts: np.ndarray, prior: List[RunningStats]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scores every amount against the statistics of its group just before it (the
+    prior stats plus the earlier amounts of the batch), in one vectorized pass,
+    and folds the batch into the prior stats. codes index `prior`; amounts are in
+    chronological order. Returns the z-score, the number of earlier amounts and
+    their mean for every row.
+
+    Amounts are centred on a per-group reference (the prior mean, or the batch
+    mean of a new group) before the cumulative sums, which keeps them accurate.
+    """
+    groups = len(prior)
+    n0 = np.array([s.count for s in prior], dtype=np.float64)
+    mean0 = np.array([s.mean for s in prior], dtype=np.float64)
+    m20 = np.array([s.m2 for s in prior], dtype=np.float64)
+
+    batch_count = np.bincount(codes, minlength=groups)
+    batch_mean = np.bincount(codes, weights=amounts, minlength=groups) / np.maximum(batch_count, 1)
+    ref = np.where(n0 > 0, mean0, batch_mean)
+    d = amounts - ref[codes]
+
+    # Cumulative per-group sums of the batch, excluding each row itself.
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    group_of_start = np.zeros(len(codes), dtype=np.int64)
+    group_of_start[starts] = starts
+    first = np.maximum.accumulate(group_of_start)
+
+    def exclusive_cumsum(values: np.ndarray) -> np.ndarray:
+        sorted_values = values[order]
+        inclusive = np.cumsum(sorted_values)
+        running = inclusive - sorted_values
+        running -= np.r_[0.0, inclusive][first]
+        out = np.empty_like(running)
+        out[order] = running
+        return out
+
+    seen = exclusive_cumsum(np.ones(len(codes)))
+    count = n0[codes] + seen
+    s = exclusive_cumsum(d)
+    q = m20[codes] + exclusive_cumsum(d * d)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = ref[codes] + s / count
+        var = (q - s * s / count) / (count - 1)
+        std = np.sqrt(np.clip(var, 0, None))
+        z = np.where((count > 1) & (std > 0), (amounts - mean) / std, 0.0)
+
+    # Fold the whole batch into the prior stats.
+    total_s = np.bincount(codes, weights=d, minlength=groups)
+    total_q = m20 + np.bincount(codes, weights=d * d, minlength=groups)
+    for g in np.flatnonzero(batch_count):
+        n = n0[g] + batch_count[g]
+        prior[g].count = int(n)
+        prior[g].mean = float(ref[g] + total_s[g] / n)
+        prior[g].m2 = float(max(total_q[g] - total_s[g] ** 2 / n, 0.0))
+    return z, count, mean
+
+
+class AnomalyService:
+    """
+    Flags unusual expenses: one that lies more than `threshold` standard deviations
+    above the running mean of its category or of its account, once that group has
+    at least `min_history` earlier expenses. The running stats are kept in memory.
+    New expenses from TransactionService are scored and added in O(1); anything
+    else recorded since is folded in by refresh(), which scores a whole history in
+    one vectorized pass on first use.
+    """
+    def __init__(self, transaction_dao: TransactionDAO, threshold: float = 3.0, min_history: int = 5,
+                 max_flagged: int = 200):
+        if threshold <= 0 or min_history < 2:
+            raise AnomalyError("Threshold must be positive and min_history at least 2.")
+        self.transaction_dao = transaction_dao
+        self.threshold = threshold
+        self.min_history = min_history
+        self.max_flagged = max_flagged
+        self._stats: Dict[Tuple[str, Hashable], RunningStats] = {}
+        self._flagged: List[Dict] = []
+        self._last_transaction_id = 0
+        self._loaded = False
+        # Expenses observed directly with an id past the refresh watermark.
+        self._observed: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(t: Transaction) -> List[Tuple[str, Hashable]]:
+        keys = [("account", t.account_id)]
+        if t.category_id is not None:
+            keys.insert(0, ("category", t.category_id))
+        return keys
+
+    def _flag(self, t: Transaction, category_name: Optional[str], dimension: str, z: float, stats_mean: float) -> Dict:
+        entry = {
+            "transaction_id": t.transaction_id,
+            "transaction_date": t.transaction_date,
+            "account_id": t.account_id,
+            "category_name": category_name,
+            "description": t.description,
+            "amount": t.amount,
+            "typical_amount": Money(round(stats_mean)),
+            "flagged_by": dimension,
+            "z_score": round(float(z), 2),
+        }
+        self._flagged.append(entry)
+        if len(self._flagged) > self.max_flagged:
+            del self._flagged[0]
+        return entry
+
+    def observe(self, transaction: Transaction, category_name: Optional[str] = None) -> Optional[Dict]:
+        """
+        Scores a just-written expense against the running stats and adds it to them.
+        Returns the flag entry if it is unusual. A no-op until the first refresh.
+        """
+        if transaction is None or transaction.type != "Expense":
+            return None
+        with self._lock:
+            if not self._loaded or transaction.transaction_id <= self._last_transaction_id \
+                    or transaction.transaction_id in self._observed:
+                return None
+            self._observed.add(transaction.transaction_id)
+            return self._observe(transaction, category_name)
+
+    def _observe(self, t: Transaction, category_name: Optional[str]) -> Optional[Dict]:
+        x = float(t.amount.paise)
+        worst = None
+        for key in self._keys(t):
+            stats = self._stats.setdefault(key, RunningStats())
+            if stats.count >= self.min_history:
+                z = stats.score(x)
+                if z >= self.threshold and (worst is None or z > worst[1]):
+                    worst = (key[0], z, stats.mean)
+            stats.add(x)
+        return self._flag(t, category_name, *worst) if worst else None
+
+    def refresh(self) -> int:
+        """Folds in expenses recorded since the last refresh. Returns how many were added."""
+        with self._lock:
+            added = 0
+            for page in self.transaction_dao.iter_expenses_after(self._last_transaction_id):
+                fresh = [t for t in page if t.transaction_id not in self._observed]
+                self._score_batch(fresh)
+                self._last_transaction_id = page[-1].transaction_id
+                added += len(fresh)
+            self._observed = {i for i in self._observed if i > self._last_transaction_id}
+            self._loaded = True
+            return added
+
+    def _score_batch(self, transactions: List[Transaction]) -> None:
+        if not transactions:
+            return
+        amounts = np.array([t.amount.paise for t in transactions], dtype=np.float64)
+        worst_z = np.zeros(len(transactions))
+        worst_dim = np.full(len(transactions), -1)
+        worst_mean = np.zeros(len(transactions))
+
+        for d, dimension in enumerate(DIMENSIONS):
+            rows = [i for i, t in enumerate(transactions)
+                    if (t.category_id if dimension == "category" else t.account_id) is not None]
+            if not rows:
+                continue
+            keys = [(dimension, transactions[i].category_id if dimension == "category" else transactions[i].account_id)
+                    for i in rows]
+            index: Dict[Tuple[str, Hashable], int] = {}
+            codes = np.array([index.setdefault(key, len(index)) for key in keys], dtype=np.int64)
+            prior = [self._stats.setdefault(key, RunningStats()) for key in index]
+            z, count, mean = expanding_scores(codes, amounts[rows], prior)
+
+            rows = np.array(rows)
+            hit = (count >= self.min_history) & (z >= self.threshold) & (z > worst_z[rows])
+            worst_z[rows[hit]] = z[hit]
+            worst_dim[rows[hit]] = d
+            worst_mean[rows[hit]] = mean[hit]
+
+        for i in np.flatnonzero(worst_dim >= 0):
+            t = transactions[i]
+            self._flag(t, t.category_name, DIMENSIONS[worst_dim[i]], worst_z[i], worst_mean[i])
+
+    def flagged(self, limit: int = 20) -> List[Dict]:
+        """The most recently flagged expenses, newest first."""
+        self.refresh()
+        with self._lock:
+            return sorted(self._flagged, key=lambda e: e["transaction_id"], reverse=True)[:limit]
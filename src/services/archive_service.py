@@ -0,0 +1,178 @@
+# src/services/archive_service.py
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+from dateutil.relativedelta import relativedelta
+
+from src.dao.archive_dao import ArchiveDAO
+from src.dao.scheduler import Priority, priority
+from src.dao.transaction_archive import ArchiveFileError, TransactionArchive, month_start, next_month, to_transactions
+from src.dao.transaction_dao import TransactionDAO
+from src.models.records import Transaction, TransactionRollup
+
+
+class ArchiveError(Exception):
+    """Custom exception for transaction archive errors."""
+    pass
+
+
+class ArchiveService:
+    """
+    Keeps the transactions table small by moving closed months older than
+    `after_months` out of it. Their general incomes and expenses go to compressed
+    monthly partition files and their daily totals to rollups on the backend.
+    Goal savings and transfers always stay in the table.
+
+    Aggregate views (spending reports, balance history, reconciliation) read the
+    rollups; views that need the rows themselves read the partition files. The
+    list of archived months is cached for months_ttl seconds.
+    """
+    def __init__(self, transaction_dao: TransactionDAO, archive_dao: ArchiveDAO,
+                 archive: Optional[TransactionArchive], after_months: int = 12, months_ttl: float = 300.0):
+        if after_months < 1:
+            raise ArchiveError("Closed months must stay in the transactions table for at least one month.")
+        self.transaction_dao = transaction_dao
+        self.archive_dao = archive_dao
+        self.archive = archive
+        self.after_months = after_months
+        self.months_ttl = months_ttl
+        self._months: Optional[List[date]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def cutoff(self, today: Optional[date] = None) -> date:
+        """First month that is kept; every month before it can be archived."""
+        return month_start(today or date.today()) - relativedelta(months=self.after_months)
+
+    @priority(Priority.BULK)
+    def archive_old_months(self, today: Optional[date] = None) -> List[Dict]:
+        """
+        Archives every month before the cutoff that still has archivable transactions,
+        oldest first, one month per backend transaction. Returns a summary per month.
+        """
+        if self.archive is None:
+            raise ArchiveError("Archiving is switched off (GOAL_MANAGER_ARCHIVE_DIR=off).")
+        cutoff = self.cutoff(today)
+        oldest = self.transaction_dao.get_oldest_archivable_date(cutoff.isoformat())
+        results = []
+        try:
+            month = month_start(oldest) if oldest else cutoff
+            while month < cutoff:
+                result = self._archive_month(month)
+                if result:
+                    results.append(result)
+                month = next_month(month)
+        finally:
+            self.invalidate()
+        return results
+
+    def _archive_month(self, month: date) -> Optional[Dict]:
+        # Step 1: Read the month's archivable rows and write them to a staged partition file.
+        transactions = [t for page in self.transaction_dao.iter_archivable_pages(
+            month.isoformat(), next_month(month).isoformat()) for t in page]
+        if not transactions:
+            return None
+        try:
+            staged = self.archive.stage(month, transactions)
+        except ArchiveFileError as e:
+            raise ArchiveError(str(e)) from e
+
+        # Step 2: Move exactly those rows into the rollups; publish the file only if that succeeded.
+        try:
+            archived = self.archive_dao.archive_transactions(month, [t.transaction_id for t in transactions])
+        except Exception as e:
+            self.archive.discard(staged)
+            raise ArchiveError(f"Archiving {month:%Y-%m} failed: {getattr(e, 'message', None) or e}") from e
+        self.archive.publish(month, staged)
+        return {
+            "month": f"{month:%Y-%m}",
+            "transactions": archived,
+            "file": self.archive.path(month),
+            "bytes": os.path.getsize(self.archive.path(month)),
+        }
+
+    def archived_months(self) -> List[date]:
+        with self._lock:
+            if self._months is None or time.monotonic() - self._loaded_at > self.months_ttl:
+                self._months = [month_start(m.month) for m in self.archive_dao.list_archived_months()]
+                self._loaded_at = time.monotonic()
+            return list(self._months)
+
+    def invalidate(self) -> None:
+        """Forces the next read to reload the archived-month list, e.g. after archiving elsewhere."""
+        with self._lock:
+            self._months = None
+
+    def months_in_range(self, start_date: Optional[str], end_date: Optional[str]) -> List[date]:
+        """Archived months that overlap an (inclusive, open-ended if None) date range."""
+        first = month_start(start_date) if start_date else date.min
+        last = month_start(end_date) if end_date else date.max
+        return [m for m in self.archived_months() if first <= m <= last]
+
+    def iter_rollups(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     type: Optional[str] = None) -> Iterator[List[TransactionRollup]]:
+        """Pages of daily rollups in a date range; nothing to fetch when no archived month overlaps it."""
+        if not self.months_in_range(start_date, end_date):
+            return iter(())
+        return self.archive_dao.iter_rollups(start_date, end_date, type)
+
+    def spending_rollups(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Archived expense totals per category, account currency and day, shaped like
+        the rows of TransactionDAO.get_daily_spending_by_currency.
+        """
+        return [{
+            "category_name": r.category_name,
+            "currency": r.currency,
+            "day": r.day,
+            "total_spent": r.total.to_db(),
+        } for page in self.iter_rollups(start_date, end_date, "Expense") for r in page]
+
+    def iter_archived_pages(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        account_id: Optional[int] = None,
+        type: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[List[Transaction]]:
+        """
+        Pages of archived transactions in a date range, read from the partition files.
+        Fails before yielding anything if an archived month of the range has no file here.
+        """
+        months = self.months_in_range(start_date, end_date)
+        if not months:
+            return iter(())
+        if self.archive is None:
+            raise ArchiveError("This range includes archived months, but archiving is switched off here.")
+        missing = [f"{m:%Y-%m}" for m in months if not self.archive.has(m)]
+        if missing:
+            raise ArchiveError(f"Archived months {', '.join(missing)} have no partition file in "
+                               f"{self.archive.directory}; copy them from the machine that archived them.")
+        return self._pages(months, start_date, end_date, account_id, type, page_size)
+
+    def _pages(self, months: List[date], start_date, end_date, account_id, type, page_size) -> Iterator[List[Transaction]]:
+        for month in months:
+            try:
+                table = self.archive.scan(month, start_date, end_date, account_id, type)
+            except ArchiveFileError as e:
+                raise ArchiveError(str(e)) from e
+            for offset in range(0, table.num_rows, page_size):
+                yield to_transactions(table.slice(offset, page_size))
+
+    def status(self) -> List[Dict]:
+        """Every archived month with its transaction count and local partition file, oldest first."""
+        rows = []
+        for m in self.archive_dao.list_archived_months():
+            path = self.archive.path(month_start(m.month)) if self.archive else None
+            rows.append({
+                "month": m.month[:7],
+                "transactions": m.transaction_count,
+                "archived_at": m.archived_at,
+                "file": path if path and os.path.exists(path) else None,
+                "bytes": os.path.getsize(path) if path and os.path.exists(path) else None,
+            })
+        return rows
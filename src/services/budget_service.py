@@ -0,0 +1,127 @@
+# src/services/budget_service.py
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from src.dao.budget_dao import BudgetDAO
+from src.dao.category_dao import CategoryDAO
+from src.models.money import Money, ZERO, to_money
+from src.models.records import CategoryBudget, Record
+from src.services.currency_service import CurrencyService, currency_symbol
+
+DEFAULT_THRESHOLDS = (0.8, 1.0)
+
+
+class BudgetError(Exception):
+    """Custom exception for budget-related errors."""
+    pass
+
+
+class BudgetWarning:
+    """Returned when an expense takes a category past one of its alert thresholds."""
+    def __init__(self, category_name: str, threshold: float, spent: Money, limit: Money, currency: str = "INR"):
+        self.category_name = category_name
+        self.threshold = threshold
+        self.spent = spent
+        self.limit = limit
+        # Budgets are kept in the base currency.
+        self.currency = currency
+
+    def __str__(self) -> str:
+        cur = currency_symbol(self.currency)
+        return (f"'{self.category_name}' has reached {self.threshold:.0%} of its monthly budget "
+                f"({cur}{self.spent:,.2f} of {cur}{self.limit:,.2f}).")
+
+
+@dataclass(slots=True)
+class BudgetStatus(Record):
+    category_id: int
+    category_name: str
+    month: date
+    monthly_limit: Money
+    spent: Money
+    remaining: Money
+    percent_used: float
+
+
+def month_start(day: Optional[date] = None) -> date:
+    """First day of the month containing the given day (today by default)."""
+    day = day or date.today()
+    return day.replace(day=1)
+
+
+class BudgetService:
+    """
+    Manages per-category monthly budgets.
+    Every expense adds to a running month-to-date total per category, so a
+    budget check is one upsert and budget status is one read of the totals
+    rather than a re-aggregation of the transactions.
+    """
+    def __init__(self, budget_dao: BudgetDAO, category_dao: CategoryDAO,
+                 currency_service: Optional[CurrencyService] = None):
+        self.budget_dao = budget_dao
+        self.category_dao = category_dao
+        # Only used for the base currency alerts are formatted in.
+        self.currency_service = currency_service
+
+    def set_budget(self, category_name: str, monthly_limit: Money,
+                   alert_thresholds: Sequence[float] = DEFAULT_THRESHOLDS) -> CategoryBudget:
+        """Sets the monthly limit of a category, creating the category if needed."""
+        monthly_limit = to_money(monthly_limit)
+        if monthly_limit <= ZERO:
+            raise BudgetError("Monthly limit must be positive.")
+        if not category_name:
+            raise BudgetError("Category name is required.")
+        thresholds = sorted(float(t) for t in alert_thresholds)
+        if not thresholds or thresholds[0] <= 0:
+            raise BudgetError("Alert thresholds must be positive fractions of the limit (e.g. 0.8, 1.0).")
+        category = self.category_dao.get_or_create_category(category_name)
+        budget = self.budget_dao.set_budget(category.category_id, monthly_limit, thresholds)
+        budget.category_name = category.name
+        return budget
+
+    def remove_budget(self, category_name: str) -> None:
+        category = self.category_dao.get_or_create_category(category_name)
+        self.budget_dao.delete_budget(category.category_id)
+
+    def get_budget_status(self, month: Optional[date] = None) -> List[BudgetStatus]:
+        """Month-to-date spend against the limit of every budgeted category."""
+        month = month_start(month)
+        statuses = []
+        for budget in self.budget_dao.list_budgets_with_totals(month):
+            statuses.append(BudgetStatus(
+                category_id=budget.category_id,
+                category_name=budget.category_name,
+                month=month,
+                monthly_limit=budget.monthly_limit,
+                spent=budget.spent,
+                remaining=budget.monthly_limit - budget.spent,
+                percent_used=round(budget.spent.ratio(budget.monthly_limit) * 100, 2),
+            ))
+        return sorted(statuses, key=lambda s: s.percent_used, reverse=True)
+
+    def record_spend(self, category_id: int, category_name: str, amount: Money,
+                     day: Optional[date] = None) -> List[BudgetWarning]:
+        """
+        Adds an expense to the category's running total and returns a BudgetWarning
+        for every alert threshold the expense crosses.
+        """
+        budget = self.budget_dao.add_to_monthly_total(category_id, month_start(day), amount)
+        if not budget:
+            return []
+        currency = self.currency_service.base if self.currency_service else "INR"
+        before = budget.spent - amount
+        alerts = []
+        for threshold in budget.alert_thresholds:
+            line = budget.monthly_limit.paise * threshold
+            if before.paise < line <= budget.spent.paise:
+                alerts.append(BudgetWarning(category_name, threshold, budget.spent, budget.monthly_limit, currency))
+        return alerts
+
+    def record_spends(self, spends: Dict[int, Money], names: Dict[int, str],
+                      day: Optional[date] = None) -> List[BudgetWarning]:
+        """Adds the per-category sums of a batch, one total update per category, and returns their alerts."""
+        alerts = []
+        for category_id, amount in spends.items():
+            alerts.extend(self.record_spend(category_id, names[category_id], amount, day))
+        return alerts
@@ -0,0 +1,121 @@
+# src/services/cash_flow_service.py
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.dao.account_dao import AccountDAO
+from src.dao.recurring_transaction_dao import RecurringTransactionDAO
+from src.models.money import Money, ZERO, to_money
+from src.models.records import BALANCE_EFFECT, RecurringTransaction
+from src.services.recurrence import FREQUENCIES, next_occurrence, within_limits
+
+# Frequencies with a fixed step in days; the rest move by calendar months.
+_FIXED_STEP_DAYS = {"daily": 1, "weekly": 7, "biweekly": 14}
+
+
+class CashFlowError(Exception):
+    """Custom exception for cash-flow forecast errors."""
+    pass
+
+
+def occurrence_offsets(rule: RecurringTransaction, today: date, horizon_days: int) -> np.ndarray:
+    """
+    Day offsets from today of a rule's occurrences within the horizon.
+    Overdue occurrences that have not been processed yet land on day 0.
+    """
+    first = rule.next_due_date
+    if first is None:
+        return np.empty(0, dtype=np.int64)
+    remaining = None if rule.max_occurrences is None else rule.max_occurrences - rule.occurrence_count
+    last_day = today + timedelta(days=horizon_days)
+    if rule.end_date is not None:
+        last_day = min(last_day, rule.end_date)
+
+    step = _FIXED_STEP_DAYS.get(rule.frequency)
+    if step:
+        offsets = np.arange((first - today).days, (last_day - today).days + 1, step, dtype=np.int64)
+    else:
+        days = []
+        due, count = first, rule.occurrence_count
+        while due <= last_day and within_limits(rule, due, count):
+            days.append((due - today).days)
+            due, count = next_occurrence(rule, due), count + 1
+        offsets = np.array(days, dtype=np.int64)
+    if remaining is not None:
+        offsets = offsets[:max(remaining, 0)]
+    return np.maximum(offsets, 0)
+
+
+class CashFlowService:
+    """
+    Projects daily balances of every account from its current balance and the
+    scheduled recurring incomes and expenses. All occurrences are scattered into
+    an accounts x days matrix and turned into balances with one cumulative sum.
+    """
+    def __init__(self, account_dao: AccountDAO, recurring_dao: RecurringTransactionDAO):
+        self.account_dao = account_dao
+        self.recurring_dao = recurring_dao
+
+    def forecast(self, horizon_days: int = 365, threshold: Money = ZERO, today: Optional[date] = None) -> Dict:
+        """
+        Returns the projected closing balance of each account for every day from
+        today to today + horizon_days, and per account the lowest point and the
+        first date the balance drops below the threshold.
+        """
+        if horizon_days < 1:
+            raise CashFlowError("Horizon must be at least one day.")
+        threshold = to_money(threshold)
+        today = today or date.today()
+
+        # Step 1: Current balances, one row per account.
+        accounts = self.account_dao.list_accounts()
+        row_of = {acc.account_id: i for i, acc in enumerate(accounts)}
+        opening = np.array([acc.balance.paise for acc in accounts], dtype=np.int64)
+
+        # Step 2: Expand every rule into (row, day, signed amount) triples.
+        rows: List[np.ndarray] = []
+        days: List[np.ndarray] = []
+        amounts: List[np.ndarray] = []
+        for rule in self.recurring_dao.list_active_recurring_transactions():
+            if rule.account_id not in row_of or rule.frequency not in FREQUENCIES:
+                continue
+            offsets = occurrence_offsets(rule, today, horizon_days)
+            if not offsets.size:
+                continue
+            rows.append(np.full(offsets.size, row_of[rule.account_id], dtype=np.int64))
+            days.append(offsets)
+            amounts.append(np.full(offsets.size, rule.amount.paise * BALANCE_EFFECT.get(rule.type, 0), dtype=np.int64))
+
+        # Step 3: Scatter the flows into the matrix and accumulate per account.
+        flows = np.zeros((len(accounts), horizon_days + 1), dtype=np.int64)
+        if rows:
+            np.add.at(flows, (np.concatenate(rows), np.concatenate(days)), np.concatenate(amounts))
+        balances = opening[:, None] + np.cumsum(flows, axis=1)
+
+        # Step 4: Lowest point and first breach of the threshold per account.
+        below = balances < threshold.paise
+        first_below = np.where(below.any(axis=1), below.argmax(axis=1), -1)
+        lowest = balances.argmin(axis=1) if accounts else np.empty(0, dtype=np.int64)
+
+        dates = [today + timedelta(days=i) for i in range(horizon_days + 1)]
+        summaries = []
+        for i, acc in enumerate(accounts):
+            summaries.append({
+                "account_id": acc.account_id,
+                "account_name": acc.name,
+                "balance": acc.balance,
+                "projected_balance": Money(int(balances[i, -1])),
+                "lowest_balance": Money(int(balances[i, lowest[i]])),
+                "lowest_balance_date": dates[lowest[i]],
+                "first_below_threshold": dates[first_below[i]] if first_below[i] >= 0 else None,
+            })
+        return {
+            "start_date": today,
+            "horizon_days": horizon_days,
+            "threshold": threshold,
+            "accounts": summaries,
+            "dates": dates,
+            # Paise per account (rows, in the order of "accounts") and day (columns).
+            "daily_balances": balances,
+        }
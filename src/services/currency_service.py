@@ -0,0 +1,92 @@
+# src/services/currency_service.py
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.dao.account_dao import AccountDAO
+from src.dao.fx_rates import FxRateError, FxRates, to_days
+from src.models.money import Money
+from src.models.records import Account, Transaction
+
+CURRENCY_SYMBOLS = {"INR": "₹", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥", "AUD": "A$", "CAD": "C$", "SGD": "S$"}
+
+
+class CurrencyError(Exception):
+    """Custom exception for currency conversion errors."""
+    pass
+
+
+def currency_symbol(currency: str) -> str:
+    return CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+
+
+class CurrencyService:
+    """
+    Converts amounts held in account currencies into the base currency, using the
+    rates of the day each amount refers to. Conversions work on whole arrays, so
+    totals over many accounts and long histories cost a few vectorized lookups.
+    """
+    def __init__(self, account_dao: AccountDAO, fx_rates: FxRates):
+        self.account_dao = account_dao
+        self.fx_rates = fx_rates
+
+    @property
+    def base(self) -> str:
+        return self.fx_rates.base
+
+    def currencies(self) -> List[str]:
+        """Currencies accounts can be opened in: the base and every currency with rates."""
+        return self.fx_rates.currencies()
+
+    def validate(self, currency: str) -> str:
+        currency = (currency or self.base).upper()
+        if not self.fx_rates.supports(currency):
+            raise CurrencyError(f"No exchange rates for '{currency}'. Known currencies: {', '.join(self.currencies())}.")
+        return currency
+
+    def account_currencies(self) -> Dict[int, str]:
+        return {acc.account_id: acc.currency for acc in self.account_dao.list_accounts()}
+
+    def convert(self, paise: Sequence[int], currencies: Sequence[str], days: np.ndarray) -> np.ndarray:
+        """Base-currency paise of amounts in the given currencies on the given days (days since epoch)."""
+        try:
+            return self.fx_rates.convert(paise, currencies, days)
+        except FxRateError as e:
+            raise CurrencyError(str(e)) from e
+
+    def to_base(self, amount: Money, currency: str, day: Optional[date] = None) -> Money:
+        """One amount in the base currency, at the rate of the given day (today by default)."""
+        return Money(int(self.convert([amount.paise], [currency], to_days([day]))[0]))
+
+    def accounts_total(self, accounts: List[Account], day: Optional[date] = None) -> Money:
+        """Sum of the account balances in the base currency, at the rates of the given day."""
+        converted = self.convert([acc.balance.paise for acc in accounts], [acc.currency for acc in accounts],
+                                 to_days([day] * len(accounts)))
+        return Money(int(converted.sum()))
+
+    def transactions_in_base(self, transactions: Sequence[Transaction],
+                             by_account: Optional[Dict[int, str]] = None) -> np.ndarray:
+        """
+        Amounts (paise) of transactions in the base currency, each at the rate of its
+        own date. by_account (account id -> currency) saves a lookup when converting
+        many pages.
+        """
+        paise = np.array([t.amount.paise for t in transactions], dtype=np.int64)
+        by_account = self.account_currencies() if by_account is None else by_account
+        currencies = [by_account.get(t.account_id, self.base) for t in transactions]
+        if all(c == self.base for c in currencies):
+            return paise
+        return self.convert(paise, currencies, to_days(t.transaction_date for t in transactions))
+
+    def is_single_currency(self) -> bool:
+        """Whether every account is held in the base currency, so no conversion is needed."""
+        return all(c == self.base for c in self.account_currencies().values())
+
+
+def amounts_in_base(transactions: Sequence[Transaction], currency_service: Optional[CurrencyService],
+                    by_account: Optional[Dict[int, str]] = None) -> np.ndarray:
+    """Transaction amounts (paise), converted to the base currency when a currency service is given."""
+    if currency_service is None:
+        return np.array([t.amount.paise for t in transactions], dtype=np.int64)
+    return currency_service.transactions_in_base(transactions, by_account)
@@ -1,7 +1,11 @@
 # src/services/debt_service.py
-from typing import List, Dict, Optional
+from typing import List, Optional
+import pyarrow as pa
 from src.dao.debt_dao import DebtDAO
 from src.dao.account_dao import AccountDAO
+from src.models.money import Money, to_money
+from src.models.records import Debt
+from src.dao.unit_of_work import unit_of_work
 from src.services.transaction_service import TransactionService, TransactionError
 
 class DebtError(Exception):
@@ -17,25 +21,32 @@ class DebtService:
         self.account_dao = account_dao
         self.transaction_service = transaction_service
 
-    def add_debt(self, name: str, total_amount: float, monthly_emi: Optional[float] = None) -> Optional[Dict]:
+    def add_debt(self, name: str, total_amount: Money, monthly_emi: Optional[Money] = None) -> Optional[Debt]:
         """Creates a new debt record."""
-        return self.debt_dao.create_debt(name, total_amount, monthly_emi)
+        return self.debt_dao.create_debt(name, to_money(total_amount), to_money(monthly_emi))
 
-    def list_debts(self) -> List[Dict]:
+    def list_debts(self) -> List[Debt]:
         """Lists all current debts."""
         return self.debt_dao.list_debts()
 
+    def list_debts_arrow(self) -> pa.Table:
+        """Lists all debts as an Arrow table (one column per Debt field), for display."""
+        return self.debt_dao.list_debts_arrow()
+
     # UPDATED: This method is now used by the recurring transaction service
-    def make_payment(self, debt_id: int, amount: float) -> Optional[Dict]:
+    @unit_of_work()
+    def make_payment(self, debt_id: int, amount: Money) -> Optional[Debt]:
         """Internal method to reduce debt balance."""
         debt = self.debt_dao.get_debt_by_id(debt_id)
         if not debt:
             raise DebtError(f"Debt with ID {debt_id} not found.")
-        new_remaining_amount = debt['remaining_amount'] - amount
+        new_remaining_amount = debt.remaining_amount - to_money(amount)
         return self.debt_dao.update_debt_balance(debt_id, new_remaining_amount)
 
     # NEW METHOD: For handling manual payments from the user
-    def make_manual_payment(self, debt_id: int, account_id: int, amount: float) -> Dict:
+    # One unit of work: the account and debt changes are committed together at the end.
+    @unit_of_work()
+    def make_manual_payment(self, debt_id: int, account_id: int, amount: Money) -> Debt:
         """
         Processes a manual payment for a debt.
         1. Logs an expense transaction from the specified account.
@@ -43,6 +54,7 @@ class DebtService:
         """
         # The transaction service already checks for sufficient funds and updates the account balance.
         # We will log this payment under a specific category.
+        amount = to_money(amount)
         payment_description = f"Payment for debt ID {debt_id}"
         self.transaction_service.add_expense(amount, "Debt Payment", account_id, payment_description)
 
@@ -50,23 +62,23 @@ class DebtService:
         updated_debt = self.make_payment(debt_id, amount)
         return updated_debt
 
-    def update_debt_details(self, debt_id: int, **kwargs) -> Optional[Dict]:
+    @unit_of_work()
+    def update_debt_details(self, debt_id: int, **kwargs) -> Optional[Debt]:
         """Updates a debt's details."""
         current_debt = self.debt_dao.get_debt_by_id(debt_id)
         if not current_debt:
             raise DebtError(f"Debt with ID {debt_id} not found.")
         updates = {}
-        new_total_amount = kwargs.get("total_amount")
+        new_total_amount = to_money(kwargs.get("total_amount"))
         if new_total_amount is not None:
-            old_total_amount = current_debt.get("total_amount", 0.0)
-            difference = new_total_amount - old_total_amount
-            new_remaining_amount = current_debt.get("remaining_amount", 0.0) + difference
+            difference = new_total_amount - current_debt.total_amount
+            new_remaining_amount = current_debt.remaining_amount + difference
             updates["total_amount"] = new_total_amount
             updates["remaining_amount"] = new_remaining_amount
         if kwargs.get("name") is not None and kwargs.get("name"):
             updates["name"] = kwargs["name"]
         if kwargs.get("monthly_emi") is not None:
-            updates["monthly_emi"] = kwargs["monthly_emi"]
+            updates["monthly_emi"] = to_money(kwargs["monthly_emi"])
         if not updates:
             return current_debt
         return self.debt_dao.update_debt(debt_id, updates)  
\ No newline at end of file
@@ -0,0 +1,120 @@
+# src/services/duplicate_service.py
+import hashlib
+import re
+import threading
+import unicodedata
+from datetime import date
+from typing import Dict, List, Optional, Set, Union
+
+from src.dao.transaction_dao import TransactionDAO
+from src.models.money import Money
+from src.models.records import Transaction
+
+_NON_ALNUM = re.compile(r"[^\w]+")
+
+# Only general incomes and expenses are fingerprinted: goal savings and transfer
+# legs are deliberate moves between the user's own pots and may repeat.
+FINGERPRINTED_TYPES = ("Expense", "Income")
+
+
+def normalize_description(description: Optional[str]) -> str:
+    """Case, width, punctuation and spacing differences of a description do not count."""
+    text = unicodedata.normalize("NFKC", description or "").casefold()
+    return " ".join(_NON_ALNUM.sub(" ", text).replace("_", " ").split())
+
+
+def fingerprint(account_id: int, amount: Money, type: str, day: Union[date, str], description: Optional[str]) -> str:
+    """Duplicate-detection key of a transaction: a hash of its account, type, amount, day and description."""
+    day = day.isoformat() if isinstance(day, date) else str(day)[:10]
+    key = f"{account_id}|{type}|{amount.paise}|{day}|{normalize_description(description)}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def fingerprint_of(t: Transaction) -> str:
+    """The stored fingerprint of a transaction, or the one computed from its columns."""
+    return t.fingerprint or fingerprint(t.account_id, t.amount, t.type, t.transaction_date or date.today(), t.description)
+
+
+def is_fingerprint_violation(error: Exception) -> bool:
+    """Whether a backend error is the unique fingerprint index rejecting a duplicate."""
+    return "transactions_fingerprint_key" in str(getattr(error, "message", None) or error)
+
+
+class DuplicateService:
+    """
+    Keeps the fingerprints of the ledger in an in-memory hash set, so batch paths
+    check each row for a duplicate in O(1) before writing anything. The set is
+    loaded on first use and extended with only the transactions recorded since.
+    Single writes rely on the backend's unique index instead of a round trip here.
+    """
+    def __init__(self, transaction_dao: TransactionDAO):
+        self.transaction_dao = transaction_dao
+        self._seen: Set[str] = set()
+        self._last_transaction_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Adds the fingerprints of transactions recorded since the last refresh. Returns how many."""
+        with self._lock:
+            added = 0
+            for page in self.transaction_dao.iter_fingerprints_after(self._last_transaction_id,
+                                                                        list(FINGERPRINTED_TYPES)):
+                self._seen.update(fingerprint_of(t) for t in page)
+                self._last_transaction_id = page[-1].transaction_id
+                added += len(page)
+            return added
+
+    def find_duplicates(self, fingerprints: List[str]) -> List[bool]:
+        """
+        Flags each fingerprint that is already in the ledger or appears earlier in
+        the list itself.
+        """
+        self.refresh()
+        batch: Set[str] = set()
+        flags = []
+        with self._lock:
+            for fp in fingerprints:
+                flags.append(fp in self._seen or fp in batch)
+                batch.add(fp)
+        return flags
+
+    def add(self, fingerprints: List[Optional[str]]) -> None:
+        """Records the fingerprints of just-written transactions."""
+        with self._lock:
+            self._seen.update(fp for fp in fingerprints if fp)
+
+    def scan(self) -> List[Dict]:
+        """
+        Finds every group of duplicate transactions in the whole ledger, in one pass
+        that also reloads the hash set. Deliberate repeats are reported too: their
+        fingerprint is computed from their columns.
+        """
+        # Computed fingerprint -> id of its first transaction; groups only for repeats.
+        first: Dict[str, int] = {}
+        groups: Dict[str, Dict] = {}
+        seen: Set[str] = set()
+        last_id = 0
+        for page in self.transaction_dao.iter_fingerprints_after(0, list(FINGERPRINTED_TYPES)):
+            for t in page:
+                seen.add(fingerprint_of(t))
+                # Keyed by the computed fingerprint, so rows saved without one are matched too.
+                key = fingerprint(t.account_id, t.amount, t.type, t.transaction_date or date.today(), t.description)
+                if key not in first:
+                    first[key] = t.transaction_id
+                    continue
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {
+                        "account_id": t.account_id,
+                        "type": t.type,
+                        "amount": t.amount,
+                        "date": str(t.transaction_date or "")[:10],
+                        "description": t.description,
+                        "transaction_ids": [first[key]],
+                    }
+                group["transaction_ids"].append(t.transaction_id)
+            last_id = page[-1].transaction_id
+        with self._lock:
+            self._seen = seen
+            self._last_transaction_id = last_id
+        return list(groups.values())
@@ -0,0 +1,126 @@
+# src/services/export_service.py
+import csv
+import itertools
+import time
+from typing import Dict, IO, List, Optional
+
+from src.dao.transaction_dao import TransactionDAO
+from src.dao.scheduler import Priority, priority
+from src.models.records import Transaction
+from src.services.archive_service import ArchiveError, ArchiveService
+
+# Column order of every exported row.
+EXPORT_COLUMNS = [
+    "transaction_id", "transaction_date", "type", "amount", "description",
+    "account_id", "account_name", "category_name", "goal_id", "goal_name",
+]
+
+
+class ExportError(Exception):
+    """Custom exception for export-related errors."""
+    pass
+
+
+def _flatten(t: Transaction) -> Dict:
+    """Flattens a transaction and its joined names into plain columns."""
+    return {
+        "transaction_id": t.transaction_id,
+        "transaction_date": t.transaction_date,
+        "type": t.type,
+        "amount": t.amount.to_decimal(),
+        "description": t.description,
+        "account_id": t.account_id,
+        "account_name": t.account_name,
+        "category_name": t.category_name,
+        "goal_id": t.goal_id,
+        "goal_name": t.goal_name,
+    }
+
+
+class ExportService:
+    """
+    Streams the transaction ledger to CSV or Parquet one page at a time,
+    so memory stays bounded by the page size rather than the ledger size.
+    Archived transactions in the range are read from their partition files first.
+    """
+    FORMATS = ("csv", "parquet")
+
+    def __init__(self, transaction_dao: TransactionDAO, page_size: int = 5000,
+                 archive_service: Optional[ArchiveService] = None):
+        self.transaction_dao = transaction_dao
+        self.page_size = page_size
+        self.archive_service = archive_service
+
+    @priority(Priority.BULK)
+    def export_transactions(
+        self,
+        output: IO,
+        fmt: str = "csv",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        account_id: Optional[int] = None,
+    ) -> Dict:
+        """
+        Writes transactions to an open file object and returns export statistics.
+        CSV needs a text-mode file, Parquet a binary one.
+        """
+        if fmt not in self.FORMATS:
+            raise ExportError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(self.FORMATS)}.")
+
+        pages = self.transaction_dao.iter_transaction_pages(start_date, end_date, account_id, self.page_size)
+        started = time.perf_counter()
+        try:
+            if self.archive_service:
+                pages = itertools.chain(self.archive_service.iter_archived_pages(
+                    start_date, end_date, account_id, page_size=self.page_size), pages)
+            if fmt == "csv":
+                rows = self._write_csv(output, pages)
+            else:
+                rows = self._write_parquet(output, pages)
+        except ArchiveError as e:
+            raise ExportError(str(e)) from e
+        elapsed = time.perf_counter() - started
+
+        return {
+            "format": fmt,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else float(rows),
+        }
+
+    def _write_csv(self, output: IO, pages) -> int:
+        writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        rows = 0
+        for page in pages:
+            writer.writerows(_flatten(row) for row in page)
+            rows += len(page)
+        return rows
+
+    def _write_parquet(self, output: IO, pages) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportError("Parquet export requires the 'pyarrow' package.")
+
+        schema = pa.schema([
+            ("transaction_id", pa.int64()),
+            ("transaction_date", pa.string()),
+            ("type", pa.string()),
+            ("amount", pa.decimal128(18, 2)),
+            ("description", pa.string()),
+            ("account_id", pa.int64()),
+            ("account_name", pa.string()),
+            ("category_name", pa.string()),
+            ("goal_id", pa.int64()),
+            ("goal_name", pa.string()),
+        ])
+        rows = 0
+        # Each page becomes its own row group, so nothing beyond one page is held in memory.
+        with pq.ParquetWriter(output, schema, compression="zstd") as writer:
+            for page in pages:
+                flat: List[Dict] = [_flatten(row) for row in page]
+                writer.write_table(pa.Table.from_pylist(flat, schema=schema))
+                rows += len(page)
+        return rows
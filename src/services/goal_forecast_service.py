@@ -0,0 +1,208 @@
+# src/services/goal_forecast_service.py
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.dao.goal_dao import GoalDAO
+from src.dao.transaction_dao import TransactionDAO
+from src.dao.recurring_transaction_dao import RecurringTransactionDAO
+from src.models.money import ZERO
+from src.models.records import Goal
+from src.services.recurrence import FREQUENCY_DAYS
+from src.services.currency_service import CurrencyService, amounts_in_base
+
+# Upper bound on the number of simulated deposits per run, keeps memory per goal bounded.
+MAX_SIMULATED_DEPOSITS = 240
+
+
+class GoalForecastError(Exception):
+    """Custom exception for goal forecasting errors."""
+    pass
+
+
+def _simulate_completion(
+    remaining: int, gaps: np.ndarray, amounts: np.ndarray, n_simulations: int, seed: int
+) -> Dict:
+    """
+    Bootstraps future deposits from the historical (gap, amount) pairs and returns the
+    P10/P50/P90 number of days until the remaining amount (in paise) is saved.
+    Runs in a worker process, so it only deals with plain values and arrays.
+    """
+    rng = np.random.default_rng(seed)
+    mean_amount = float(amounts.mean())
+    max_deposits = int(min(MAX_SIMULATED_DEPOSITS, np.ceil(remaining / mean_amount * 3) + 1))
+
+    # Every row is one simulated future: a sequence of sampled deposits.
+    picks = rng.integers(0, len(amounts), size=(n_simulations, max_deposits))
+    cumulative_saved = np.cumsum(amounts[picks], axis=1)
+    cumulative_days = np.cumsum(gaps[picks], axis=1)
+
+    reached = cumulative_saved >= remaining
+    completed = reached.any(axis=1)
+    first_hit = reached.argmax(axis=1)
+    days = cumulative_days[np.arange(n_simulations), first_hit].astype(float)
+    days[~completed] = np.nan
+
+    completion_rate = float(completed.mean())
+    if completion_rate == 0:
+        return {"completion_rate": 0.0, "p10_days": None, "p50_days": None, "p90_days": None}
+    p10, p50, p90 = np.nanpercentile(days, [10, 50, 90])
+    return {
+        "completion_rate": completion_rate,
+        "p10_days": int(round(p10)),
+        "p50_days": int(round(p50)),
+        "p90_days": int(round(p90)),
+    }
+
+
+class GoalForecastService:
+    """
+    Estimates goal completion dates with Monte Carlo simulations of the saving cadence.
+    Simulations run on a process pool and results are cached per goal until that
+    goal gets a new allocation, detected from its latest Saving transaction ID.
+    """
+    def __init__(
+        self,
+        goal_dao: GoalDAO,
+        transaction_dao: TransactionDAO,
+        recurring_dao: RecurringTransactionDAO,
+        n_simulations: int = 10_000,
+        max_workers: Optional[int] = None,
+        currency_service: Optional[CurrencyService] = None,
+    ):
+        self.goal_dao = goal_dao
+        self.transaction_dao = transaction_dao
+        self.recurring_dao = recurring_dao
+        self.n_simulations = n_simulations
+        self.max_workers = max_workers
+        # Savings from accounts in other currencies count at their base-currency value.
+        self.currency_service = currency_service
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache: Dict[int, Tuple[Tuple, Future, date]] = {}
+        # Keys of goals found to lack saving history, so they are not re-fetched until the key changes.
+        self._no_history: Dict[int, Tuple] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _recurring_income_gap(self, account_ids: List[int]) -> Optional[float]:
+        """Returns the shortest cadence (in days) of recurring income into the given accounts."""
+        gaps = [
+            FREQUENCY_DAYS.get(rt.frequency, 30)
+            for rt in self.recurring_dao.list_active_recurring_transactions()
+            if rt.type == "Income" and rt.account_id in account_ids
+        ]
+        return float(min(gaps)) if gaps else None
+
+    def _build_inputs(self, goal: Goal) -> Tuple[int, np.ndarray, np.ndarray, date]:
+        """Collects the remaining amount (in paise) and historical saving cadence for a goal."""
+        transactions = self.transaction_dao.get_transactions_by_goal_id(goal.goal_id)
+        savings = [t for t in transactions if t.type == "Saving"]
+        budget = goal.budget or ZERO
+        amounts = amounts_in_base(savings, self.currency_service).astype(float)
+        remaining = budget.paise - int(amounts.sum())
+
+        dates = [date.fromisoformat(t.transaction_date[:10]) for t in savings]
+        start = dates[-1] if dates else date.today()
+
+        if len(savings) >= 2:
+            gaps = np.maximum(np.diff(np.array(dates, dtype="datetime64[D]")).astype(float), 1.0)
+            return remaining, gaps, amounts[1:], start
+
+        # Not enough history: fall back to the cadence of recurring income into the funding accounts.
+        gap = self._recurring_income_gap([t.account_id for t in savings])
+        if not savings or gap is None:
+            raise GoalForecastError(f"Not enough saving history to forecast goal '{goal.name}'.")
+        return remaining, np.array([gap]), amounts, start
+
+    def schedule_forecast(self, goal: Goal, latest_saving_ids: Optional[Dict[int, int]] = None) -> None:
+        """
+        Submits a forecast for a goal to the process pool unless an up-to-date
+        result (or pending run) is already cached. Returns immediately.
+        latest_saving_ids can be passed in when scheduling many goals at once.
+        """
+        # Step 1: Check the cache against a cheap key. Saving IDs only grow, so the key
+        # changes whenever the goal gets a new allocation or its budget is edited.
+        if latest_saving_ids is None:
+            latest_saving_ids = self.transaction_dao.get_latest_saving_ids([goal.goal_id])
+        fingerprint = (goal.budget or ZERO, latest_saving_ids.get(goal.goal_id))
+        with self._lock:
+            cached = self._cache.get(goal.goal_id)
+            if cached and cached[0] == fingerprint:
+                return
+            if self._no_history.get(goal.goal_id) == fingerprint:
+                raise GoalForecastError(f"Not enough saving history to forecast goal '{goal.name}'.")
+
+        # Step 2: Only a changed key pays for the goal's transaction history.
+        try:
+            remaining, gaps, amounts, start = self._build_inputs(goal)
+        except GoalForecastError:
+            with self._lock:
+                self._no_history[goal.goal_id] = fingerprint
+            raise
+        with self._lock:
+            if remaining <= 0:
+                future: Future = Future()
+                future.set_result({"completion_rate": 1.0, "p10_days": 0, "p50_days": 0, "p90_days": 0})
+            else:
+                future = self._get_executor().submit(
+                    _simulate_completion, remaining, gaps, amounts, self.n_simulations, goal.goal_id
+                )
+            self._cache[goal.goal_id] = (fingerprint, future, start)
+
+    def get_forecast(self, goal_id: int) -> Optional[Dict]:
+        """
+        Returns the cached forecast for a goal, or None while it is still running
+        (or was never scheduled). Never blocks.
+        """
+        with self._lock:
+            cached = self._cache.get(goal_id)
+        if not cached or not cached[1].done():
+            return None
+        _, future, start = cached
+        result = dict(future.result())
+        for key in ("p10", "p50", "p90"):
+            days = result.pop(f"{key}_days")
+            result[f"{key}_date"] = (start + timedelta(days=days)).isoformat() if days is not None else None
+        result["goal_id"] = goal_id
+        result["simulations"] = self.n_simulations
+        return result
+
+    def forecast_goal(self, goal_id: int) -> Dict:
+        """Schedules a forecast for a single goal and waits for the result."""
+        goal = self.goal_dao.get_goal_by_id(goal_id)
+        if not goal:
+            raise GoalForecastError(f"Goal with ID {goal_id} not found.")
+        self.schedule_forecast(goal)
+        with self._lock:
+            _, future, _ = self._cache[goal_id]
+        future.result()
+        return self.get_forecast(goal_id)
+
+    def forecast_active_goals(self, wait: bool = False) -> List[Dict]:
+        """
+        Spreads forecasts for every active goal across the process pool.
+        With wait=False only the results that are already available are returned.
+        """
+        goal_ids = []
+        active = [goal for goal in self.goal_dao.list_goals() if goal.status == "Active"]
+        latest_saving_ids = self.transaction_dao.get_latest_saving_ids([goal.goal_id for goal in active])
+        for goal in active:
+            try:
+                self.schedule_forecast(goal, latest_saving_ids)
+                goal_ids.append(goal.goal_id)
+            except GoalForecastError:
+                continue
+        if wait:
+            with self._lock:
+                futures = [self._cache[goal_id][1] for goal_id in goal_ids]
+            for future in futures:
+                future.result()
+        forecasts = [self.get_forecast(goal_id) for goal_id in goal_ids]
+        return [f for f in forecasts if f is not None]
@@ -69,31 +69,63 @@ class GoalService:
 '''
 # src/services/goal_service.py
 from typing import Dict, List, Optional
+import numpy as np
 from src.dao.goal_dao import GoalDAO
 from src.dao.step_dao import StepDAO
 from src.dao.transaction_dao import TransactionDAO
+from src.models.money import Money, ZERO, to_money
+from src.models.records import Goal, GoalDetails, GoalSummary, Transaction
+from src.dao.unit_of_work import unit_of_work
+from src.services.currency_service import CurrencyService, amounts_in_base
 
 class GoalError(Exception):
     """Custom exception for goal-related business logic errors."""
     pass
 
+# Goal priorities, 1 being the highest.
+PRIORITIES = (1, 2, 3, 4, 5)
+
+
+def _summarize(goal: Goal, saved_paise: int, spent_paise: int) -> GoalSummary:
+    """Financial summary of a goal from its saved and spent totals (base-currency paise)."""
+    budget = goal.budget or ZERO
+    amount_saved = Money(int(saved_paise))
+    amount_spent_on_goal = Money(int(spent_paise))
+
+    remaining_to_save = budget - amount_saved
+    progress_percentage = amount_saved.ratio(budget) * 100 if budget > ZERO else 0.0
+
+    return GoalSummary(
+        budget=budget,
+        amount_saved=amount_saved,
+        amount_spent_on_goal=amount_spent_on_goal,
+        remaining_to_save=remaining_to_save,
+        progress_percentage=round(progress_percentage, 2)
+    )
+
+
 class GoalService:
     """
     Handles the main business logic for managing goals
     and calculating their progress.
     """
     def __init__(
-        self, goal_dao: GoalDAO, step_dao: StepDAO, transaction_dao: TransactionDAO
+        self, goal_dao: GoalDAO, step_dao: StepDAO, transaction_dao: TransactionDAO,
+        currency_service: Optional[CurrencyService] = None
     ):
         self.goal_dao = goal_dao
         self.step_dao = step_dao
         self.transaction_dao = transaction_dao
+        # Converts savings from accounts in other currencies; budgets are in the base currency.
+        self.currency_service = currency_service
 
-    def create_new_goal(self, name: str, budget: Optional[float] = None) -> Dict:
+    def create_new_goal(self, name: str, budget: Optional[Money] = None, priority: int = 3) -> Goal:
         """Creates a new goal."""
-        return self.goal_dao.create_goal(name, budget)
+        if priority not in PRIORITIES:
+            raise GoalError(f"Priority must be one of {PRIORITIES}.")
+        return self.goal_dao.create_goal(name, to_money(budget), priority)
 
-    def get_goal_details(self, goal_id: int) -> Dict:
+    def get_goal_details(self, goal_id: int) -> GoalDetails:
         """
         Fetches all details for a goal, including its steps and a
         calculated financial summary.
@@ -104,37 +136,37 @@ class GoalService:
 
         steps = self.step_dao.get_steps_by_goal_id(goal_id)
         transactions = self.transaction_dao.get_transactions_by_goal_id(goal_id)
-
-        budget = goal.get("budget") or 0.0
-        amount_saved = sum(t["amount"] for t in transactions if t["type"] == 'Saving')
-        amount_spent_on_goal = sum(t["amount"] for t in transactions if t["type"] == 'Expense')
-        
-        remaining_to_save = budget - amount_saved
-        progress_percentage = (amount_saved / budget * 100) if budget > 0 else 0
-
-        goal["steps"] = steps
-        goal["financial_summary"] = {
-            "budget": budget,
-            "amount_saved": amount_saved,
-            "amount_spent_on_goal": amount_spent_on_goal,
-            "remaining_to_save": remaining_to_save,
-            "progress_percentage": f"{progress_percentage:.2f}%"
-        }
-        
-        return goal
-
-    def list_all_goals(self) -> List[Dict]:
+        amounts = amounts_in_base(transactions, self.currency_service)
+        types = np.array([t.type for t in transactions], dtype=object)
+        summary = _summarize(goal, amounts[types == 'Saving'].sum(), amounts[types == 'Expense'].sum())
+        return GoalDetails(goal=goal, steps=steps, financial_summary=summary)
+
+    def summarize_goals(self, goals: List[Goal]) -> Dict[int, GoalSummary]:
+        """Financial summaries of many goals, keyed by goal id, from a single transactions query."""
+        index = {g.goal_id: i for i, g in enumerate(goals)}
+        transactions: List[Transaction] = self.transaction_dao.get_goal_amounts(list(index))
+        amounts = amounts_in_base(transactions, self.currency_service).astype(np.float64)
+        codes = np.array([index[t.goal_id] for t in transactions], dtype=np.int64)
+        types = np.array([t.type for t in transactions], dtype=object)
+        saved = np.bincount(codes, weights=np.where(types == 'Saving', amounts, 0), minlength=len(goals))
+        spent = np.bincount(codes, weights=np.where(types == 'Expense', amounts, 0), minlength=len(goals))
+        return {g.goal_id: _summarize(g, round(saved[i]), round(spent[i])) for i, g in enumerate(goals)}
+
+    def list_all_goals(self) -> List[Goal]:
         """Returns a simple list of all goals."""
         return self.goal_dao.list_goals()
 
-    def mark_goal_as_complete(self, goal_id: int) -> Dict:
+    @unit_of_work()
+    def mark_goal_as_complete(self, goal_id: int) -> Goal:
         """Updates a goal's status to 'Completed'."""
         if not self.goal_dao.get_goal_by_id(goal_id):
             raise GoalError(f"Goal with ID {goal_id} not found.")
         return self.goal_dao.update_goal(goal_id, {"status": "Completed"})
 
-    def update_goal_details(self, goal_id: int, new_name: Optional[str] = None, new_budget: Optional[float] = None) -> Dict:
-        """Updates a goal's name and/or budget."""
+    @unit_of_work()
+    def update_goal_details(self, goal_id: int, new_name: Optional[str] = None, new_budget: Optional[Money] = None,
+                            new_priority: Optional[int] = None) -> Goal:
+        """Updates a goal's name, budget and/or priority."""
         if not self.goal_dao.get_goal_by_id(goal_id):
             raise GoalError(f"Goal with ID {goal_id} not found.")
 
@@ -142,7 +174,11 @@ class GoalService:
         if new_name:
             updates["name"] = new_name
         if new_budget is not None:
-            updates["budget"] = new_budget
+            updates["budget"] = to_money(new_budget)
+        if new_priority is not None:
+            if new_priority not in PRIORITIES:
+                raise GoalError(f"Priority must be one of {PRIORITIES}.")
+            updates["priority"] = new_priority
         
         if not updates:
             return self.goal_dao.get_goal_by_id(goal_id)
@@ -0,0 +1,176 @@
+# src/services/net_worth_service.py
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from dateutil.relativedelta import relativedelta
+
+from src.dao.account_dao import AccountDAO
+from src.dao.debt_dao import DebtDAO
+from src.dao.transaction_dao import TransactionDAO
+from src.models.money import Money
+from src.models.records import Account
+from src.dao.fx_rates import to_days
+from src.services.currency_service import CurrencyService
+from src.services.archive_service import ArchiveService
+
+HISTORY_STEPS = ("day", "week", "month")
+
+
+def _day(value) -> Optional[date]:
+    """Calendar day of a date or ISO timestamp column."""
+    return date.fromisoformat(value[:10]) if isinstance(value, str) else value
+
+
+class NetWorthError(Exception):
+    """Custom exception for balance history errors."""
+    pass
+
+
+class BalanceIndex:
+    """
+    Daily prefix sums of one account's ledger: days holds the ordinals of the days
+    with transactions and cumulative the running total (paise) at the end of each.
+    Appending a day at or after the last one is O(1); a balance lookup is a bisect.
+    """
+    __slots__ = ("days", "cumulative")
+
+    def __init__(self):
+        self.days: List[int] = []
+        self.cumulative: List[int] = []
+
+    def add(self, day: date, paise: int) -> None:
+        ordinal = day.toordinal()
+        if not self.days or ordinal > self.days[-1]:
+            self.days.append(ordinal)
+            self.cumulative.append((self.cumulative[-1] if self.cumulative else 0) + paise)
+            return
+        # Back-dated entry: shift every later prefix sum.
+        i = bisect_left(self.days, ordinal)
+        if self.days[i] != ordinal:
+            self.days.insert(i, ordinal)
+            self.cumulative.insert(i, self.cumulative[i - 1] if i else 0)
+        for j in range(i, len(self.cumulative)):
+            self.cumulative[j] += paise
+
+    def at(self, day: date) -> int:
+        """Running total at the end of the given day."""
+        i = bisect_right(self.days, day.toordinal())
+        return self.cumulative[i - 1] if i else 0
+
+
+class NetWorthService:
+    """
+    Serves historical account balances and net worth from per-account daily
+    prefix-sum indexes. Each refresh folds in only the transactions recorded
+    since the previous one, so charts never rescan the ledger. Archived months
+    are folded in once, from their daily rollups.
+    """
+    def __init__(self, account_dao: AccountDAO, transaction_dao: TransactionDAO, debt_dao: DebtDAO,
+                 currency_service: Optional[CurrencyService] = None, archive_service: Optional[ArchiveService] = None):
+        self.account_dao = account_dao
+        self.transaction_dao = transaction_dao
+        self.debt_dao = debt_dao
+        # Converts balances held in other currencies at each point's rate.
+        self.currency_service = currency_service
+        self.archive_service = archive_service
+        self._indexes: Dict[int, BalanceIndex] = {}
+        self._last_transaction_id = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Adds transactions recorded since the last refresh. Returns how many were added."""
+        with self._lock:
+            added = 0
+            if not self._loaded and self.archive_service:
+                # Archived rows left the ledger; their daily totals stand in for them.
+                for page in self.archive_service.iter_rollups():
+                    for r in page:
+                        self._indexes.setdefault(r.account_id, BalanceIndex()).add(
+                            date.fromisoformat(r.day), r.signed_total.paise)
+                    added += sum(r.transaction_count for r in page)
+            self._loaded = True
+            for page in self.transaction_dao.iter_ledger_after(self._last_transaction_id):
+                for t in page:
+                    day = _day(t.transaction_date) or date.today()
+                    self._indexes.setdefault(t.account_id, BalanceIndex()).add(day, t.signed_amount.paise)
+                self._last_transaction_id = page[-1].transaction_id
+                added += len(page)
+            return added
+
+    def balance_at(self, account_id: int, day: date) -> Money:
+        """Balance of an account at the end of the given day."""
+        account = self.account_dao.get_account_by_id(account_id)
+        if not account:
+            raise NetWorthError(f"Account with ID {account_id} not found.")
+        self.refresh()
+        with self._lock:
+            return Money(self._opening(account, day) + self._index(account_id).at(day))
+
+    def balance_history(self, start: date, end: date, step: str = "day") -> Dict:
+        """
+        Balance of every account and their total (assets) at each step from start to
+        end (inclusive), in the base currency at the rate of each point. Debts have no
+        dated history, so they are not subtracted from past points: the remaining debt
+        and net worth are reported once, as of today.
+        """
+        if step not in HISTORY_STEPS:
+            raise NetWorthError(f"Step must be one of: {', '.join(HISTORY_STEPS)}.")
+        if start > end:
+            raise NetWorthError("Start date must not be after end date.")
+        self.refresh()
+
+        # The last point is today, for the current net worth; it is not part of the series.
+        points = self._points(start, end, step)
+        days_at = points + [date.today()]
+        accounts = self.account_dao.list_accounts()
+        debt = Money.total(d.remaining_amount for d in self.debt_dao.list_debts())
+
+        series: Dict[str, List[Money]] = {}
+        totals = [0] * len(days_at)
+        days = to_days(days_at)
+        with self._lock:
+            for account in accounts:
+                index = self._index(account.account_id)
+                values = [self._opening(account, day) + index.at(day) for day in days_at]
+                if self.currency_service and account.currency != self.currency_service.base:
+                    values = self.currency_service.convert(values, [account.currency] * len(days_at), days).tolist()
+                for i, value in enumerate(values):
+                    totals[i] += value
+                series[account.name] = [Money(v) for v in values[:-1]]
+
+        return {
+            "dates": points,
+            "accounts": series,
+            "total_balance": [Money(v) for v in totals[:-1]],
+            "current_debt": debt,
+            "current_net_worth": Money(totals[-1]) - debt,
+        }
+
+    def _index(self, account_id: int) -> BalanceIndex:
+        return self._indexes.get(account_id) or BalanceIndex()
+
+    @staticmethod
+    def _opening(account: Account, day: date) -> int:
+        """The opening balance counts from the day the account was created."""
+        created = _day(account.created_at)
+        return account.opening_balance.paise if created is None or day >= created else 0
+
+    @staticmethod
+    def _points(start: date, end: date, step: str) -> List[date]:
+        points, i = [], 0
+        while True:
+            # Stepping from start each time keeps month ends stable (Jan 31 -> Feb 28 -> Mar 31).
+            if step == "month":
+                day = start + relativedelta(months=i)
+            else:
+                day = start + timedelta(days=i * (7 if step == "week" else 1))
+            if day > end:
+                break
+            points.append(day)
+            i += 1
+        if points[-1] != end:
+            points.append(end)
+        return points
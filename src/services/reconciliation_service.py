@@ -0,0 +1,107 @@
+# src/services/reconciliation_service.py
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from src.dao.account_dao import AccountDAO
+from src.dao.transaction_dao import TransactionDAO
+from src.dao.reconciliation_dao import ReconciliationDAO
+from src.dao.scheduler import Priority, priority
+from src.models.money import Money
+from src.models.records import Account, Record
+
+
+class ReconciliationError(Exception):
+    """Custom exception for reconciliation errors."""
+    pass
+
+
+@dataclass(slots=True)
+class AccountDrift(Record):
+    account_id: int
+    account_name: str
+    stored_balance: Money
+    ledger_balance: Money
+    drift: Money
+    transactions_scanned: int
+    repaired: bool = False
+
+
+def _timestamp(value: str) -> datetime:
+    """Parses a timestamptz column value; naive values are taken as UTC."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class ReconciliationService:
+    """
+    Verifies stored account balances against the transaction ledger.
+    Each run resumes from the account's last checkpoint, so it only scans
+    transactions that arrived since the previous run.
+
+    Transaction IDs are handed out at insert, not at commit, so a lower ID can
+    become visible after a higher one. The checkpoint therefore only moves past
+    transactions older than settle_seconds; newer ones are scanned again next run.
+    """
+    def __init__(self, account_dao: AccountDAO, transaction_dao: TransactionDAO, reconciliation_dao: ReconciliationDAO,
+                 settle_seconds: float = 600.0):
+        self.account_dao = account_dao
+        self.transaction_dao = transaction_dao
+        self.reconciliation_dao = reconciliation_dao
+        self.settle_seconds = settle_seconds
+
+    @priority(Priority.BACKGROUND)
+    def reconcile(self, repair: bool = False) -> List[AccountDrift]:
+        """Reconciles every account. With repair=True drifted balances are reset to the ledger."""
+        checkpoints = self.reconciliation_dao.list_checkpoints()
+        return [
+            self._reconcile(account, checkpoints.get(account.account_id), repair)
+            for account in self.account_dao.list_accounts()
+        ]
+
+    def reconcile_account(self, account_id: int, repair: bool = False) -> AccountDrift:
+        """Reconciles a single account."""
+        account = self.account_dao.get_account_by_id(account_id)
+        if not account:
+            raise ReconciliationError(f"Account with ID {account_id} not found.")
+        return self._reconcile(account, self.reconciliation_dao.get_checkpoint(account_id), repair)
+
+    def _reconcile(self, account: Account, checkpoint, repair: bool) -> AccountDrift:
+        # Step 1: Resume from the checkpoint, or from the opening balance on the first run.
+        if checkpoint:
+            last_id, ledger_balance = checkpoint.last_transaction_id, checkpoint.ledger_balance
+        else:
+            last_id, ledger_balance = 0, account.opening_balance
+
+        # Step 2: Fold in the transactions recorded after the checkpoint. The checkpoint may only
+        # move through the settled prefix: once a recent transaction is seen, a lower ID could still commit.
+        settled_before = datetime.now(timezone.utc) - timedelta(seconds=self.settle_seconds)
+        settled_id, settled_balance, settled = last_id, ledger_balance, True
+        scanned = 0
+        for page in self.transaction_dao.iter_account_transactions_after(account.account_id, last_id):
+            for t in page:
+                ledger_balance += t.signed_amount
+                settled = settled and bool(t.transaction_date) and _timestamp(t.transaction_date) < settled_before
+                if settled:
+                    settled_id, settled_balance = t.transaction_id, ledger_balance
+            scanned += len(page)
+
+        # Step 3: Store the new checkpoint and compare the whole ledger with the stored balance.
+        if settled_id != last_id or not checkpoint:
+            self.reconciliation_dao.save_checkpoint(account.account_id, settled_id, settled_balance)
+        drift = account.balance - ledger_balance
+
+        repaired = False
+        if repair and drift:
+            self.account_dao.update_account_balance(account.account_id, ledger_balance)
+            repaired = True
+
+        return AccountDrift(
+            account_id=account.account_id,
+            account_name=account.name,
+            stored_balance=account.balance,
+            ledger_balance=ledger_balance,
+            drift=drift,
+            transactions_scanned=scanned,
+            repaired=repaired,
+        )
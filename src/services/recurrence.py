@@ -0,0 +1,93 @@
+# src/services/recurrence.py
+import heapq
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+from src.models.records import RecurringTransaction
+
+# Step between occurrences of each supported frequency.
+FREQUENCIES = {
+    "daily": relativedelta(days=1),
+    "weekly": relativedelta(weeks=1),
+    "biweekly": relativedelta(weeks=2),
+    "monthly": relativedelta(months=1),
+    "quarterly": relativedelta(months=3),
+    "yearly": relativedelta(years=1),
+}
+
+# Average number of days between occurrences, for cadence estimates.
+FREQUENCY_DAYS = {
+    "daily": 1, "weekly": 7, "biweekly": 14, "monthly": 30.44, "quarterly": 91.31, "yearly": 365.25,
+}
+
+
+def next_occurrence(rule: RecurringTransaction, current: date) -> date:
+    """
+    The occurrence after `current`. Month-based rules stay on the day of their
+    start date, so a rule starting on the 31st falls on the last day of short
+    months and returns to the 31st afterwards.
+    """
+    step = FREQUENCIES.get(rule.frequency, FREQUENCIES["monthly"])
+    if step.months or step.years:
+        anchor = (rule.start_date or current).day
+        return current + step + relativedelta(day=anchor)
+    return current + step
+
+
+def within_limits(rule: RecurringTransaction, occurrence: date, count: int) -> bool:
+    """Whether the count-th occurrence (0-based) on the given date is still scheduled."""
+    if rule.max_occurrences is not None and count >= rule.max_occurrences:
+        return False
+    return rule.end_date is None or occurrence <= rule.end_date
+
+
+class ScheduleEngine:
+    """
+    Merges the occurrences of all recurring rules with a min-heap keyed on each
+    rule's next due date. The earliest due date is available in O(1) and the next
+    k occurrences across R rules cost O(k log R), with no scan of every rule.
+    """
+    def __init__(self, rules: Iterable[RecurringTransaction]):
+        self._heap: List[Tuple[date, int, int, RecurringTransaction]] = [
+            (rule.next_due_date, rule.recurring_transaction_id, rule.occurrence_count, rule)
+            for rule in rules
+            if rule.next_due_date and within_limits(rule, rule.next_due_date, rule.occurrence_count)
+        ]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_due_date(self) -> Optional[date]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, today: date) -> Optional[Tuple[date, int, RecurringTransaction]]:
+        """
+        Removes and returns the earliest occurrence due on or before today as
+        (due_date, occurrence_count, rule), re-queueing the rule's next occurrence.
+        """
+        if not self._heap or self._heap[0][0] > today:
+            return None
+        due, rule_id, count, rule = self._heap[0]
+        following = next_occurrence(rule, due)
+        if within_limits(rule, following, count + 1):
+            heapq.heapreplace(self._heap, (following, rule_id, count + 1, rule))
+        else:
+            heapq.heappop(self._heap)
+        return due, count, rule
+
+    def upcoming(self, until: date, limit: Optional[int] = None) -> List[Tuple[date, RecurringTransaction]]:
+        """Every occurrence up to and including `until`, in date order, without consuming them."""
+        heap = list(self._heap)
+        result = []
+        while heap and heap[0][0] <= until and (limit is None or len(result) < limit):
+            due, rule_id, count, rule = heap[0]
+            result.append((due, rule))
+            following = next_occurrence(rule, due)
+            if within_limits(rule, following, count + 1):
+                heapq.heapreplace(heap, (following, rule_id, count + 1, rule))
+            else:
+                heapq.heappop(heap)
+        return result
@@ -1,50 +1,152 @@
 # src/services/recurring_transaction_service.py
+import threading
+import time
 from src.dao.recurring_transaction_dao import RecurringTransactionDAO
-from src.services.transaction_service import TransactionService
+from src.services.transaction_service import DuplicateTransactionError, TransactionService
 from src.services.debt_service import DebtService, DebtError # Import DebtService
-from datetime import date
-from dateutil.relativedelta import relativedelta
+from src.services.recurrence import FREQUENCIES, ScheduleEngine, next_occurrence, within_limits
+from src.dao.scheduler import Priority, priority
+from src.models.money import Money, ZERO, to_money
+from src.models.records import RecurringTransaction
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+
+class RecurringTransactionError(Exception):
+    """Custom exception for recurring transaction errors."""
+    pass
+
 
 class RecurringTransactionService:
+    """
+    Processes recurring incomes and expenses from a ScheduleEngine, a min-heap of
+    every active rule's next occurrence. The heap is rebuilt from the database at
+    most every schedule_ttl seconds, so checking for due work is normally free.
+    """
     # UPDATED: Add DebtService
-    def __init__(self, recurring_dao: RecurringTransactionDAO, transaction_service: TransactionService, debt_service: DebtService):
+    def __init__(self, recurring_dao: RecurringTransactionDAO, transaction_service: TransactionService,
+                 debt_service: DebtService, schedule_ttl: float = 300.0):
         self.recurring_dao = recurring_dao
         self.transaction_service = transaction_service
         self.debt_service = debt_service
+        self.schedule_ttl = schedule_ttl
+        self._engine: Optional[ScheduleEngine] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _get_engine(self) -> ScheduleEngine:
+        if self._engine is None or time.monotonic() - self._loaded_at > self.schedule_ttl:
+            self._engine = ScheduleEngine(self.recurring_dao.list_active_recurring_transactions())
+            self._loaded_at = time.monotonic()
+        return self._engine
+
+    def invalidate_schedule(self) -> None:
+        """Forces the next check to reload the rules, e.g. after they changed elsewhere."""
+        with self._lock:
+            self._engine = None
+
+    def create_recurring_transaction(
+        self,
+        account_id: int,
+        amount: Money,
+        type: str,
+        start_date: date,
+        frequency: str = "monthly",
+        description: Optional[str] = None,
+        debt_id: Optional[int] = None,
+        end_date: Optional[date] = None,
+        max_occurrences: Optional[int] = None,
+    ) -> RecurringTransaction:
+        """Sets up a recurring income or expense, first due on start_date."""
+        amount = to_money(amount)
+        if frequency not in FREQUENCIES:
+            raise RecurringTransactionError(f"Frequency must be one of: {', '.join(FREQUENCIES)}.")
+        if type not in ("Income", "Expense"):
+            raise RecurringTransactionError("Type must be 'Income' or 'Expense'.")
+        if amount <= ZERO:
+            raise RecurringTransactionError("Amount must be positive.")
+        if end_date and end_date < start_date:
+            raise RecurringTransactionError("End date must not be before the start date.")
+        if max_occurrences is not None and max_occurrences < 1:
+            raise RecurringTransactionError("Occurrence limit must be at least 1.")
+        rule = self.recurring_dao.create_recurring_transaction(
+            account_id=account_id, description=description, amount=amount, type=type,
+            frequency=frequency, start_date=start_date, next_due_date=start_date, debt_id=debt_id,
+            end_date=end_date, max_occurrences=max_occurrences, occurrence_count=0,
+        )
+        self.invalidate_schedule()
+        return rule
+
+    def upcoming_payments(self, days: int = 30, today: Optional[date] = None) -> List[Dict]:
+        """Every scheduled occurrence in the next `days` days (overdue ones included), in date order."""
+        today = today or date.today()
+        with self._lock:
+            occurrences = self._get_engine().upcoming(today + timedelta(days=days))
+        return [{
+            "due_date": due,
+            "recurring_transaction_id": rule.recurring_transaction_id,
+            "description": rule.description,
+            "type": rule.type,
+            "amount": rule.amount,
+            "account_id": rule.account_id,
+            "frequency": rule.frequency,
+            "debt_id": rule.debt_id,
+        } for due, rule in occurrences]
 
     # UPDATED: This method now also handles paying down debt
-    def process_due_transactions(self):
+    # Runs as background work so it never delays interactive requests.
+    @priority(Priority.BACKGROUND)
+    def process_due_transactions(self, today: Optional[date] = None):
         """
-        Checks for and processes all recurring transactions that are due.
+        Processes every occurrence that is due, including missed ones, in date order.
         If a transaction is linked to a debt, it also pays down the debt.
         """
-        due_transactions = self.recurring_dao.get_due_transactions()
-        if not due_transactions:
-            return
-
-        print(f"\nProcessing {len(due_transactions)} due recurring transaction(s)...")
-        for rt in due_transactions:
-            try:
-                # Step 1: Log the transaction as a general income/expense
-                if rt['type'] == 'Income':
-                    self.transaction_service.add_income(rt['amount'], rt['account_id'], rt['description'])
-                elif rt['type'] == 'Expense':
-                    self.transaction_service.add_expense(rt['amount'], rt['description'], rt['account_id'], rt['description'])
-
-                # Step 2: NEW - If linked to a debt, reduce the debt balance
-                if rt.get('debt_id'):
-                    self.debt_service.make_payment(rt['debt_id'], rt['amount'])
-                    print(f"  -> Applied EMI payment to debt ID {rt['debt_id']}.")
-
-                # Step 3: Update the next_due_date
-                current_due_date = date.fromisoformat(rt['next_due_date'])
-                if rt['frequency'] == 'monthly':
-                    new_due_date = current_due_date + relativedelta(months=1)
-                else:
-                    new_due_date = current_due_date + relativedelta(months=1)
-                
-                self.recurring_dao.update_next_due_date(rt['recurring_transaction_id'], new_due_date)
-                print(f"  -> Processed '{rt['description']}'")
-            except (DebtError, Exception) as e:
-                print(f"  -> Failed to process '{rt['description']}': {e}")
-        print("...Done.\n")
\ No newline at end of file
+        today = today or date.today()
+        with self._lock:
+            engine = self._get_engine()
+            next_due = engine.next_due_date()
+            if next_due is None or next_due > today:
+                return
+
+            print("\nProcessing due recurring transaction(s)...")
+            # Rules that failed or were claimed elsewhere; their later occurrences wait for a reload.
+            skipped = set()
+            while True:
+                occurrence = engine.pop_due(today)
+                if occurrence is None:
+                    break
+                due, count, rt = occurrence
+                if rt.recurring_transaction_id in skipped:
+                    continue
+                following = next_occurrence(rt, due)
+                new_due = following if within_limits(rt, following, count + 1) else None
+
+                # Step 1: Claim the occurrence, so a concurrent process cannot log it twice
+                if not self.recurring_dao.advance_schedule(rt.recurring_transaction_id, due, new_due, count + 1):
+                    print(f"  -> Skipped '{rt.description}': already processed elsewhere.")
+                    skipped.add(rt.recurring_transaction_id)
+                    continue
+                try:
+                    # Step 2: Log the transaction as a general income/expense
+                    if rt.type == 'Income':
+                        self.transaction_service.add_income(rt.amount, rt.account_id, rt.description, fingerprint_date=due)
+                    elif rt.type == 'Expense':
+                        self.transaction_service.add_expense(rt.amount, rt.description, rt.account_id, rt.description,
+                                                             fingerprint_date=due)
+
+                    # Step 3: NEW - If linked to a debt, reduce the debt balance
+                    if rt.debt_id:
+                        self.debt_service.make_payment(rt.debt_id, rt.amount)
+                        print(f"  -> Applied EMI payment to debt ID {rt.debt_id}.")
+                    print(f"  -> Processed '{rt.description}' due {due}")
+                except DuplicateTransactionError:
+                    # The rule already fired for this date; keep the claim so it is not retried.
+                    print(f"  -> Skipped '{rt.description}' due {due}: already recorded.")
+                except (DebtError, Exception) as e:
+                    # Release the claim so the occurrence is retried on the next run.
+                    self.recurring_dao.advance_schedule(rt.recurring_transaction_id, new_due, due, count)
+                    skipped.add(rt.recurring_transaction_id)
+                    print(f"  -> Failed to process '{rt.description}': {e}")
+            if skipped:
+                self._engine = None
+            print("...Done.\n")
@@ -1,24 +1,209 @@
 # src/services/reporting_service.py
-from typing import Dict, List
+import itertools
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+import pyarrow as pa
+from dateutil.relativedelta import relativedelta
 from src.dao.transaction_dao import TransactionDAO
 from src.dao.category_dao import CategoryDAO
+from src.models.money import Money, ZERO
+from src.services.top_k import SpaceSaving, payee_key
+from src.dao.fx_rates import to_days
+from src.services.currency_service import CurrencyService, amounts_in_base
+from src.services.archive_service import ArchiveError, ArchiveService
+
+# Length of each trend bucket in months.
+TREND_BUCKETS = {"month": 1, "quarter": 3, "year": 12}
+
+
+class ReportingError(Exception):
+    """Custom exception for reporting errors."""
+    pass
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    """First day of the month, quarter or year containing the given day."""
+    if bucket == "year":
+        return date(day.year, 1, 1)
+    if bucket == "quarter":
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, day.month, 1)
+
+
+def _bucket_label(start: date, bucket: str) -> str:
+    if bucket == "year":
+        return f"{start.year}"
+    if bucket == "quarter":
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return start.strftime("%Y-%m")
+
 
 class ReportingService:
     """
     Service for generating financial reports.
     """
-    def __init__(self, transaction_dao: TransactionDAO, category_dao: CategoryDAO):
+    def __init__(self, transaction_dao: TransactionDAO, category_dao: CategoryDAO,
+                 currency_service: Optional[CurrencyService] = None, archive_service: Optional[ArchiveService] = None):
         self.transaction_dao = transaction_dao
         self.category_dao = category_dao
+        # Converts expenses from accounts in other currencies into the base currency.
+        self.currency_service = currency_service
+        # Archived months are summed from their rollups and scanned from their partition files.
+        self.archive_service = archive_service
+
+    def _needs_conversion(self) -> bool:
+        return self.currency_service is not None and not self.currency_service.is_single_currency()
 
-    def generate_spending_summary(self, start_date: str, end_date: str) -> Dict:
+    def _needs_daily_rows(self, start_date: str, end_date: str) -> bool:
+        """Whether the range needs the per-day rows: to convert currencies, or to add archived months."""
+        return self._needs_conversion() or (
+            self.archive_service is not None and bool(self.archive_service.months_in_range(start_date, end_date)))
+
+    def _daily_spending(self, start_date: str, end_date: str) -> List[Dict]:
+        """
+        Expense totals per category and day in the base currency: the backend sums per
+        category, currency and day, archived days come from the rollups, and each row
+        is converted at its day's rate in one vectorized pass when needed.
+        """
+        rows = self.transaction_dao.get_daily_spending_by_currency(start_date, end_date)
+        if self.archive_service:
+            rows = rows + self.archive_service.spending_rollups(start_date, end_date)
+        totals = [(Money.from_db(r["total_spent"]) or ZERO).paise for r in rows]
+        if self._needs_conversion():
+            totals = self.currency_service.convert(totals, [r["currency"] for r in rows],
+                                                   to_days(str(r["day"]) for r in rows)).tolist()
+        return [{"category_name": r.get("category_name"), "period": r["day"], "total_spent": Money(int(paise)).to_db()}
+                for r, paise in zip(rows, totals)]
+
+    def generate_spending_summary(self, start_date: str, end_date: str, as_arrow: bool = False) -> Dict:
         """
         Generates a summary of expenses by category for a given date range.
+        With as_arrow the summary is an Arrow table (category_name, total_spent)
+        built from the column arrays, rather than a list of dicts.
         """
-        report_data = self.transaction_dao.get_spending_report(start_date, end_date)
-        
+        if self._needs_daily_rows(start_date, end_date):
+            rows = self._daily_spending(start_date, end_date)
+            names, codes = np.unique([r["category_name"] or "Uncategorized" for r in rows], return_inverse=True)
+            totals = np.bincount(codes, weights=[Money.from_db(r["total_spent"]).paise for r in rows], minlength=len(names))
+            order = np.argsort(-totals, kind="stable")
+            names, totals = names[order].astype(str), np.round(totals[order]) / 100
+            if as_arrow:
+                report_data = pa.table({"category_name": names, "total_spent": totals})
+            else:
+                report_data = [{"category_name": str(name), "total_spent": float(total)} for name, total in zip(names, totals)]
+        else:
+            report_data = self.transaction_dao.get_spending_report(start_date, end_date)
+            if as_arrow:
+                report_data = pa.table({
+                    "category_name": pa.array([r["category_name"] for r in report_data], pa.string()),
+                    "total_spent": pa.array([float(Money.from_db(r["total_spent"]) or ZERO) for r in report_data], pa.float64()),
+                })
+
         return {
             "start_date": start_date,
             "end_date": end_date,
             "summary": report_data
-        }
\ No newline at end of file
+        }
+
+    def generate_spending_trend(self, start_date: str, end_date: str, bucket: str = "month") -> Dict:
+        """
+        Generates expense totals as a category x period matrix for any date range,
+        bucketed by month, quarter or year, from a single backend request.
+        Periods without spending are included with zero totals.
+        """
+        # Step 1: Validate the range and bucket.
+        if bucket not in TREND_BUCKETS:
+            raise ReportingError(f"Bucket must be one of: {', '.join(TREND_BUCKETS)}.")
+        try:
+            start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        except (TypeError, ValueError):
+            raise ReportingError("Dates must be in YYYY-MM-DD format.")
+        if start > end:
+            raise ReportingError("Start date must not be after end date.")
+
+        # Step 2: Build every period of the range, so gaps show up as zeros.
+        periods: List[date] = []
+        period = _bucket_start(start, bucket)
+        while period <= end:
+            periods.append(period)
+            period += relativedelta(months=TREND_BUCKETS[bucket])
+        index = {p: i for i, p in enumerate(periods)}
+
+        # Step 3: Pivot the aggregated rows into the matrix; daily rows when currencies or archived months need them.
+        if self._needs_daily_rows(start_date, end_date):
+            rows = self._daily_spending(start_date, end_date)
+        else:
+            rows = self.transaction_dao.get_spending_trend(start_date, end_date, bucket)
+        matrix: Dict[str, List[Money]] = {}
+        for row in rows:
+            row_period = _bucket_start(date.fromisoformat(str(row["period"])[:10]), bucket)
+            if row_period not in index:
+                continue
+            totals = matrix.setdefault(row.get("category_name") or "Uncategorized", [ZERO] * len(periods))
+            totals[index[row_period]] += Money.from_db(row["total_spent"]) or ZERO
+
+        categories = sorted(matrix)
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "bucket": bucket,
+            "periods": [_bucket_label(p, bucket) for p in periods],
+            "categories": categories,
+            "matrix": {name: matrix[name] for name in categories},
+            "period_totals": [Money.total(matrix[name][i] for name in categories) for i in range(len(periods))],
+        }
+
+    def generate_top_spending(self, start_date: str, end_date: str, limit: int = 10, capacity: int = None) -> Dict:
+        """
+        Finds where the money goes: the top categories and payees (derived from
+        descriptions) by amount spent and by number of expenses over any date range.
+        Expenses are streamed page by page into Space-Saving summaries of bounded
+        size, so memory does not grow with the range. Each entry carries the maximum
+        over-estimate of its value, which is 0 unless there were more distinct names
+        than the summary holds (capacity, by default ten times the limit).
+        """
+        # Step 1: Validate the range and size.
+        try:
+            start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        except (TypeError, ValueError):
+            raise ReportingError("Dates must be in YYYY-MM-DD format.")
+        if start > end:
+            raise ReportingError("Start date must not be after end date.")
+        if limit < 1:
+            raise ReportingError("Limit must be at least 1.")
+        capacity = max(capacity or limit * 10, limit)
+
+        # Step 2: One pass over the expenses, archived ones first, one page in memory at a time.
+        summaries = {name: SpaceSaving(capacity) for name in
+                     ("categories_by_spend", "categories_by_count", "payees_by_spend", "payees_by_count")}
+        scanned = 0
+        currencies = self.currency_service.account_currencies() if self.currency_service else None
+        try:
+            archived = (self.archive_service.iter_archived_pages(start_date, end_date, type="Expense")
+                        if self.archive_service else iter(()))
+            for page in itertools.chain(archived, self.transaction_dao.iter_transaction_pages(start_date, end_date, type="Expense")):
+                amounts = amounts_in_base(page, self.currency_service, currencies).tolist()
+                for t, paise in zip(page, amounts):
+                    category = t.category_name or "Uncategorized"
+                    payee = payee_key(t.description) or "(no description)"
+                    summaries["categories_by_spend"].add(category, paise)
+                    summaries["categories_by_count"].add(category)
+                    summaries["payees_by_spend"].add(payee, paise)
+                    summaries["payees_by_count"].add(payee)
+                scanned += len(page)
+        except ArchiveError as e:
+            raise ReportingError(str(e)) from e
+
+        # Step 3: Report the heaviest entries of each summary.
+        report = {"start_date": start_date, "end_date": end_date, "limit": limit,
+                  "transactions_scanned": scanned,
+                  "total_spent": Money(summaries["categories_by_spend"].total)}
+        for name, summary in summaries.items():
+            by_spend = name.endswith("_by_spend")
+            report[name] = [{
+                "name": key,
+                "amount" if by_spend else "count": Money(value) if by_spend else value,
+                "max_error": Money(error) if by_spend else error,
+            } for key, value, error in summary.top(limit)]
+        return report
@@ -1,7 +1,8 @@
 # src/services/step_service.py
-from typing import Dict
 from src.dao.step_dao import StepDAO
 from src.dao.goal_dao import GoalDAO
+from src.models.records import Step
+from src.dao.unit_of_work import unit_of_work
 
 class StepError(Exception):
     """Custom exception for step-related business logic errors."""
@@ -15,7 +16,8 @@ class StepService:
         self.step_dao = step_dao
         self.goal_dao = goal_dao
 
-    def add_step_to_goal(self, goal_id: int, description: str) -> Dict:
+    @unit_of_work()
+    def add_step_to_goal(self, goal_id: int, description: str) -> Step:
         """Adds a new step to a goal, after checking for duplicates."""
         # Rule 1: A step can only be added to a goal that exists.
         if not self.goal_dao.get_goal_by_id(goal_id):
@@ -24,12 +26,12 @@ class StepService:
         # NEW: Rule 2: Check for duplicate step descriptions.
         existing_steps = self.step_dao.get_steps_by_goal_id(goal_id)
         for step in existing_steps:
-            if step['description'].lower() == description.lower():
+            if step.description.lower() == description.lower():
                 raise StepError(f'Step "{description}" already exists for this goal.')
         
         # If all checks pass, create the new step.
         return self.step_dao.create_step(goal_id, description)
 
-    def mark_step_as_completed(self, step_id: int) -> Dict:
+    def mark_step_as_completed(self, step_id: int) -> Step:
         """Updates a step's status to 'Completed'."""
         return self.step_dao.update_step(step_id, {"status": "Completed"})
\ No newline at end of file
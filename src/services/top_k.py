@@ -0,0 +1,66 @@
+# src/services/top_k.py
+import heapq
+import re
+from typing import Dict, Hashable, List, Tuple
+
+_NON_WORD = re.compile(r"[^a-z\s]+")
+
+
+def payee_key(description: str, words: int = 3) -> str:
+    """
+    Payee name derived from a free-text description: lower-cased, digits and
+    punctuation (order numbers, dates, references) dropped, first few words kept.
+    """
+    cleaned = _NON_WORD.sub(" ", (description or "").lower()).split()
+    return " ".join(cleaned[:words])
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving heavy-hitter summary holding at most `capacity` counters.
+    When a new key arrives and the summary is full, the smallest counter is taken
+    over: the key inherits its value (an over-estimate) and records it as the
+    error. Every key whose true total exceeds total / capacity is guaranteed to be
+    kept, and each reported value is at most `error` above the true one.
+    Counts are exact (error 0) while there are no more distinct keys than capacity.
+    """
+    __slots__ = ("capacity", "total", "_counters", "_heap")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        # key -> [value, error]
+        self._counters: Dict[Hashable, List[int]] = {}
+        # (value, key) entries; stale ones are skipped when looking for the minimum.
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def add(self, key: Hashable, weight: int = 1) -> None:
+        self.total += weight
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) < self.capacity:
+                counter = self._counters[key] = [0, 0]
+            else:
+                floor, evicted = self._pop_min()
+                del self._counters[evicted]
+                counter = self._counters[key] = [floor, floor]
+        counter[0] += weight
+        heapq.heappush(self._heap, (counter[0], key))
+        # Updates leave stale heap entries behind; rebuild before they outgrow the counters.
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value, k) for k, (value, _) in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        while True:
+            value, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == value:
+                return value, key
+
+    def top(self, k: int) -> List[Tuple[Hashable, int, int]]:
+        """The k largest counters as (key, value, error), largest first."""
+        ranked = heapq.nlargest(k, self._counters.items(), key=lambda item: item[1][0])
+        return [(key, value, error) for key, (value, error) in ranked]
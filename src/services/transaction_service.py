@@ -1,14 +1,32 @@
 # src/services/transaction_service.py
-from typing import Dict, Optional
+import uuid
+from datetime import date
+from typing import Dict, List, Optional
 from src.dao.transaction_dao import TransactionDAO
 from src.dao.goal_dao import GoalDAO
 from src.dao.category_dao import CategoryDAO
 from src.dao.account_dao import AccountDAO # Import AccountDAO
+from src.dao.scheduler import Priority, priority
+from src.dao.unit_of_work import unit_of_work
+from src.services.budget_service import BudgetService, BudgetWarning
+from src.services.anomaly_service import AnomalyService
+from src.services.currency_service import CurrencyService
+from src.services.duplicate_service import DuplicateService, fingerprint, is_fingerprint_violation
+from src.dao.fx_rates import to_days
+from src.models.money import Money, to_money
+from src.models.records import Transaction, BALANCE_EFFECT
 
 class TransactionError(Exception):
     """Custom exception for transaction-related business logic errors."""
     pass
 
+class DuplicateTransactionError(TransactionError):
+    """Custom exception for a transaction that is already in the ledger."""
+    pass
+
+# What record_batch does with entries that duplicate a recorded transaction or an earlier entry.
+DUPLICATE_POLICIES = ("reject", "skip")
+
 class TransactionService:
     """
     Handles business logic for financial transactions, including updating account balances.
@@ -18,57 +36,251 @@ class TransactionService:
         transaction_dao: TransactionDAO,
         goal_dao: GoalDAO,
         category_dao: CategoryDAO,
-        account_dao: AccountDAO # Add AccountDAO
+        account_dao: AccountDAO, # Add AccountDAO
+        budget_service: Optional[BudgetService] = None,
+        anomaly_service: Optional[AnomalyService] = None,
+        currency_service: Optional[CurrencyService] = None,
+        duplicate_service: Optional[DuplicateService] = None
     ):
         self.transaction_dao = transaction_dao
         self.goal_dao = goal_dao
         self.category_dao = category_dao
         self.account_dao = account_dao # Store AccountDAO
+        # Keeps the running per-category monthly totals and reports the budget alerts they cross.
+        self.budget_service = budget_service
+        # Scores each new expense against the running stats of its category and account.
+        self.anomaly_service = anomaly_service
+        # Budgets are in the base currency, so spend from other currencies is converted first.
+        self.currency_service = currency_service
+        # Fingerprints of the ledger, so batches are checked for duplicates before writing.
+        self.duplicate_service = duplicate_service
+
+    @staticmethod
+    def _fingerprint(account_id: int, amount: Money, type: str, description: Optional[str],
+                     allow_duplicate: bool, fingerprint_date: Optional[date]) -> Optional[str]:
+        """The fingerprint to store, or None for a deliberate repeat."""
+        if allow_duplicate:
+            return None
+        return fingerprint(account_id, amount, type, fingerprint_date or date.today(), description)
 
+    def _create_transaction(self, **fields) -> Transaction:
+        """Creates a transaction, turning the backend's rejection of a fingerprint into a DuplicateTransactionError."""
+        try:
+            transaction = self.transaction_dao.create_transaction(**fields)
+        except Exception as e:
+            if is_fingerprint_violation(e):
+                raise DuplicateTransactionError(
+                    f"An identical {fields['type'].lower()} of {fields['amount']} is already recorded for this account.") from e
+            raise
+        if self.duplicate_service:
+            self.duplicate_service.add([fields.get("fingerprint")])
+        return transaction
+
+    @unit_of_work()
     def add_expense(
-        self, amount: float, category_name: str, account_id: int, description: Optional[str]
-    ) -> Dict:
-        """Adds a general expense, assigning it to a category and deducting from an account."""
+        self, amount: Money, category_name: str, account_id: int, description: Optional[str],
+        allow_duplicate: bool = False, fingerprint_date: Optional[date] = None,
+        budget_alerts: Optional[List[BudgetWarning]] = None
+    ) -> Transaction:
+        """
+        Adds a general expense, assigning it to a category and deducting from an account.
+        An identical expense already recorded that day is rejected unless allow_duplicate
+        is set; fingerprint_date is the day it counts for (today by default).
+        Budget alerts the expense crosses are appended to budget_alerts, if given.
+        """
+        amount = to_money(amount)
+        if amount <= Money(0):
+            raise TransactionError("Amount must be positive.")
         # Step 1: Validate the account exists
         account = self.account_dao.get_account_by_id(account_id)
         if not account:
             raise TransactionError(f"Account with ID {account_id} not found.")
 
         # Step 2: Update the account balance
-        new_balance = account['balance'] - amount
+        new_balance = account.balance - amount
         self.account_dao.update_account_balance(account_id, new_balance)
 
         # Step 3: Create the transaction record
         category = self.category_dao.get_or_create_category(category_name)
-        return self.transaction_dao.create_transaction(
+        transaction = self._create_transaction(
             amount=amount,
             type='Expense',
             account_id=account_id,
-            category_id=category['category_id'],
-            description=description
+            category_id=category.category_id,
+            description=description,
+            fingerprint=self._fingerprint(account_id, amount, 'Expense', description, allow_duplicate, fingerprint_date)
         )
 
-    def add_income(self, amount: float, account_id: int, description: Optional[str]) -> Dict:
-        """Adds a general income record and adds it to an account."""
+        # Step 4: Add to the category's month-to-date total and check its budget
+        if self.budget_service:
+            spend = self.currency_service.to_base(amount, account.currency) if self.currency_service else amount
+            alerts = self.budget_service.record_spend(category.category_id, category.name, spend)
+            if budget_alerts is not None:
+                budget_alerts.extend(alerts)
+        if self.anomaly_service:
+            self.anomaly_service.observe(transaction, category.name)
+        return transaction
+
+    @unit_of_work()
+    def add_income(self, amount: Money, account_id: int, description: Optional[str],
+                   allow_duplicate: bool = False, fingerprint_date: Optional[date] = None) -> Transaction:
+        """Adds a general income record and adds it to an account. Duplicates are handled as in add_expense."""
+        amount = to_money(amount)
+        if amount <= Money(0):
+            raise TransactionError("Amount must be positive.")
         # Step 1: Validate the account exists
         account = self.account_dao.get_account_by_id(account_id)
         if not account:
             raise TransactionError(f"Account with ID {account_id} not found.")
 
         # Step 2: Update the account balance
-        new_balance = account['balance'] + amount
+        new_balance = account.balance + amount
         self.account_dao.update_account_balance(account_id, new_balance)
         
         # Step 3: Create the transaction record
-        return self.transaction_dao.create_transaction(
+        return self._create_transaction(
             amount=amount,
             type='Income',
             account_id=account_id,
-            description=description
+            description=description,
+            fingerprint=self._fingerprint(account_id, amount, 'Income', description, allow_duplicate, fingerprint_date)
         )
 
-    def allocate_to_goal(self, goal_id: int, amount: float, account_id: int, description: Optional[str]) -> Dict:
+    @priority(Priority.BULK)
+    @unit_of_work()
+    def record_batch(self, entries: List[Dict], on_duplicate: str = "reject",
+                     budget_alerts: Optional[List[BudgetWarning]] = None) -> List[Optional[Transaction]]:
+        """
+        Records many general expenses and incomes with bulk writes: one insert for all
+        transactions and one balance update per account instead of per entry.
+        Each entry has 'type' ('Expense' or 'Income'), 'amount', 'account_id' and
+        optional 'category_name', 'description' and 'allow_duplicate'.
+        Entries identical to a transaction recorded today, or to an earlier entry, are
+        found with one hash lookup each: 'reject' fails the whole batch, 'skip' leaves
+        them out. The result is aligned with entries, with None for skipped ones.
+        Budget alerts the batch crosses are appended to budget_alerts, if given.
+        """
+        if on_duplicate not in DUPLICATE_POLICIES:
+            raise TransactionError(f"Unknown duplicate policy '{on_duplicate}'. Use one of: {', '.join(DUPLICATE_POLICIES)}.")
+        if not entries:
+            return []
+        # Step 1: Validate every entry before writing anything. Balances are read from the
+        # backend (list_accounts may be served from the CLI's local replica, which can be stale).
+        accounts = {}
+        for entry in entries:
+            if entry["type"] not in ("Expense", "Income"):
+                raise TransactionError(f"Unsupported transaction type '{entry['type']}' in batch.")
+            if to_money(entry["amount"]) <= Money(0):
+                raise TransactionError(f"Amount must be positive, got {entry['amount']} in batch.")
+            account_id = entry["account_id"]
+            if account_id not in accounts:
+                accounts[account_id] = self.account_dao.get_account_by_id(account_id)
+            if not accounts[account_id]:
+                raise TransactionError(f"Account with ID {account_id} not found.")
+
+        # Step 2: Fingerprint every entry and look each one up in the ledger's hash set.
+        today = date.today()
+        amounts = [to_money(entry["amount"]) for entry in entries]
+        fingerprints = [self._fingerprint(entry["account_id"], amount, entry["type"], entry.get("description"),
+                                          entry.get("allow_duplicate", False), today)
+                        for entry, amount in zip(entries, amounts)]
+        checked = [fp for fp in fingerprints if fp]
+        if self.duplicate_service:
+            found = iter(self.duplicate_service.find_duplicates(checked))
+        else:
+            # Without the ledger's set, only repeats within the batch are caught here.
+            batch = set()
+            found = []
+            for fp in checked:
+                found.append(fp in batch)
+                batch.add(fp)
+            found = iter(found)
+        duplicates = [bool(fp) and next(found) for fp in fingerprints]
+        if any(duplicates) and on_duplicate == "reject":
+            positions = ", ".join(str(i + 1) for i, dup in enumerate(duplicates) if dup)
+            raise DuplicateTransactionError(f"Batch entries already recorded today: {positions}.")
+
+        # Step 3: Resolve each distinct category once and build the rows.
+        categories: Dict[str, int] = {}
+        deltas: Dict[int, Money] = {}
+        rows = []
+        for entry, amount, fp, duplicate in zip(entries, amounts, fingerprints, duplicates):
+            if duplicate:
+                continue
+            category_id = None
+            if entry["type"] == "Expense":
+                name = entry.get("category_name") or "Uncategorized"
+                if name not in categories:
+                    categories[name] = self.category_dao.get_or_create_category(name).category_id
+                category_id = categories[name]
+            deltas[entry["account_id"]] = deltas.get(entry["account_id"], Money(0)) + amount * BALANCE_EFFECT[entry["type"]]
+            rows.append({
+                "account_id": entry["account_id"],
+                "category_id": category_id,
+                "amount": amount,
+                "type": entry["type"],
+                "description": entry.get("description"),
+                "fingerprint": fp,
+            })
+
+        # Step 4: Apply the net change per account, then insert all rows at once.
+        for account_id, delta in deltas.items():
+            self.account_dao.update_account_balance(account_id, accounts[account_id].balance + delta)
+        try:
+            transactions = self.transaction_dao.create_transactions(rows)
+        except Exception as e:
+            # Another session recorded one of the entries after the lookup.
+            if is_fingerprint_violation(e):
+                raise DuplicateTransactionError("An entry of the batch was recorded elsewhere meanwhile; nothing was saved.") from e
+            raise
+        if self.duplicate_service:
+            self.duplicate_service.add([row["fingerprint"] for row in rows])
+
+        # Step 5: One running-total update per category for the whole batch, in the base currency.
+        if self.budget_service:
+            expenses = [row for row in rows if row["type"] == "Expense"]
+            paise = [row["amount"].paise for row in expenses]
+            if self.currency_service:
+                paise = self.currency_service.convert(
+                    paise, [accounts[row["account_id"]].currency for row in expenses], to_days([None] * len(expenses))).tolist()
+            spends: Dict[int, Money] = {}
+            for row, spend in zip(expenses, paise):
+                spends[row["category_id"]] = spends.get(row["category_id"], Money(0)) + Money(int(spend))
+            alerts = self.budget_service.record_spends(spends, {cid: name for name, cid in categories.items()})
+            if budget_alerts is not None:
+                budget_alerts.extend(alerts)
+        if self.anomaly_service:
+            names = {cid: name for name, cid in categories.items()}
+            for t in transactions:
+                self.anomaly_service.observe(t, names.get(t.category_id))
+        written = iter(transactions)
+        return [None if duplicate else next(written, None) for duplicate in duplicates]
+
+    def transfer(
+        self, from_account_id: int, to_account_id: int, amount: Money, description: Optional[str] = None
+    ) -> List[Transaction]:
+        """
+        Moves money between two accounts. Both legs ('Transfer Out' and 'Transfer In')
+        share a transfer id and are written together with both balance changes in a
+        single backend call, which fails as a whole if the source lacks funds.
+        """
+        amount = to_money(amount)
+        if from_account_id == to_account_id:
+            raise TransactionError("Cannot transfer to the same account.")
+        if amount <= Money(0):
+            raise TransactionError("Transfer amount must be positive.")
+        try:
+            return self.transaction_dao.transfer_funds(str(uuid.uuid4()), from_account_id, to_account_id, amount, description)
+        except Exception as e:
+            # The database function reports missing accounts and insufficient funds.
+            raise TransactionError(f"Transfer failed: {getattr(e, 'message', None) or e}") from e
+
+    @unit_of_work()
+    def allocate_to_goal(self, goal_id: int, amount: Money, account_id: int, description: Optional[str]) -> Transaction:
         """Allocates a saving amount from an account to a specific goal."""
+        amount = to_money(amount)
+        if amount <= Money(0):
+            raise TransactionError("Allocation amount must be positive.")
         # Rule 1: Validate that the goal exists.
         if not self.goal_dao.get_goal_by_id(goal_id):
             raise TransactionError(f"Goal with ID {goal_id} not found.")
@@ -77,13 +289,13 @@ class TransactionService:
         account = self.account_dao.get_account_by_id(account_id)
         if not account:
             raise TransactionError(f"Account with ID {account_id} not found.")
-        if account['balance'] < amount:
-            raise TransactionError(f"Insufficient funds in '{account['name']}'. "
-                                   f"Required: {amount}, Available: {account['balance']}.")
+        if account.balance < amount:
+            raise TransactionError(f"Insufficient funds in '{account.name}'. "
+                                   f"Required: {amount}, Available: {account.balance}.")
 
         # This action is effectively an expense from a general account that is marked as a 'Saving' for a goal.
         # Step 1: Deduct the amount from the account balance
-        new_balance = account['balance'] - amount
+        new_balance = account.balance - amount
         self.account_dao.update_account_balance(account_id, new_balance)
 
         # Step 2: Create the 'Saving' transaction linked to the goal